@@ -0,0 +1,86 @@
+import os
+from typing import NamedTuple, Tuple
+
+from PIL import Image, ImageDraw
+from pptx import Presentation
+from pptx.util import Inches, Pt
+
+
+class DeckSpec(NamedTuple):
+    """The size of a synthetic template deck."""
+    slides: int = 10                # Number of slides
+    text_shapes: int = 5            # Text boxes on every slide
+    placeholders_per_run: int = 3   # Placeholders in the run of every text box
+    table_rows: int = 50            # Records of the relationship table on every slide. 0 leaves the table out
+    pictures: int = 2               # Pictures with alt text placeholders on every slide
+    groups: int = 1                 # Group shapes holding a text box and a picture on every slide
+
+
+def _generate_image(path: str, text: str, size=(300, 200), color=(100, 100, 200)) -> None:
+    image = Image.new("RGB", size, color=color)
+    draw = ImageDraw.Draw(image)
+    draw.text((10, 10), text, fill=(255, 255, 255))
+    image.save(path)
+
+
+def generate_deck(spec: DeckSpec, output_dir: str, name: str = "template") -> Tuple[str, dict]:
+
+    """
+    Description: Build a template PowerPoint of a given size and a context which fills every placeholder of it.
+    The deck is the same for the same spec, so results can be compared between runs and releases.
+
+    @input spec: The size of the deck
+    @input output_dir: Directory the template and its images are written to
+    @input name: File name of the template without extension
+
+    @output template_path, context: File path of the template and the context to render it with
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    placeholder_path = os.path.join(output_dir, "placeholder.png")
+    photo_path = os.path.join(output_dir, "photo.png")
+    _generate_image(placeholder_path, "Placeholder", color=(150, 150, 150))
+    _generate_image(photo_path, "Photo", color=(200, 50, 50))
+
+    context = {}
+    prs = Presentation()
+    for slide_index in range(spec.slides):
+        slide = prs.slides.add_slide(prs.slide_layouts[5])
+        for shape_index in range(spec.text_shapes):
+            keys = [f"text_{slide_index}_{shape_index}_{key_index}" for key_index in range(spec.placeholders_per_run)]
+            textbox = slide.shapes.add_textbox(Inches(0.5), Inches(0.5 + shape_index * 0.4), Inches(4), Inches(0.4))
+            run = textbox.text_frame.paragraphs[0].add_run()
+            run.text = " and ".join(f"${key}$" for key in keys)
+            run.font.size = Pt(12)
+            context.update({key: f"value of {key}" for key in keys})
+
+        if spec.table_rows:
+            key = f"relationship_rows_{slide_index}"
+            table = slide.shapes.add_table(2, 3, Inches(5), Inches(0.5), Inches(4.5), Inches(0.8)).table
+            for column, field in enumerate(["id", "name", "amount"]):
+                table.cell(0, column).text = field.title()
+                table.cell(1, column).text = f"${key}.{field}$"
+            context[key] = [{"id": str(row), "name": f"Name {row}", "amount": f"{row * 1.5:.2f}"}
+                            for row in range(spec.table_rows)]
+
+        for picture_index in range(spec.pictures):
+            alt_text = f"picture_{slide_index}_{picture_index}.png"
+            picture = slide.shapes.add_picture(placeholder_path, Inches(0.5 + picture_index * 1.2), Inches(5),
+                                               height=Inches(1))
+            picture._element.nvPicPr.cNvPr.set("descr", alt_text)
+            context[alt_text] = photo_path
+
+        for group_index in range(spec.groups):
+            group = slide.shapes.add_group_shape()
+            key = f"group_{slide_index}_{group_index}"
+            textbox = group.shapes.add_textbox(Inches(7), Inches(5 + group_index * 0.5), Inches(2), Inches(0.4))
+            textbox.text_frame.text = f"${key}$"
+            alt_text = f"group_picture_{slide_index}_{group_index}.png"
+            picture = group.shapes.add_picture(placeholder_path, Inches(9), Inches(5 + group_index * 0.5),
+                                               height=Inches(0.4))
+            picture._element.nvPicPr.cNvPr.set("descr", alt_text)
+            context[key] = f"value of {key}"
+            context[alt_text] = photo_path
+
+    template_path = os.path.join(output_dir, f"{name}.pptx")
+    prs.save(template_path)
+    return template_path, context
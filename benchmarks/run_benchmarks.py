@@ -0,0 +1,172 @@
+"""
+Description: Measure the hot paths of templatepptx on synthetic decks and write the results as JSON, so the
+numbers of two releases or two commits can be compared.
+
+Run from the root of the repository:
+
+    python benchmarks/run_benchmarks.py --output results.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from pptx import Presentation
+
+from deck_generator import DeckSpec, generate_deck
+from templatepptx import TemplatePptx, BatchTool, CompiledTemplate
+from table_processor import TableProcessor
+from template_pptx_options import TemplatePptxOptions
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+def peak_rss_mb():
+
+    """
+    Description: Peak resident memory of the process so far in MB, or None when it cannot be read. Every
+    benchmark runs in a process of its own, so the peak is the one of that benchmark and not of the ones before it
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _timed(function, repeat: int, setup=None) -> float:
+    """Best wall time of a number of runs, in seconds. setup runs before every run outside of the timing and
+    what it returns is handed to the function"""
+    best = float("inf")
+    for _ in range(repeat):
+        arguments = (setup(),) if setup is not None else ()
+        start = time.perf_counter()
+        function(*arguments)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _in_own_process(function, *args) -> dict:
+    """Run a benchmark in a new process so its peak memory is not mixed with the other benchmarks"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return executor.submit(function, *args).result()
+
+
+def bench_render(spec: DeckSpec, work_dir: str, repeat: int) -> dict:
+    template_path, context = generate_deck(spec, work_dir, "render_template")
+    output_path = os.path.join(work_dir, "render_output.pptx")
+    return _in_own_process(_run_render, template_path, context, output_path, repeat)
+
+
+def _run_render(template_path: str, context: dict, output_path: str, repeat: int) -> dict:
+    seconds = _timed(lambda: TemplatePptx(template_path, context, output_path).parse_template_pptx(), repeat)
+    return {"seconds": seconds, "renders_per_second": 1 / seconds, "peak_rss_mb": peak_rss_mb()}
+
+
+def bench_compiled_render(spec: DeckSpec, work_dir: str, repeat: int) -> dict:
+    template_path, context = generate_deck(spec, work_dir, "compiled_template")
+    output_path = os.path.join(work_dir, "compiled_output.pptx")
+    return _in_own_process(_run_compiled_render, template_path, context, output_path, repeat)
+
+
+def _run_compiled_render(template_path: str, context: dict, output_path: str, repeat: int) -> dict:
+    # Compiling is done once for many renders, so it is left out of the timing
+    compiled = CompiledTemplate(template_path)
+    seconds = _timed(lambda: compiled.render(context, output_path), repeat)
+    return {"seconds": seconds, "renders_per_second": 1 / seconds, "peak_rss_mb": peak_rss_mb()}
+
+
+def bench_table_rows(rows: int, work_dir: str, repeat: int) -> dict:
+    spec = DeckSpec(slides=1, text_shapes=0, table_rows=rows, pictures=0, groups=0)
+    template_path, context = generate_deck(spec, work_dir, "table_template")
+    return _in_own_process(_run_table_rows, rows, template_path, context, repeat)
+
+
+def _run_table_rows(rows: int, template_path: str, context: dict, repeat: int) -> dict:
+    options = TemplatePptxOptions()
+
+    def load_table():
+        # Loading the template is not part of the table processor, so it is left out of the timing
+        return next(shape for shape in Presentation(template_path).slides[0].shapes if shape.has_table)
+
+    def process_table(shape):
+        TableProcessor(shape, context, 1, "$").process_table(options)
+
+    seconds = _timed(process_table, repeat, setup=load_table)
+    return {"rows": rows, "seconds": seconds, "rows_per_second": rows / seconds, "peak_rss_mb": peak_rss_mb()}
+
+
+def bench_combine(decks: int, work_dir: str, repeat: int, workers: int) -> dict:
+    spec = DeckSpec(slides=1, text_shapes=3, table_rows=5, pictures=1, groups=0)
+    template_path, context = generate_deck(spec, work_dir, "combine_template")
+    decks_dir = os.path.join(work_dir, "decks")
+    os.makedirs(decks_dir, exist_ok=True)
+    compiled = CompiledTemplate(template_path)
+    for index in range(decks):
+        compiled.render(context, os.path.join(decks_dir, f"{index}.pptx"))
+
+    results = {"decks": decks, "workers": workers}
+    for streaming in [False, True]:
+        output_path = os.path.join(work_dir, "combined.pptx")
+        results["streaming" if streaming else "in_memory"] = _in_own_process(
+            _run_combine, decks, decks_dir, output_path, streaming, workers, repeat)
+    return results
+
+
+def _run_combine(decks: int, decks_dir: str, output_path: str, streaming: bool, workers: int, repeat: int) -> dict:
+    # The peak memory is the one of the combining process, the workers reading the decks are not counted
+    batch_tool = BatchTool(decks_dir, output_path)
+    seconds = _timed(lambda: batch_tool.combine_slides(streaming=streaming, workers=workers), repeat)
+    return {"seconds": seconds, "decks_per_second": decks / seconds, "peak_rss_mb": peak_rss_mb()}
+
+
+def main(argv=None) -> dict:
+    defaults = DeckSpec()
+    parser = argparse.ArgumentParser(description="Benchmark templatepptx on synthetic decks")
+    parser.add_argument("--slides", type=int, default=defaults.slides)
+    parser.add_argument("--text-shapes", type=int, default=defaults.text_shapes)
+    parser.add_argument("--placeholders", type=int, default=defaults.placeholders_per_run)
+    parser.add_argument("--rows", type=int, default=defaults.table_rows)
+    parser.add_argument("--pictures", type=int, default=defaults.pictures)
+    parser.add_argument("--groups", type=int, default=defaults.groups)
+    parser.add_argument("--table-rows", type=int, default=2000, help="Rows of the TableProcessor benchmark")
+    parser.add_argument("--decks", type=int, default=200, help="Decks of the combine_slides benchmark")
+    parser.add_argument("--workers", type=int, default=1, help="Workers of the combine_slides benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of every benchmark, the best is kept")
+    parser.add_argument("--output", help="File path of the JSON results. Defaults to printing them")
+    args = parser.parse_args(argv)
+
+    spec = DeckSpec(args.slides, args.text_shapes, args.placeholders, args.rows, args.pictures, args.groups)
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "spec": spec._asdict(),
+            "render": bench_render(spec, os.path.join(work_dir, "render"), args.repeat),
+            "compiled_render": bench_compiled_render(spec, os.path.join(work_dir, "compiled"), args.repeat),
+            "table_rows": bench_table_rows(args.table_rows, os.path.join(work_dir, "table"), args.repeat),
+            "combine_slides": bench_combine(args.decks, os.path.join(work_dir, "combine"), args.repeat,
+                                            args.workers),
+        }
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(text)
+    else:
+        print(text)
+    return results
+
+
+if __name__ == "__main__":
+    main()
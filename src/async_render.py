@@ -0,0 +1,121 @@
+import asyncio
+import os
+from concurrent.futures import Executor
+from typing import AsyncIterable, AsyncIterator, IO, Iterable, List, Union
+
+from batch_renderer import RenderResult, _output_path, _render_one
+from compiled_template import CompiledTemplate
+from pptx_io import PptxSource, PptxOutput
+from template_pptx_options import TemplatePptxOptions
+
+# A batch of contexts can be a plain iterable or an async iterable such as an async generator
+Contexts = Union[Iterable[dict], AsyncIterable[dict]]
+
+
+async def compile_async(template: PptxSource, special_character: str = "$", options: TemplatePptxOptions = None,
+                        executor: Executor = None) -> CompiledTemplate:
+
+    """
+    Description: Load and compile a template without blocking the event loop
+
+    @input template: File path, bytes or file-like object of the template PowerPoint
+    @input special_character: Special character which is wrapped around key words
+    @input options: TemplatePptxOptions used for every render
+    @input executor: Executor the work runs in. Defaults to the default executor of the event loop
+
+    @output compiled_template: A CompiledTemplate of the template PowerPoint
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, CompiledTemplate, template, special_character, options)
+
+
+async def render_async(template: Union[CompiledTemplate, PptxSource], context: dict, output: PptxOutput = None,
+                       special_character: str = "$", options: TemplatePptxOptions = None,
+                       executor: Executor = None) -> Union[str, os.PathLike, IO[bytes], bytes]:
+
+    """
+    Description: Render a template for a context without blocking the event loop. Loading the template, the
+    xml work, reading the images and writing the output all run in an executor.
+
+    @input template: A CompiledTemplate, or the file path, bytes or file-like object of a template PowerPoint
+    @input context: A dictionary containing all of the data that is fed into the template
+    @input output: File path or file-like object the rendered PowerPoint is written to. When None the
+    rendered PowerPoint is returned as bytes
+    @input special_character: Special character which is wrapped around key words. Not used with a CompiledTemplate
+    @input options: TemplatePptxOptions of the render. Not used with a CompiledTemplate
+    @input executor: Executor the work runs in. Defaults to the default executor of the event loop
+
+    @output output: The output that was written to or the bytes of the rendered PowerPoint
+    """
+    if not isinstance(template, CompiledTemplate):
+        template = await compile_async(template, special_character, options, executor)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, template.render, context, output)
+
+
+async def render_many_async(template: Union[CompiledTemplate, PptxSource], contexts: Contexts, output_pattern: str,
+                            max_concurrency: int = 4, special_character: str = "$",
+                            options: TemplatePptxOptions = None, executor: Executor = None) -> List[RenderResult]:
+
+    """
+    Description: Render a template once for every context of a batch without blocking the event loop, with at
+    most max_concurrency renders running at once. A failing render is reported in its result and does not stop
+    the rest of the batch.
+
+    @input template: A CompiledTemplate, or the file path, bytes or file-like object of a template PowerPoint
+    @input contexts: An iterable or async iterable of context dictionaries
+    @input output_pattern: A format string for the output file paths ex. ("output/{index}.pptx")
+    @input max_concurrency: Maximum number of renders running at once
+    @input special_character: Special character which is wrapped around key words. Not used with a CompiledTemplate
+    @input options: TemplatePptxOptions used for every render. Not used with a CompiledTemplate
+    @input executor: Executor the renders run in. Defaults to the default executor of the event loop
+
+    @output results: A RenderResult for every context in the order of the contexts
+    """
+    results = [result async for result in iter_render_many_async(
+        template, contexts, output_pattern, max_concurrency, special_character, options, executor)]
+    results.sort(key=lambda result: result.index)
+    return results
+
+
+async def iter_render_many_async(template: Union[CompiledTemplate, PptxSource], contexts: Contexts,
+                                 output_pattern: str, max_concurrency: int = 4, special_character: str = "$",
+                                 options: TemplatePptxOptions = None,
+                                 executor: Executor = None) -> AsyncIterator[RenderResult]:
+
+    """
+    Description: Same as render_many_async but yields every RenderResult as soon as its render completes.
+    Contexts are only read once a render slot is free, so a long or endless stream of contexts is not held
+    in memory.
+    """
+    if max_concurrency < 1:
+        raise ValueError(f"max_concurrency must be a positive integer. Value: {max_concurrency}")
+    if not isinstance(template, CompiledTemplate):
+        template = await compile_async(template, special_character, options, executor)
+    loop = asyncio.get_running_loop()
+    in_flight = set()
+    index = 0
+    async for context in _aiter(contexts):
+        try:
+            output_path = _output_path(output_pattern, index, context)
+            in_flight.add(loop.run_in_executor(executor, _render_one, template, index, context, output_path))
+        except Exception as e:
+            yield RenderResult(index, None, e)
+        index += 1
+        if len(in_flight) >= max_concurrency:
+            done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    while in_flight:
+        done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+        for future in done:
+            yield future.result()
+
+
+async def _aiter(contexts: Contexts) -> AsyncIterator[dict]:
+    if hasattr(contexts, "__aiter__"):
+        async for context in contexts:
+            yield context
+    else:
+        for context in contexts:
+            yield context
@@ -0,0 +1,154 @@
+import copy
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Tuple, Union
+
+from compiled_template import CompiledTemplate
+from render_stats import RenderStats
+from template_pptx_options import TemplatePptxOptions
+
+
+class RenderResult(NamedTuple):
+    """The outcome of rendering one context of a batch."""
+    index: int                          # Position of the context in the batch
+    output_path: Union[str, None]       # Path of the rendered PowerPoint or None when the render failed
+    error: Union[Exception, None]       # The error raised while rendering or None when the render succeeded
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+# The compiled template of a worker process. It is loaded once when the worker starts.
+_worker_template: Union[CompiledTemplate, None] = None
+# The RenderStats of the render running in a worker process, sent back with its result
+_worker_stats: Union[RenderStats, None] = None
+
+
+def _init_worker(template: str, special_character: str, options: TemplatePptxOptions) -> None:
+    global _worker_template
+    _worker_template = CompiledTemplate(template, special_character, options)
+
+
+def _keep_worker_stats(stats: RenderStats) -> None:
+    global _worker_stats
+    _worker_stats = stats
+
+
+def _render_in_worker(index: int, context: dict,
+                      output_path: str) -> Tuple[RenderResult, Union[RenderStats, None]]:
+    global _worker_stats
+    _worker_stats = None
+    return _render_one(_worker_template, index, context, output_path), _worker_stats
+
+
+def _render_one(template: CompiledTemplate, index: int, context: dict, output_path: str) -> RenderResult:
+    try:
+        return RenderResult(index, template.render(context, output_path), None)
+    except Exception as e:
+        return RenderResult(index, None, e)
+
+
+def _output_path(output_pattern: str, index: int, context: dict) -> str:
+
+    """
+    Description: Build the output path of a context from the output pattern. The pattern is formatted with the
+    index of the context and the string keys of the context ex. ("output/{index}.pptx" or "output/{last_name}.pptx")
+    An exception in place of a context, like a line of a contexts file that could not be read, is raised so the
+    context is reported as a failed render.
+    """
+    if isinstance(context, Exception):
+        raise context
+    fields = {key: value for key, value in context.items() if isinstance(key, str)}
+    fields["index"] = index
+    return output_pattern.format_map(fields)
+
+
+def render_many(template: str, contexts: Iterable[dict], output_pattern: str, workers: int = 1,
+                special_character: str = "$", options: TemplatePptxOptions = None,
+                max_in_flight: int = None) -> List[RenderResult]:
+
+    """
+    Description: Render a template once for every context of a batch, one output PowerPoint per context.
+    The renders are spread over a pool of worker processes which each load and compile the template once.
+    Contexts are read from the iterable as the workers need them so only a bounded number are held in memory.
+    A failing render is reported in its result and does not stop the rest of the batch.
+
+    @input template: File path to the template PowerPoint
+    @input contexts: An iterable or generator of context dictionaries. An exception in place of a context is
+    reported as the error of its result
+    @input output_pattern: A format string for the output file paths. It is formatted with the index of the
+    context and the string keys of the context ex. ("output/{index}.pptx")
+    @input workers: Number of worker processes. 1 renders in the current process
+    @input special_character: Special character which is wrapped around key words
+    @input options: TemplatePptxOptions used for every render
+    @input max_in_flight: Maximum number of contexts handed to the workers at once. Defaults to twice the workers
+
+    @output results: A RenderResult for every context in the order of the contexts
+    """
+    results = list(iter_render_many(template, contexts, output_pattern, workers, special_character, options,
+                                    max_in_flight))
+    results.sort(key=lambda result: result.index)
+    return results
+
+
+def iter_render_many(template: str, contexts: Iterable[dict], output_pattern: str, workers: int = 1,
+                     special_character: str = "$", options: TemplatePptxOptions = None,
+                     max_in_flight: int = None) -> Iterator[RenderResult]:
+
+    """
+    Description: Same as render_many but yields every RenderResult as soon as its render completes, so
+    progress can be reported while the batch runs. Results are yielded in the order the renders complete.
+    """
+    options = options if options is not None else TemplatePptxOptions()
+    if workers <= 1:
+        compiled = CompiledTemplate(template, special_character, options)
+        return _iter_serial_results(compiled, contexts, output_pattern)
+    return _iter_pool_results(template, contexts, output_pattern, workers, special_character, options,
+                              max_in_flight if max_in_flight is not None else workers * 2)
+
+
+def _iter_serial_results(compiled: CompiledTemplate, contexts: Iterable[dict],
+                         output_pattern: str) -> Iterator[RenderResult]:
+    for index, context in enumerate(contexts):
+        try:
+            output_path = _output_path(output_pattern, index, context)
+        except Exception as e:
+            yield RenderResult(index, None, e)
+            continue
+        yield _render_one(compiled, index, context, output_path)
+
+
+def _iter_pool_results(template: str, contexts: Iterable[dict], output_pattern: str, workers: int,
+                       special_character: str, options: TemplatePptxOptions,
+                       max_in_flight: int) -> Iterator[RenderResult]:
+    # The stats callback stays in this process so it does not need to be picklable. The workers keep the stats
+    # of each render and send them back with its result
+    stats_callback = options.stats_callback
+    worker_options = copy.copy(options)
+    worker_options.stats_callback = _keep_worker_stats if stats_callback is not None else None
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(template, special_character, worker_options)) as executor:
+        in_flight = {}
+        for index, context in enumerate(contexts):
+            try:
+                output_path = _output_path(output_pattern, index, context)
+                in_flight[executor.submit(_render_in_worker, index, context, output_path)] = index
+            except Exception as e:
+                yield RenderResult(index, None, e)
+            if len(in_flight) >= max_in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield _future_result(future, in_flight.pop(future), stats_callback)
+        for future in list(in_flight):
+            yield _future_result(future, in_flight.pop(future), stats_callback)
+
+
+def _future_result(future, index: int, stats_callback: Union[Callable, None]) -> RenderResult:
+    try:
+        result, stats = future.result()
+    except Exception as e:
+        # The worker died or the result could not be sent back
+        return RenderResult(index, None, e)
+    if stats is not None:
+        stats_callback(stats)
+    return result
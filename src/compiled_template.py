@@ -0,0 +1,298 @@
+import copy
+import os
+import warnings
+from itertools import groupby
+from operator import attrgetter
+from typing import Callable, Dict, Iterable, List, NamedTuple, Tuple, Union, IO
+
+from pptx.presentation import Presentation as PowerPoint
+from pptx.shapes.autoshape import Shape
+
+from slide_renderer import SlideRenderer
+from shape_walker import TEXT, TABLE, PICTURE, ShapeContent, iter_shape_contents
+from template_pptx_options import TemplatePptxOptions
+from pptx_io import PptxSource, PptxOutput, read_pptx_bytes, open_presentation, PresentationSnapshot
+from placeholder_engine import iter_candidate_keys, iter_template_keys
+from slide_splicer import FullRenderRequired, SlideParts, trim_template, collect_slides, write_slides
+from render_stats import RenderStats, LOAD, time_stage, time_slide, save_presentation_with_stats, write_with_stats
+from slide_parallel import render_slide_parts
+from slide_repeater import REPEAT_PREFIX, find_repeat_name, iter_repeated_slides
+
+
+class PlaceholderSite(NamedTuple):
+    """A recorded location in the template that needs work at render time."""
+    kind: str                   # TEXT, TABLE or PICTURE
+    slide_index: int            # Index of the slide in the presentation, starting at 0
+    path: Tuple[int, ...]       # Shape indexes from the slide shape tree down into group shapes
+    keys: Tuple[str, ...]       # Context keys referenced at this location
+    candidates: Tuple[str, ...] # Every key a magic word here could have, also after a literal special character
+
+
+def find_sites(ppt: PowerPoint, special_character: str = "$") -> List[PlaceholderSite]:
+
+    """
+    Description: Walk a template once and record every location that will need work at render time. The
+    template is only read.
+
+    @input ppt: The pristine template Presentation
+    @input special_character: Special character which is wrapped around key words
+
+    @output sites: A list of PlaceholderSite in slide and shape order
+    """
+    sites = []
+    for slide_index, slide in enumerate(ppt.slides):
+        for content in iter_shape_contents(slide.shapes):
+            _record_content(sites, special_character, slide_index, content)
+    return sites
+
+
+def _record_content(sites: List[PlaceholderSite], special_character: str, slide_index: int,
+                    content: ShapeContent) -> None:
+    if content.kind == TEXT:
+        texts = [content.shape.text]
+        candidates = _find_candidates(texts, special_character)
+        if candidates:
+            sites.append(PlaceholderSite(TEXT, slide_index, content.path, _find_keys(texts, special_character),
+                                         candidates))
+    elif content.kind == TABLE:
+        cell_texts = [cell.text for cell in content.shape.table.iter_cells()]
+        sites.append(PlaceholderSite(TABLE, slide_index, content.path, _find_keys(cell_texts, special_character),
+                                     _find_candidates(cell_texts, special_character)))
+    elif content.kind == PICTURE:
+        alt_text = content.element.nvPicPr.cNvPr.get("descr")
+        keys = (alt_text,) if alt_text else ()
+        sites.append(PlaceholderSite(PICTURE, slide_index, content.path, keys, keys))
+
+
+def _find_keys(texts: Iterable[str], special_character: str) -> Tuple[str, ...]:
+    return tuple(dict.fromkeys(key for text in texts for key in iter_template_keys(text, special_character)))
+
+
+def _find_candidates(texts: Iterable[str], special_character: str) -> Tuple[str, ...]:
+    return tuple(dict.fromkeys(key for text in texts for key in iter_candidate_keys(text, special_character)))
+
+
+class CompiledTemplate:
+
+    """
+    Description: A template PowerPoint that has been parsed once. The location of every placeholder, table and
+    alt text picture is recorded so it can be rendered for many contexts without walking the whole deck again.
+
+    @input ppt: File path, bytes or file-like object of the template PowerPoint
+    @input special_character: Special character which is wrapped around key words
+    @input options: TemplatePptxOptions used for every render. Defaults to a new TemplatePptxOptions
+    """
+
+    def __init__(self, ppt: PptxSource, special_character: str = "$", options: TemplatePptxOptions = None):
+        self._template_blob = read_pptx_bytes(ppt)
+        self._special_character = special_character
+        self._options = options if options is not None else TemplatePptxOptions()
+        # The parsed template, copied for every render instead of being unzipped and parsed again
+        self._snapshot = PresentationSnapshot(self._template_blob)
+        template = self._snapshot.open()
+        self._slide_count = len(template.slides)
+        self._sites: List[PlaceholderSite] = find_sites(template, special_character)
+        # The context list every repeated slide is repeated for, by slide index
+        self._repeats: Dict[int, str] = self._find_repeats()
+        # Indexes of the slides every context key is used on
+        self._dependencies = self._find_dependencies(attrgetter("keys"))
+        # The same for every candidate key, so a changed key always renders the slides it could be used on
+        self._candidate_dependencies = self._find_dependencies(attrgetter("candidates"))
+
+    @property
+    def options(self) -> TemplatePptxOptions:
+        return self._options
+
+    @property
+    def sites(self) -> List[PlaceholderSite]:
+        return list(self._sites)
+
+    def _resolve(self, slide_shapes: List[Shape], path: Tuple[int, ...]) -> Shape:
+        shape = slide_shapes[path[0]]
+        for index in path[1:]:
+            shape = shape.shapes[index]
+        return shape
+
+    @property
+    def dependencies(self) -> Dict[str, Tuple[int, ...]]:
+        '''
+        Description: The slides every context key is used on, by key. Slide numbers start at 1. A relationship
+        is listed under its name as well as under each of its fields ex. (relationship_people.id)
+        '''
+        return {key: tuple(index + 1 for index in indexes) for key, indexes in self._dependencies.items()}
+
+    def _find_dependencies(self, site_keys: Callable[[PlaceholderSite], Tuple[str, ...]]) -> Dict[str, List[int]]:
+        dependencies: Dict[str, List[int]] = {}
+        for site in self._sites:
+            found = site_keys(site)
+            keys = list(found)
+            if site.kind == TABLE:
+                keys += [key.split(".")[0] for key in found if "relationship" in key and "." in key]
+            keys += [key.split(".")[0] for key in found if key.startswith(REPEAT_PREFIX) and "." in key]
+            for key in keys:
+                indexes = dependencies.setdefault(key, [])
+                if site.slide_index not in indexes:
+                    indexes.append(site.slide_index)
+        return dependencies
+
+    def _find_repeats(self) -> Dict[int, str]:
+        repeats = {}
+        for slide_index, slide_sites in groupby(self._sites, key=attrgetter("slide_index")):
+            name = find_repeat_name(key for site in slide_sites for key in site.candidates)
+            if name is not None:
+                repeats[slide_index] = name
+        return repeats
+
+    def _check_context(self, context: dict) -> None:
+        if not isinstance(context, dict):
+            raise ValueError(f"Your context is not a valid dictionary. Please check the context.")
+        if context == {}:
+            warnings.warn("Context file is empty")
+
+    def _render_slides(self, ppt: PowerPoint, context: dict, stats: Union[RenderStats, None],
+                       slide_indexes: List[int] = None) -> None:
+
+        """
+        Description: Fill in the recorded locations of the slides of a presentation
+
+        @input ppt: A fresh copy of the template
+        @input slide_indexes: The template slides the presentation holds, in order, when it only holds some of
+        them. None when it holds every slide
+        """
+        renderer = SlideRenderer(context, self._special_character, self._options, stats)
+        # Listed first as tables that continue on new slides and repeated slides add slides while rendering
+        slides = list(ppt.slides)
+        positions = {slide_index: position for position, slide_index in enumerate(slide_indexes)} \
+            if slide_indexes is not None else None
+        # Slides added before the current slide by repeated slides
+        added_slides = 0
+
+        for slide_index, slide_sites in groupby(self._sites, key=attrgetter("slide_index")):
+            if positions is not None and slide_index not in positions:
+                continue
+            slide = slides[positions[slide_index] if positions is not None else slide_index]
+            slide_sites = list(slide_sites)
+            name = self._repeats.get(slide_index)
+            # Every copy of a repeated slide is cloned from the template slide, so the locations are the same
+            copies = iter_repeated_slides(slide, name, renderer.engine, self._options) if name is not None \
+                else [(slide, None)]
+            copy_count = 0
+            for slide, engine in copies:
+                slide_number = slide_index + 1 + added_slides + copy_count
+                copy_count += 1
+                with time_slide(stats, slide_number), renderer.using_engine(engine):
+                    slide_shapes = list(slide.shapes)
+                    # Resolve every location of a slide before changing it, pictures are removed and re-added
+                    resolved = [(site.kind, self._resolve(slide_shapes, site.path)) for site in slide_sites]
+                    for kind, shape in resolved:
+                        renderer.process_site(kind, shape, slide, slide_number)
+                    renderer.finish_slide(slide, slide_number)
+            added_slides += copy_count - 1
+
+    def render(self, context: dict, output: PptxOutput = None) -> Union[str, os.PathLike, IO[bytes], bytes]:
+
+        """
+        Description: Render the template for a context. A fresh copy of the pristine template is filled in
+        at the recorded locations only.
+
+        @input context: A dictionary containing all of the data that is fed into the template
+        @input output: File path or file-like object the rendered PowerPoint is written to. When None the
+        rendered PowerPoint is returned as bytes
+
+        @output output: The output that was written to or the bytes of the rendered PowerPoint
+        """
+        self._check_context(context)
+        if self._options.slide_workers > 1 and self._options.max_table_rows is None and not self._repeats:
+            slide_indexes = sorted({site.slide_index for site in self._sites})
+            if len(slide_indexes) > 1:
+                try:
+                    return self._render_parallel(context, slide_indexes, output)
+                except FullRenderRequired as e:
+                    warnings.warn(f"The slides rendered by the workers cannot be put back together, the deck is "
+                                  f"rendered again in this process. {e}")
+        stats = RenderStats() if self._options.stats_callback is not None else None
+        with time_stage(stats, LOAD):
+            ppt: PowerPoint = self._snapshot.open()
+        self._render_slides(ppt, context, stats)
+
+        result = save_presentation_with_stats(ppt, output, stats)
+        if stats is not None:
+            self._options.stats_callback(stats)
+        return result
+
+    def _render_slide_parts(self, context: dict, slide_indexes: List[int],
+                            stats: Union[RenderStats, None], base_blob: bytes = None) -> SlideParts:
+
+        """
+        Description: Render some slides of the template from a copy trimmed to them and collect their parts
+
+        @input slide_indexes: Indexes of the slides to render, starting at 0, in ascending order
+        @input base_blob: The bytes of the PowerPoint the slides will be spliced into. Defaults to the template
+        """
+        if any(slide_index in self._repeats for slide_index in slide_indexes):
+            raise FullRenderRequired("Repeated slides change the slides of the deck.")
+        ppt = None
+        if slide_indexes:
+            with time_stage(stats, LOAD):
+                ppt: PowerPoint = open_presentation(trim_template(self._template_blob, slide_indexes))
+            self._render_slides(ppt, context, stats, slide_indexes)
+        base_blob = base_blob if base_blob is not None else self._template_blob
+        return collect_slides(base_blob, ppt, slide_indexes, self._slide_count)
+
+    def _render_parallel(self, context: dict, slide_indexes: List[int],
+                         output: PptxOutput) -> Union[str, os.PathLike, IO[bytes], bytes]:
+
+        """
+        Description: Render the slides holding placeholders over a pool of worker processes and splice them into
+        the template. Slides without placeholders are copied from the template as they are.
+        """
+        stats = RenderStats() if self._options.stats_callback is not None else None
+        # The stats callback stays in this process so it does not need to be picklable
+        worker_template = copy.copy(self)
+        worker_template._options = copy.copy(self._options)
+        worker_template._options.stats_callback = None
+        parts = render_slide_parts(worker_template, context, slide_indexes, self._options.slide_workers, stats)
+        if stats is None:
+            result = write_slides(self._template_blob, parts, output)
+        else:
+            result = write_with_stats(lambda: write_slides(self._template_blob, parts, output), output, stats)
+            self._options.stats_callback(stats)
+        return result
+
+    def render_incremental(self, previous: PptxSource, context: dict, changed_keys: Iterable,
+                           output: PptxOutput = None) -> Union[str, os.PathLike, IO[bytes], bytes]:
+
+        """
+        Description: Render the template again after some keys of the context changed. Only the slides using the
+        changed keys are rendered, and every other part of the previous render is copied to the output as it
+        is, so a refresh costs about as much as the slides that changed. The whole deck is rendered instead when
+        the slides cannot be swapped safely: when tables may continue on new slides, when the template repeats
+        slides, since the slides of the previous render then no longer line up with the slides of the template,
+        when a rendered slide links to another slide or when the previous render does not have the slides of the
+        template.
+
+        @input previous: File path, bytes or file-like object of the previous render of this template
+        @input context: The whole context, with the changed values
+        @input changed_keys: The keys of the context whose values changed since the previous render
+        @input output: File path or file-like object the rendered PowerPoint is written to. When None the
+        rendered PowerPoint is returned as bytes
+
+        @output output: The output that was written to or the bytes of the rendered PowerPoint
+        """
+        self._check_context(context)
+        if self._options.max_table_rows is not None or self._repeats:
+            return self.render(context, output)
+        slide_indexes = sorted({index for key in changed_keys for index in self._candidate_dependencies.get(str(key), ())})
+        previous_blob = read_pptx_bytes(previous)
+        stats = RenderStats() if self._options.stats_callback is not None else None
+        try:
+            slide_parts = self._render_slide_parts(context, slide_indexes, stats, previous_blob)
+            if stats is None:
+                result = write_slides(previous_blob, [slide_parts], output)
+            else:
+                result = write_with_stats(lambda: write_slides(previous_blob, [slide_parts], output), output, stats)
+        except FullRenderRequired:
+            return self.render(context, output)
+        if stats is not None:
+            self._options.stats_callback(stats)
+        return result
@@ -0,0 +1,91 @@
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Union
+
+from lxml import etree
+from pptx import Presentation
+
+
+class PictureRecord(NamedTuple):
+    """A picture of a source slide, read so it can be added to another presentation."""
+    blob: bytes     # Bytes of the image
+    left: int       # Position and size of the picture in EMU
+    top: int
+    width: int
+    height: int
+
+
+# A shape of a source slide is either the xml of the shape, the element of the shape or a picture
+ShapeRecord = Union[bytes, etree._Element, PictureRecord]
+
+
+def read_deck(pptx_path: str) -> List[List[ShapeRecord]]:
+
+    """
+    Description: Read the shapes of every slide of a PowerPoint. Shapes are returned as their xml and pictures
+    as their image bytes and position, so they can be sent between processes and added to another presentation.
+
+    @input pptx_path: File path to the PowerPoint
+
+    @output slides: The shapes of every slide of the PowerPoint in order
+    """
+    return _read_shapes(pptx_path, etree.tostring)
+
+
+def read_deck_elements(pptx_path: str) -> List[List[ShapeRecord]]:
+
+    """
+    Description: Same as read_deck but shapes are returned as their elements, ready to be added to another
+    presentation without serializing and parsing them again. Only for reading in the current process.
+    """
+    return _read_shapes(pptx_path, lambda element: element)
+
+
+def _read_shapes(pptx_path: str, record: Callable[[etree._Element], ShapeRecord]) -> List[List[ShapeRecord]]:
+    slides = []
+    for slide in Presentation(pptx_path).slides:
+        shapes = []
+        for shape in slide.shapes:
+            if shape.shape_type == 13: # Image
+                shapes.append(PictureRecord(shape.image.blob, shape.left, shape.top, shape.width, shape.height))
+            else:
+                shapes.append(record(shape.element))
+        slides.append(shapes)
+    return slides
+
+
+def read_bytes(path: str) -> bytes:
+    with open(path, "rb") as pptx_file:
+        return pptx_file.read()
+
+
+def iter_read_decks(paths: Iterable[str], read: Callable = read_deck, workers: int = 1,
+                    use_threads: bool = False, max_in_flight: int = None) -> Iterator:
+
+    """
+    Description: Read many PowerPoints over a pool of workers and yield what was read in the order of the paths.
+    Only a bounded number of PowerPoints are read ahead of the one being yielded, so memory stays bounded
+    however many PowerPoints there are.
+
+    @input paths: File paths of the PowerPoints
+    @input read: Function run on every path. It must be defined at module level when processes are used
+    @input workers: Number of workers. 1 reads every PowerPoint in the current thread
+    @input use_threads: Read on a pool of threads instead of processes
+    @input max_in_flight: Maximum number of PowerPoints read ahead. Defaults to twice the workers
+
+    @output decks: What read returned for every path, in the order of the paths
+    """
+    if workers <= 1:
+        for path in paths:
+            yield read(path)
+        return
+    max_in_flight = max_in_flight if max_in_flight is not None else workers * 2
+    pool: Executor = ThreadPoolExecutor(workers) if use_threads else ProcessPoolExecutor(workers)
+    with pool:
+        in_flight = deque()
+        for path in paths:
+            in_flight.append(pool.submit(read, path))
+            if len(in_flight) >= max_in_flight:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
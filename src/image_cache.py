@@ -0,0 +1,179 @@
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from typing import Callable, Dict, Tuple, Union
+
+from PIL import Image as PIL_Image
+
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.package import OpcPackage
+from pptx.parts.image import Image, ImagePart
+from pptx.shapes.picture import Picture
+from pptx.shapes.shapetree import _BaseGroupShapes
+from pptx.util import Length
+
+# Default size of the process-wide image cache, 128 MB of image bytes
+DEFAULT_MAX_BYTES = 128 * 1024 * 1024
+
+
+class ImageCache:
+
+    """
+    Description: A process-wide cache of the images read from disk. Images are keyed by their path, modification
+    time and size so an image that changes on disk is read again. The bytes and metadata of an image, like its
+    SHA1 hash, format and pixel size, are kept with it so they are only worked out once. The least recently used
+    images are evicted once the cached bytes go over max_bytes. Safe to share between threads.
+
+    @input max_bytes: Maximum number of image bytes held by the cache
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self._max_bytes = max_bytes
+        self._images: "OrderedDict[tuple, Image]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, max_bytes: int) -> None:
+        with self._lock:
+            self._max_bytes = max_bytes
+            self._evict()
+
+    @property
+    def size(self) -> int:
+        '''
+        Description: Number of image bytes currently held by the cache
+        '''
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._images.clear()
+            self._size = 0
+
+    def get(self, path: Union[str, os.PathLike]) -> Image:
+
+        """
+        Description: Return the image found at a path, reading it from disk only when it is not cached
+
+        @input path: File path to an image
+
+        @output image: A python-pptx Image holding the bytes and metadata of the image
+        """
+        path, key = self._key(path)
+        return self._get_or_load(key, lambda: Image.from_file(path))
+
+    def get_resized(self, path: Union[str, os.PathLike], max_size: Tuple[int, int], quality: int) -> Image:
+
+        """
+        Description: Return the image found at a path downscaled to fit within a pixel size. JPEG images are
+        encoded again at the given quality and other images are saved as PNG. Images already within the size
+        are returned untouched. The result is cached so the same image at the same size is only converted once.
+
+        @input path: File path to an image
+        @input max_size: The largest width and height in pixels the image is kept at
+        @input quality: JPEG quality from 1 to 95
+
+        @output image: A python-pptx Image holding the bytes and metadata of the downscaled image
+        """
+        path, key = self._key(path)
+        source = self._get_or_load(key, lambda: Image.from_file(path))
+        width, height = source.size
+        target = (max(1, min(width, max_size[0])), max(1, min(height, max_size[1])))
+        if target == (width, height):
+            return source
+        return self._get_or_load(key + (target, quality), lambda: _downscale(source, target, quality))
+
+    def _key(self, path: Union[str, os.PathLike]) -> Tuple[str, tuple]:
+        path = os.path.abspath(os.fspath(path))
+        stat = os.stat(path)
+        return path, (path, stat.st_mtime_ns, stat.st_size)
+
+    def _get_or_load(self, key: tuple, load: Callable[[], Image]) -> Image:
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                return image
+
+        image = load()
+        with self._lock:
+            if key not in self._images and len(image.blob) <= self._max_bytes:
+                self._images[key] = image
+                self._size += len(image.blob)
+                self._evict()
+        return image
+
+    def _evict(self) -> None:
+        while self._size > self._max_bytes and self._images:
+            _, image = self._images.popitem(last=False)
+            self._size -= len(image.blob)
+
+
+def _downscale(image: Image, size: Tuple[int, int], quality: int) -> Image:
+    with PIL_Image.open(BytesIO(image.blob)) as source:
+        source_format = source.format
+        resized = source.resize(size, PIL_Image.LANCZOS)
+    stream = BytesIO()
+    if source_format == "JPEG":
+        if resized.mode not in ("RGB", "L", "CMYK"):
+            resized = resized.convert("RGB")
+        resized.save(stream, format="JPEG", quality=quality, optimize=True)
+    else:
+        resized.save(stream, format="PNG", optimize=True)
+    return Image.from_blob(stream.getvalue(), image.filename)
+
+
+default_image_cache = ImageCache()
+
+
+class ImagePartRegistry:
+
+    """
+    Description: Keeps the image parts of one presentation by the SHA1 hash of their bytes, so an image used
+    many times in a deck is stored once and every picture showing it points at the same image part.
+
+    @input package: The package of the presentation the pictures are added to
+    """
+
+    def __init__(self, package: OpcPackage):
+        self._package = package
+        self._image_parts: Union[Dict[str, ImagePart], None] = None
+
+    def get_or_add_image_part(self, image: Image) -> ImagePart:
+        if self._image_parts is None:
+            # Image parts already in the presentation, like the ones of the template pictures
+            self._image_parts = {part.sha1: part for part in self._package.iter_parts()
+                                 if isinstance(part, ImagePart)}
+        image_part = self._image_parts.get(image.sha1)
+        if image_part is None:
+            image_part = ImagePart.new(self._package, image)
+            self._image_parts[image.sha1] = image_part
+        return image_part
+
+    def add_picture(self, shapes: _BaseGroupShapes, image: Image, left: Length, top: Length,
+                    width: Length = None, height: Length = None) -> Picture:
+
+        """
+        Description: Add a picture of an image to a shape collection, reusing the image part when the presentation
+        already holds the same image
+
+        @input shapes: The shapes of a slide or group shape the picture is added to
+        @input image: The image to show
+        @input left, top, width, height: Position and size of the picture
+
+        @output picture: The new picture shape
+        """
+        image_part = self.get_or_add_image_part(image)
+        rId = shapes.part.relate_to(image_part, RT.IMAGE)
+        pic = shapes._add_pic_from_image_part(image_part, rId, left, top, width, height)
+        shapes._recalculate_extents()
+        return shapes._shape_factory(pic)
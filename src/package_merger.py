@@ -0,0 +1,401 @@
+import hashlib
+import os
+import posixpath
+import re
+import shutil
+import zipfile
+from io import BytesIO
+from typing import Dict, IO, List, Set, Tuple, Union
+
+from lxml import etree
+from pptx import Presentation
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.util import Inches
+
+from pptx_io import PptxSource, PptxOutput, is_path
+
+_CT_NAMESPACE = "http://schemas.openxmlformats.org/package/2006/content-types"
+_RELS_NAMESPACE = "http://schemas.openxmlformats.org/package/2006/relationships"
+_P_NAMESPACE = "http://schemas.openxmlformats.org/presentationml/2006/main"
+_R_NAMESPACE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_MEDIA_DIRECTORY = "/ppt/media/"
+_CHUNK_SIZE = 1024 * 1024
+_SLIDE_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.presentationml.slide+xml"
+
+# Relationships of a source slide which are not carried over. The slide is related to the layout chosen from the
+# master deck instead, and notes and comments depend on parts of the source presentation.
+_DROPPED_RELATIONSHIPS = (RT.NOTES_SLIDE, RT.COMMENTS)
+
+
+class SlideMasterIndexError(Exception):
+    """A valid slide master does not seem to exist"""
+    pass
+
+
+def _rels_name(partname: str) -> str:
+    directory, name = posixpath.split(partname)
+    return posixpath.join(directory, "_rels", name + ".rels")
+
+
+def _zip_name(partname: str) -> str:
+    return partname.lstrip("/")
+
+
+def _resolve_target(source_partname: str, target: str) -> str:
+    if target.startswith("/"):
+        return posixpath.normpath(target)
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source_partname), target))
+
+
+def _relative_target(source_partname: str, target_partname: str) -> str:
+    return posixpath.relpath(target_partname, posixpath.dirname(source_partname))
+
+
+class _SourcePackage:
+
+    """
+    Description: Read access to the parts of a PowerPoint zip file without loading the package.
+
+    @input source: File path, bytes or file-like object of the PowerPoint
+    """
+
+    def __init__(self, source: PptxSource):
+        self._zip = zipfile.ZipFile(BytesIO(source) if isinstance(source, (bytes, bytearray)) else source)
+        self._names = set(self._zip.namelist())
+        types = etree.fromstring(self._zip.read("[Content_Types].xml"))
+        self._defaults = {element.get("Extension").lower(): element.get("ContentType")
+                          for element in types.iter(f"{{{_CT_NAMESPACE}}}Default")}
+        self._overrides = {element.get("PartName"): element.get("ContentType")
+                           for element in types.iter(f"{{{_CT_NAMESPACE}}}Override")}
+        self.presentation_partname = self._main_partname()
+
+    def close(self) -> None:
+        self._zip.close()
+
+    def has_part(self, partname: str) -> bool:
+        return _zip_name(partname) in self._names
+
+    def read(self, partname: str) -> bytes:
+        return self._zip.read(_zip_name(partname))
+
+    def open(self, partname: str) -> IO[bytes]:
+        return self._zip.open(_zip_name(partname))
+
+    def info(self, partname: str) -> zipfile.ZipInfo:
+        return self._zip.getinfo(_zip_name(partname))
+
+    def content_type(self, partname: str) -> str:
+        if partname in self._overrides:
+            return self._overrides[partname]
+        return self._defaults.get(posixpath.splitext(partname)[1][1:].lower(), "application/octet-stream")
+
+    def rels(self, partname: str) -> List[etree._Element]:
+        rels_name = _rels_name(partname)
+        if not self.has_part(rels_name):
+            return []
+        return list(etree.fromstring(self.read(rels_name)))
+
+    def _main_partname(self) -> str:
+        for rel in self.rels("/"):
+            if rel.get("Type") == RT.OFFICE_DOCUMENT:
+                return _resolve_target("/", rel.get("Target"))
+        raise ValueError("The file is not a PowerPoint package, it has no main document.")
+
+    def slide_partnames(self) -> List[str]:
+
+        """
+        Description: The part names of the slides of the presentation in the order they are shown
+        """
+        presentation = etree.fromstring(self.read(self.presentation_partname))
+        targets = {rel.get("Id"): _resolve_target(self.presentation_partname, rel.get("Target"))
+                   for rel in self.rels(self.presentation_partname)}
+        return [targets[sldId.get(f"{{{_R_NAMESPACE}}}id")]
+                for sldId in presentation.iter(f"{{{_P_NAMESPACE}}}sldId")]
+
+    def layout_partnames(self) -> List[str]:
+
+        """
+        Description: The part names of the slide layouts of the first slide master, in the order python-pptx
+        lists them in Presentation.slide_layouts
+        """
+        presentation = etree.fromstring(self.read(self.presentation_partname))
+        targets = {rel.get("Id"): _resolve_target(self.presentation_partname, rel.get("Target"))
+                   for rel in self.rels(self.presentation_partname)}
+        master_id = next(presentation.iter(f"{{{_P_NAMESPACE}}}sldMasterId"), None)
+        if master_id is None:
+            return []
+        master_partname = targets[master_id.get(f"{{{_R_NAMESPACE}}}id")]
+        master = etree.fromstring(self.read(master_partname))
+        layout_targets = {rel.get("Id"): _resolve_target(master_partname, rel.get("Target"))
+                          for rel in self.rels(master_partname)}
+        return [layout_targets[layout_id.get(f"{{{_R_NAMESPACE}}}id")]
+                for layout_id in master.iter(f"{{{_P_NAMESPACE}}}sldLayoutId")]
+
+
+class PackageMerger:
+
+    """
+    Description: Combines the slides of many PowerPoint files into one by copying parts straight from zip file to
+    zip file. Slide xml, the relationships of the slides and the parts they use, like media and charts, are
+    copied from each source as it is added and written to the output right away. Media with the same bytes
+    is stored once. Only the names of the parts written so far are kept, so memory stays about the same however
+    many decks are combined. Every slide is related to one slide layout of the master deck, like
+    BatchTool.combine_slides does.
+
+    @input output: File path or file-like object the combined PowerPoint is written to
+    @input master: File path, bytes or file-like object of a PowerPoint holding the slide master to use.
+    Defaults to a blank 16:9 presentation
+    @input master_slide_index: Index of the slide layout of the master that the slides use. -1 uses the
+    layout 6 and falls back to layout 0 when the master does not have 7 layouts
+    """
+
+    def __init__(self, output: PptxOutput, master: PptxSource = None, master_slide_index: int = -1):
+        if master is None:
+            master = self._blank_master()
+        self._base = _SourcePackage(master)
+        self._layout_partname = self._choose_layout(master_slide_index)
+        self._output = zipfile.ZipFile(os.fspath(output) if is_path(output) else output, "w", zipfile.ZIP_DEFLATED)
+        self._names: Set[str] = set()
+        self._content_types: Dict[str, str] = {}
+        self._presentation_rels: List[Tuple[str, str, str]] = []
+        self._slide_ids: List[Tuple[int, str]] = []
+        self._slide_count = 0
+        self._closed = False
+        # Media parts written to the output by the CRC and size of their bytes, with their SHA1 hash
+        self._media: Dict[Tuple[int, int], List[Tuple[str, str]]] = {}
+
+        presentation_rels_name = _rels_name(self._base.presentation_partname)
+        skipped = {"[Content_Types].xml", _zip_name(self._base.presentation_partname), _zip_name(presentation_rels_name)}
+        for info in self._base._zip.infolist():
+            self._names.add("/" + info.filename)
+            if info.filename not in skipped:
+                with self._base._zip.open(info) as source, self._output.open(info.filename, "w") as target:
+                    shutil.copyfileobj(source, target)
+
+        self._rIds = {rel.get("Id") for rel in self._base.rels(self._base.presentation_partname)}
+        presentation = etree.fromstring(self._base.read(self._base.presentation_partname))
+        slide_ids = [int(sldId.get("id")) for sldId in presentation.iter(f"{{{_P_NAMESPACE}}}sldId")]
+        self._next_slide_id = max(slide_ids + [255]) + 1
+
+    def __enter__(self) -> "PackageMerger":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    @property
+    def slide_count(self) -> int:
+        '''
+        Description: Number of slides added to the combined PowerPoint so far
+        '''
+        return self._slide_count
+
+    def _blank_master(self) -> bytes:
+        presentation = Presentation()
+        presentation.slide_width = Inches(13.333)
+        presentation.slide_height = Inches(7.5)
+        stream = BytesIO()
+        presentation.save(stream)
+        return stream.getvalue()
+
+    def _choose_layout(self, master_slide_index: int) -> str:
+        layouts = self._base.layout_partnames()
+        if master_slide_index == -1:
+            if len(layouts) > 6:
+                return layouts[6]
+            if layouts:
+                return layouts[0]
+            raise SlideMasterIndexError("A valid master slide does not exist for 1 or 6 which are defaults")
+        try:
+            return layouts[master_slide_index]
+        except IndexError as e:
+            raise SlideMasterIndexError(f"The custom slide index chosen from the slide master is not valid. "
+                                         f"The index chosen was: {master_slide_index}") from e
+
+    def _unique_partname(self, partname: str) -> str:
+        if partname not in self._names:
+            self._names.add(partname)
+            return partname
+        directory, name = posixpath.split(partname)
+        stem, extension = posixpath.splitext(name)
+        stem = re.sub(r"\d+$", "", stem)
+        number = 1
+        while True:
+            candidate = posixpath.join(directory, f"{stem}{number}{extension}")
+            if candidate not in self._names:
+                self._names.add(candidate)
+                return candidate
+            number += 1
+
+    def add_deck(self, source: PptxSource) -> int:
+
+        """
+        Description: Append every slide of a PowerPoint to the combined PowerPoint
+
+        @input source: File path, bytes or file-like object of the PowerPoint to add
+
+        @output slide_count: The number of slides added
+        """
+        if self._closed:
+            raise ValueError("The PackageMerger is closed.")
+        package = _SourcePackage(source)
+        try:
+            slide_partnames = package.slide_partnames()
+            # Parts of this source already copied, by source part name. Slides are named up front so links
+            # between the slides of the deck can be kept.
+            copied: Dict[str, str] = {}
+            for slide_partname in slide_partnames:
+                self._slide_count += 1
+                copied[slide_partname] = self._unique_partname(f"/ppt/slides/slide{self._slide_count}.xml")
+            for slide_partname in slide_partnames:
+                self._copy_slide(package, slide_partname, copied)
+        finally:
+            package.close()
+        return len(slide_partnames)
+
+    def _copy_slide(self, package: _SourcePackage, slide_partname: str, copied: Dict[str, str]) -> None:
+        new_partname = copied[slide_partname]
+        self._output.writestr(_zip_name(new_partname), package.read(slide_partname))
+        self._write_rels(package, slide_partname, new_partname, copied, is_slide=True)
+        self._content_types[new_partname] = _SLIDE_CONTENT_TYPE
+
+        rId = self._next_rId()
+        self._presentation_rels.append((rId, RT.SLIDE, _relative_target(self._base.presentation_partname, new_partname)))
+        self._slide_ids.append((self._next_slide_id, rId))
+        self._next_slide_id += 1
+
+    def _copy_part(self, package: _SourcePackage, partname: str, copied: Dict[str, str]) -> str:
+
+        """
+        Description: Copy a part, and the parts it is related to, from a source package to the output
+
+        @output partname: The name of the part in the output
+        """
+        if partname in copied:
+            return copied[partname]
+        is_media = partname.startswith(_MEDIA_DIRECTORY)
+        if is_media:
+            duplicate = self._find_media(package, partname)
+            if duplicate is not None:
+                copied[partname] = duplicate
+                return duplicate
+        new_partname = self._unique_partname(partname)
+        copied[partname] = new_partname
+        sha1 = hashlib.sha1()
+        with package.open(partname) as source, self._output.open(_zip_name(new_partname), "w") as target:
+            for chunk in iter(lambda: source.read(_CHUNK_SIZE), b""):
+                sha1.update(chunk)
+                target.write(chunk)
+        if is_media:
+            info = package.info(partname)
+            self._media.setdefault((info.CRC, info.file_size), []).append((sha1.hexdigest(), new_partname))
+        self._content_types[new_partname] = package.content_type(partname)
+        self._write_rels(package, partname, new_partname, copied)
+        return new_partname
+
+    def _find_media(self, package: _SourcePackage, partname: str) -> Union[str, None]:
+
+        """
+        Description: Find a media part already written to the output with the same bytes as a part of a source
+        package. The CRC and size kept in the zip directory rule out most parts before any bytes are hashed.
+
+        @output partname: The name of the media part in the output or None when it is not there yet
+        """
+        info = package.info(partname)
+        candidates = self._media.get((info.CRC, info.file_size))
+        if not candidates:
+            return None
+        sha1 = hashlib.sha1()
+        with package.open(partname) as source:
+            for chunk in iter(lambda: source.read(_CHUNK_SIZE), b""):
+                sha1.update(chunk)
+        digest = sha1.hexdigest()
+        return next((candidate for candidate_sha1, candidate in candidates if candidate_sha1 == digest), None)
+
+    def _write_rels(self, package: _SourcePackage, partname: str, new_partname: str, copied: Dict[str, str],
+                    is_slide: bool = False) -> None:
+        rels = package.rels(partname)
+        if not rels and not is_slide:
+            return
+        relationships = etree.Element(f"{{{_RELS_NAMESPACE}}}Relationships", nsmap={None: _RELS_NAMESPACE})
+        for rel in rels:
+            reltype = rel.get("Type")
+            if rel.get("TargetMode") == "External":
+                relationships.append(rel)
+                continue
+            if is_slide and reltype == RT.SLIDE_LAYOUT:
+                target_partname = self._layout_partname
+            elif is_slide and reltype in _DROPPED_RELATIONSHIPS:
+                continue
+            else:
+                source_target = _resolve_target(partname, rel.get("Target"))
+                if reltype == RT.SLIDE and source_target not in copied:
+                    continue
+                if source_target not in copied and not package.has_part(source_target):
+                    continue
+                target_partname = self._copy_part(package, source_target, copied)
+            rel.set("Target", _relative_target(new_partname, target_partname))
+            relationships.append(rel)
+        self._output.writestr(_zip_name(_rels_name(new_partname)),
+                              etree.tostring(relationships, xml_declaration=True, encoding="UTF-8", standalone=True))
+
+    def _next_rId(self) -> str:
+        number = len(self._rIds) + 1
+        while f"rId{number}" in self._rIds:
+            number += 1
+        rId = f"rId{number}"
+        self._rIds.add(rId)
+        return rId
+
+    def close(self) -> None:
+
+        """
+        Description: Write the presentation part, its relationships and the content types, then close the output
+        """
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._write_presentation()
+            self._write_presentation_rels()
+            self._write_content_types()
+        finally:
+            self._output.close()
+            self._base.close()
+
+    def _write_presentation(self) -> None:
+        presentation = etree.fromstring(self._base.read(self._base.presentation_partname))
+        sldIdLst = presentation.find(f"{{{_P_NAMESPACE}}}sldIdLst")
+        if sldIdLst is None:
+            sldIdLst = etree.Element(f"{{{_P_NAMESPACE}}}sldIdLst")
+            # The slide list follows the master lists and comes before everything else
+            predecessors = [child for child in presentation if etree.QName(child).localname in
+                            ("sldMasterIdLst", "notesMasterIdLst", "handoutMasterIdLst")]
+            if predecessors:
+                predecessors[-1].addnext(sldIdLst)
+            else:
+                presentation.insert(0, sldIdLst)
+        for slide_id, rId in self._slide_ids:
+            sldId = etree.SubElement(sldIdLst, f"{{{_P_NAMESPACE}}}sldId")
+            sldId.set("id", str(slide_id))
+            sldId.set(f"{{{_R_NAMESPACE}}}id", rId)
+        self._output.writestr(_zip_name(self._base.presentation_partname),
+                              etree.tostring(presentation, xml_declaration=True, encoding="UTF-8", standalone=True))
+
+    def _write_presentation_rels(self) -> None:
+        rels_name = _rels_name(self._base.presentation_partname)
+        relationships = etree.fromstring(self._base.read(rels_name))
+        for rId, reltype, target in self._presentation_rels:
+            etree.SubElement(relationships, f"{{{_RELS_NAMESPACE}}}Relationship", Id=rId, Type=reltype, Target=target)
+        self._output.writestr(_zip_name(rels_name),
+                              etree.tostring(relationships, xml_declaration=True, encoding="UTF-8", standalone=True))
+
+    def _write_content_types(self) -> None:
+        types = etree.fromstring(self._base.read("[Content_Types].xml"))
+        for partname, content_type in self._content_types.items():
+            extension = posixpath.splitext(partname)[1][1:].lower()
+            if self._base._defaults.get(extension) == content_type:
+                continue
+            etree.SubElement(types, f"{{{_CT_NAMESPACE}}}Override", PartName=partname, ContentType=content_type)
+        self._output.writestr("[Content_Types].xml",
+                              etree.tostring(types, xml_declaration=True, encoding="UTF-8", standalone=True))
@@ -1,13 +1,16 @@
 from pptx.shapes.autoshape import Shape
+from placeholder_engine import PlaceholderEngine
 
 class ParentProcessor():
     
-    def __init__(self, shape: Shape, context: dict, slide_number: int, special_character: str):
+    def __init__(self, shape: Shape, context: dict, slide_number: int, special_character: str,
+                 engine: PlaceholderEngine = None):
         
         self._shape = shape
         self._context = context
         self._slide_number = slide_number
         self._special_character = special_character
+        self._engine = engine
 
     @property
     def context(self) -> dict:
@@ -15,4 +18,14 @@ class ParentProcessor():
 
     @context.setter
     def context(self, context) -> None:
-        self._context = context
\ No newline at end of file
+        self._context = context
+        self._engine = None
+
+    @property
+    def engine(self) -> PlaceholderEngine:
+        """
+        Description: The engine used to find and replace magic words. Built from the context when one was not given.
+        """
+        if self._engine is None:
+            self._engine = PlaceholderEngine(self._context, self._special_character)
+        return self._engine
\ No newline at end of file
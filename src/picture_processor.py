@@ -3,8 +3,14 @@ from copy import deepcopy
 import warnings
 from  pptx.shapes.autoshape import Shape
 from pptx.slide import Slide
-from typing import Union
+from typing import Dict, IO, Iterable, List, Union
+from pptx.oxml.ns import qn
+import os
+from pptx.parts.image import Image
+from pptx.util import Emu
+from image_cache import ImageCache, ImagePartRegistry, default_image_cache
 from template_pptx_options import TemplatePptxOptions
+from placeholder_engine import PlaceholderEngine
 
 class PictureFailedToBeReplaced(Exception):
     """Raised when a picture fails to be replaced due to an issue"""
@@ -16,11 +22,54 @@ class AltTextForImageNotFound(Exception):
     """Raised when alt text not dound."""
     pass
 
+class PictureIndex:
+
+    """
+    Description: The pictures of a slide grouped by their alt text. Built once per slide so the picture pass
+    can go straight to the pictures whose alt text is a key of the context.
+
+    @input pictures: The picture shapes of the slide
+    """
+
+    def __init__(self, pictures: Iterable[Shape] = ()):
+        self._pictures: Dict[Union[str, None], List[Shape]] = {}
+        for picture in pictures:
+            self.add(picture)
+
+    @staticmethod
+    def alt_text_of(picture: Shape) -> Union[str, None]:
+        nvPicPr = picture.element.find(qn("p:nvPicPr"))
+        cNvPr = nvPicPr.find(qn("p:cNvPr")) if nvPicPr is not None else None
+        return cNvPr.get("descr") if cNvPr is not None else None
+
+    def add(self, picture: Shape) -> None:
+        self._pictures.setdefault(self.alt_text_of(picture), []).append(picture)
+
+    def __len__(self) -> int:
+        return sum(len(pictures) for pictures in self._pictures.values())
+
+    def matching(self, context: dict) -> List[Shape]:
+        """
+        Description: The pictures whose alt text is a key of the context
+        """
+        return [picture for alt_text, pictures in self._pictures.items() if alt_text in context for picture in pictures]
+
+    def unmatched(self, context: dict) -> List[Shape]:
+        """
+        Description: The pictures without alt text or whose alt text is not a key of the context
+        """
+        return [picture for alt_text, pictures in self._pictures.items() if alt_text not in context for picture in pictures]
+
+
 class PictureProcessor(ParentProcessor):
 
-    def __init__(self, shape: Shape, context: dict, slide_number: int, slide: Slide, special_character: str="$"):
-        super().__init__(shape, context, slide_number, special_character)
+    def __init__(self, shape: Shape, context: dict, slide_number: int, slide: Slide, special_character: str="$",
+                 image_cache: ImageCache = None, image_parts: ImagePartRegistry = None,
+                 engine: PlaceholderEngine = None):
+        super().__init__(shape, context, slide_number, special_character, engine)
         self._slide = slide
+        self._image_cache = image_cache if image_cache is not None else default_image_cache
+        self._image_parts = image_parts if image_parts is not None else ImagePartRegistry(slide.part.package)
 
     
     def replace_picture(self, options: TemplatePptxOptions) -> Union[str, None]:
@@ -42,13 +91,17 @@ class PictureProcessor(ParentProcessor):
             alt_text = self._get_alt_text()
 
             # Find matching picture if it exists
-            alt_text_string = self._context.get(alt_text) # Outputs None if not valid
+            alt_text_string = self.engine.get(alt_text) if alt_text is not None else None # Outputs None if not valid
             
             # If found, remove the template picture and then add the new picture
             if alt_text_string != None:
+                image = self._load_image(alt_text_string, options)
                 sp = self._shape._element # Get xml element
+                # Drop the template image from the slide unless another picture still shows it
+                self._drop_image_relationship(getattr(sp, "blip_rId", None))
                 sp.getparent().remove(sp) # Remove xml element
-                self._slide.shapes.add_picture(image_file=alt_text_string, left=img_left, top=img_top, width=img_width, height=img_height)                    
+                # Added to the shapes holding the template picture, a group shape keeps positions relative to itself
+                self._image_parts.add_picture(self._shape._parent, image, img_left, img_top, img_width, img_height)
                 return alt_text_string
             else:
                 if options.strict_mode:
@@ -64,6 +117,38 @@ class PictureProcessor(ParentProcessor):
 
 
 
+    def _drop_image_relationship(self, rId: Union[str, None]) -> None:
+
+        """
+        Description: Drop the relationship of the slide to the template image unless another element of the
+        slide still uses it. python-pptx Part.drop_rel only counts r:id attributes and not the r:embed of pictures.
+
+        @input rId: The relationship id of the image shown by the template picture
+        """
+        if rId is None:
+            return
+        references = [value for value in self._slide._element.xpath(".//@r:embed | .//@r:link | .//@r:id") if value == rId]
+        if len(references) < 2:
+            self._slide.part.rels.pop(rId)
+
+    def _load_image(self, image_file: Union[str, os.PathLike, IO[bytes]], options: TemplatePptxOptions) -> Image:
+
+        """
+        Description: Load the image of a context value. Images from file paths come from the image cache so
+        an image used many times is only read and hashed once. When the options set an image dpi, the image is
+        downscaled to the size of the template picture at that resolution.
+
+        @input image_file: A file path to an image or a file-like object containing an image
+        @input options: The options of the render
+        """
+        if not isinstance(image_file, (str, os.PathLike)):
+            return Image.from_file(image_file)
+        if options.image_dpi is None:
+            return self._image_cache.get(image_file)
+        max_size = (int(round(Emu(self._shape.width).inches * options.image_dpi)),
+                    int(round(Emu(self._shape.height).inches * options.image_dpi)))
+        return self._image_cache.get_resized(image_file, max_size, options.image_quality)
+
     def _get_alt_text(self) -> Union[str, None]:
 
         """
@@ -76,7 +161,8 @@ class PictureProcessor(ParentProcessor):
         """
         alt_text = None
         try:
-            alt_text = self._shape.element.xpath("//p:pic/p:nvPicPr/p:cNvPr")[0].attrib["descr"]
+            # Relative to this picture, an absolute path would search the whole slide and find the first picture
+            alt_text = self._shape.element.xpath("./p:nvPicPr/p:cNvPr")[0].attrib["descr"]
         except Exception as e:
             warnings.warn(f"Error reading the alt text of picture on slide {self._slide_number}. Error: {e}")
         if alt_text == "" or alt_text == " " or alt_text == None:
@@ -0,0 +1,221 @@
+from collections import ChainMap
+from typing import Iterator, List, Mapping, Tuple
+
+from render_stats import RenderStats
+
+
+def iter_candidate_keys(text: str, special_character: str) -> Iterator[str]:
+
+    """
+    Description: Yield the text between every two neighbouring special characters, which is every key a magic
+    word of the text could have. The candidates overlap, since a special character that closes a candidate can
+    open the next one, so a literal special character like in US$ 5 does not hide the magic word after it.
+
+    @input text: The text to scan
+    @input special_character: Special character which is wrapped around key words
+
+    @output keys: Every candidate key in the order of the text ex. (" 5 for ", "name" for "US$ 5 for $name$")
+    """
+    width = len(special_character)
+    start = text.find(special_character)
+    while start != -1:
+        end = text.find(special_character, start + width)
+        if end == -1:
+            return
+        if end > start + width:
+            yield text[start + width:end]
+        start = end
+
+
+def iter_template_keys(text: str, special_character: str) -> Iterator[str]:
+
+    """
+    Description: Yield the key of every magic word of a template text without a context. The text is scanned
+    the way PlaceholderEngine scans it, with a candidate that starts or ends with whitespace taken as literal
+    text in place of a missing key, so the scan tries again from its closing special character.
+
+    @input text: The text to scan
+    @input special_character: Special character which is wrapped around key words
+
+    @output keys: The key of every magic word in the order of the text ex. ("name" for "US$ 5 for $name$")
+    """
+    width = len(special_character)
+    start = text.find(special_character)
+    while start != -1:
+        end = text.find(special_character, start + width)
+        if end == -1:
+            return
+        key = text[start + width:end]
+        if key and key == key.strip():
+            yield key
+            start = text.find(special_character, end + width)
+        else:
+            start = end
+
+
+class PlaceholderEngine:
+
+    """
+    Description: Finds magic words like $key$ in text with a single scan and looks them up in the context.
+    The cost of a scan grows with the length of the text and not with the number of keys in the context.
+
+    @input context: A dictionary containing all of the data that is fed into the template. It contains the data
+    and the magic keywords.
+    @input special_character: A character that is wrapped around the keys in the template
+    @input stats: RenderStats counting the runs scanned and magic words replaced. None counts nothing
+    """
+
+    def __init__(self, context: dict, special_character: str, stats: RenderStats = None):
+        if not special_character:
+            raise ValueError("The special character cannot be empty.")
+        self._context = context
+        self._special_character = special_character
+        self._width = len(special_character)
+        # Magic words are matched on the string of the key. The first key wins when two keys have the same string.
+        self._keys = {}
+        for key in context:
+            self._keys.setdefault(str(key), key)
+        # Values resolved so far and their strings, lazy values are called once
+        self._values = {}
+        self._text_values = {}
+        self._stats = stats
+
+    @property
+    def context(self) -> dict:
+        return self._context
+
+    @property
+    def special_character(self) -> str:
+        return self._special_character
+
+    @property
+    def stats(self) -> RenderStats:
+        return self._stats
+
+    def scoped(self, values: Mapping) -> "PlaceholderEngine":
+
+        """
+        Description: An engine for the context with some values added on top of it, like the fields of a record.
+        The values take the place of context keys with the same string. Values of the context resolved by either
+        engine are shared, so lazy values are still called once per render.
+
+        @input values: A mapping of the keys and values added to the context
+        """
+        return _ScopedPlaceholderEngine(self, values)
+
+    def _iter_matches(self, text: str) -> Iterator[Tuple[int, int, str]]:
+
+        """
+        Description: Yield the start, end and key of every magic word in the text whose key is in the context
+
+        @input text: The text to scan
+        """
+        special = self._special_character
+        width = self._width
+        start = text.find(special)
+        while start != -1:
+            end = text.find(special, start + width)
+            if end == -1:
+                return
+            key = text[start + width:end]
+            if key in self._keys:
+                yield start, end + width, key
+                start = text.find(special, end + width)
+            else:
+                # The closing character could be the opening character of the next magic word
+                start = end
+
+    def value(self, key: str):
+
+        """
+        Description: Return the value of a key from the context. A value which is callable, like a function or a
+        lambda, is lazy: it is only called the first time the template references it and its result is kept for
+        the rest of the render.
+
+        @input key: The string of a key in the context
+        """
+        try:
+            return self._values[key]
+        except KeyError:
+            value = self._context[self._keys[key]]
+            if callable(value):
+                value = value()
+            self._values[key] = value
+            return value
+
+    def get(self, key: str, default=None):
+
+        """
+        Description: Return the value of a key from the context like value, or default when the key is not in it
+        """
+        if key not in self._keys:
+            return default
+        return self.value(key)
+
+    def text_value(self, key: str) -> str:
+
+        """
+        Description: Return the string value of a key from the context. The string is only built once per engine.
+
+        @input key: The string of a key in the context
+        """
+        try:
+            return self._text_values[key]
+        except KeyError:
+            value = str(self.value(key))
+            self._text_values[key] = value
+            return value
+
+    def has_placeholder(self, text: str) -> bool:
+        for _ in self._iter_matches(text):
+            return True
+        return False
+
+    def find_keys(self, text: str) -> List[str]:
+        return [key for _, _, key in self._iter_matches(text)]
+
+    def substitute(self, text: str) -> str:
+
+        """
+        Description: Replace every magic word in the text with its value from the context
+
+        @input text: The text containing magic words
+
+        @output text: The text with the magic words replaced
+        """
+        pieces = []
+        position = 0
+        for start, end, key in self._iter_matches(text):
+            pieces.append(text[position:start])
+            pieces.append(self.text_value(key))
+            position = end
+        if self._stats is not None:
+            self._stats.runs_scanned += 1
+            self._stats.placeholders_replaced += len(pieces) // 2
+        if not pieces:
+            return text
+        pieces.append(text[position:])
+        return "".join(pieces)
+
+
+class _ScopedPlaceholderEngine(PlaceholderEngine):
+
+    def __init__(self, parent: PlaceholderEngine, values: Mapping):
+        super().__init__({}, parent.special_character, parent.stats)
+        self._parent = parent
+        self._context = ChainMap(values, parent.context)
+        self._keys = dict(parent._keys)
+        self._scoped = set()
+        for key in values:
+            self._keys[str(key)] = key
+            self._scoped.add(str(key))
+
+    def value(self, key: str):
+        if key in self._scoped:
+            return super().value(key)
+        return self._parent.value(key)
+
+    def text_value(self, key: str) -> str:
+        if key in self._scoped:
+            return super().text_value(key)
+        return self._parent.text_value(key)
@@ -0,0 +1,121 @@
+import os
+from copy import deepcopy
+from io import BytesIO
+from typing import IO, List, Tuple, Union
+
+from pptx import Presentation
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.package import XmlPart
+from pptx.opc.packuri import PACKAGE_URI
+from pptx.oxml import parse_xml
+from pptx.package import Package
+from pptx.presentation import Presentation as PowerPoint
+
+# A PowerPoint can be read from a file path, the bytes of the file or a file-like object
+PptxSource = Union[str, os.PathLike, bytes, IO[bytes]]
+# A rendered PowerPoint can be written to a file path, a file-like object or returned as bytes when None
+PptxOutput = Union[str, os.PathLike, IO[bytes], None]
+
+
+def is_path(value) -> bool:
+    return isinstance(value, (str, os.PathLike))
+
+
+def read_pptx_bytes(ppt: PptxSource) -> bytes:
+
+    """
+    Description: Read the bytes of a PowerPoint from a file path, bytes or a file-like object
+
+    @input ppt: File path, bytes or file-like object of the PowerPoint
+
+    @output blob: The bytes of the PowerPoint file
+    """
+    if isinstance(ppt, (bytes, bytearray)):
+        return bytes(ppt)
+    if is_path(ppt):
+        with open(ppt, "rb") as pptx_file:
+            return pptx_file.read()
+    return ppt.read()
+
+
+def open_presentation(ppt: PptxSource) -> PowerPoint:
+    if isinstance(ppt, (bytes, bytearray)):
+        return Presentation(BytesIO(ppt))
+    if is_path(ppt):
+        return Presentation(os.fspath(ppt))
+    return Presentation(ppt)
+
+
+class PresentationSnapshot:
+
+    """
+    Description: A PowerPoint parsed once, which opens as a new Presentation without reading the file again.
+    The xml parts are copied from their parsed trees and the binary parts share their bytes, so every
+    Presentation opened can be changed without changing the snapshot or the other Presentations.
+
+    @input ppt: File path, bytes or file-like object of the PowerPoint
+    """
+
+    def __init__(self, ppt: PptxSource):
+        package = open_presentation(ppt).part.package
+        # The partname, content type, part class, parsed xml or bytes and parsed relationships of every part
+        self._parts: List[Tuple] = [
+            (part.partname, part.content_type, type(part),
+             part._element if isinstance(part, XmlPart) else part.blob, parse_xml(part.rels.xml))
+            for part in package.iter_parts()
+        ]
+        self._package_rels = parse_xml(package._rels.xml)
+
+    def open(self) -> PowerPoint:
+
+        """
+        Description: Open a new Presentation from the snapshot
+
+        @output ppt: A Presentation of its own, as if the PowerPoint had been opened again
+        """
+        package = Package(None)
+        parts = {}
+        for partname, content_type, part_class, content, _xml_rels in self._parts:
+            if issubclass(part_class, XmlPart):
+                parts[partname] = part_class(partname, content_type, package, deepcopy(content))
+            else:
+                parts[partname] = part_class.load(partname, content_type, package, content)
+        for partname, _content_type, _part_class, _content, xml_rels in self._parts:
+            parts[partname].load_rels_from_xml(xml_rels, parts)
+        package._rels.load_from_xml(PACKAGE_URI, self._package_rels, parts)
+        return package.part_related_by(RT.OFFICE_DOCUMENT).presentation
+
+
+def save_presentation(ppt: PowerPoint, output: PptxOutput) -> Union[str, os.PathLike, IO[bytes], bytes]:
+
+    """
+    Description: Save a Presentation to a file path or file-like object, or return its bytes
+
+    @input ppt: The Presentation to save
+    @input output: File path or file-like object to write to. None returns the bytes of the PowerPoint
+
+    @output output: The output that was written to or the bytes of the PowerPoint when output is None
+    """
+    if output is None:
+        stream = BytesIO()
+        ppt.save(stream)
+        return stream.getvalue()
+    ppt.save(os.fspath(output) if is_path(output) else output)
+    return output
+
+
+def check_output_path(output_path: Union[str, os.PathLike]) -> None:
+
+    """
+    Description: Check that a PowerPoint can be written to a file path without creating or truncating the file
+
+    @input output_path: The file path the PowerPoint will be written to
+    """
+    output_path = os.fspath(output_path)
+    directory = os.path.dirname(os.path.abspath(output_path))
+    if os.path.isdir(output_path):
+        raise IOError(f"Cannot open a PPTX file at the desired output dir: {output_path} is a directory")
+    if not os.path.isdir(directory):
+        raise IOError(f"Cannot open a PPTX file at the desired output dir: {directory} does not exist")
+    if not os.access(output_path if os.path.exists(output_path) else directory, os.W_OK):
+        raise IOError(f"Cannot open a PPTX file at the desired output dir: {output_path} is not writable")
@@ -0,0 +1,161 @@
+import os
+from contextlib import nullcontext
+from time import perf_counter
+from typing import Callable, ContextManager, Dict, Union
+
+from pptx.presentation import Presentation as PowerPoint
+
+from pptx_io import PptxOutput, is_path, save_presentation
+
+# Stages of a render timed by RenderStats
+LOAD = "load"
+TEXT = "text"
+TABLE = "table"
+PICTURE = "picture"
+SAVE = "save"
+STAGES = (LOAD, TEXT, TABLE, PICTURE, SAVE)
+
+# Shared by every render without stats so timing a stage costs nothing when stats are off
+_NO_TIMER = nullcontext()
+
+
+class _Timer:
+
+    def __init__(self, totals: Dict, key):
+        self._totals = totals
+        self._key = key
+        self._start = 0.0
+
+    def __enter__(self) -> None:
+        self._start = perf_counter()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._totals[self._key] = self._totals.get(self._key, 0.0) + perf_counter() - self._start
+
+
+class RenderStats:
+
+    """
+    Description: Timings and counters of a single render. Wall time is kept per stage of the render (load, text,
+    table, picture and save) and per slide. Counters keep the runs of text scanned for magic words, the magic
+    words replaced, the table rows added, the images embedded and the bytes of the PowerPoint written.
+    Collected only when TemplatePptxOptions.stats_callback is set.
+    """
+
+    def __init__(self):
+        self.stage_seconds: Dict[str, float] = dict.fromkeys(STAGES, 0.0)
+        self.slide_seconds: Dict[int, float] = {}
+        self.runs_scanned = 0
+        self.placeholders_replaced = 0
+        self.rows_added = 0
+        self.images_embedded = 0
+        self.bytes_written = 0
+
+    @property
+    def total_seconds(self) -> float:
+        '''
+        Description: Wall time spent in every stage of the render
+        '''
+        return sum(self.stage_seconds.values())
+
+    def stage(self, stage: str) -> ContextManager:
+        return _Timer(self.stage_seconds, stage)
+
+    def slide(self, slide_number: int) -> ContextManager:
+        return _Timer(self.slide_seconds, slide_number)
+
+    def merge(self, other: "RenderStats") -> None:
+
+        """
+        Description: Add the timings and counters of another RenderStats to these, used for the parts of a render
+        done by worker processes. Stage times of parallel work add up, so they can exceed the wall time.
+        """
+        for stage, seconds in other.stage_seconds.items():
+            self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+        for slide_number, seconds in other.slide_seconds.items():
+            self.slide_seconds[slide_number] = self.slide_seconds.get(slide_number, 0.0) + seconds
+        self.runs_scanned += other.runs_scanned
+        self.placeholders_replaced += other.placeholders_replaced
+        self.rows_added += other.rows_added
+        self.images_embedded += other.images_embedded
+        self.bytes_written += other.bytes_written
+
+    def as_dict(self) -> dict:
+
+        """
+        Description: The stats as plain values ready to be sent as JSON or to a metrics pipeline
+        """
+        return {
+            "total_seconds": self.total_seconds,
+            "stage_seconds": dict(self.stage_seconds),
+            "slide_seconds": dict(self.slide_seconds),
+            "runs_scanned": self.runs_scanned,
+            "placeholders_replaced": self.placeholders_replaced,
+            "rows_added": self.rows_added,
+            "images_embedded": self.images_embedded,
+            "bytes_written": self.bytes_written,
+        }
+
+    def __repr__(self) -> str:
+        return f"RenderStats({self.as_dict()})"
+
+
+def time_stage(stats: Union[RenderStats, None], stage: str) -> ContextManager:
+    return stats.stage(stage) if stats is not None else _NO_TIMER
+
+
+def time_slide(stats: Union[RenderStats, None], slide_number: int) -> ContextManager:
+    return stats.slide(slide_number) if stats is not None else _NO_TIMER
+
+
+def save_presentation_with_stats(ppt: PowerPoint, output: PptxOutput, stats: Union[RenderStats, None]):
+
+    """
+    Description: Save a Presentation like save_presentation, timing the save and counting the bytes written
+    when stats are collected
+    """
+    if stats is None:
+        return save_presentation(ppt, output)
+    return write_with_stats(lambda: save_presentation(ppt, output), output, stats)
+
+
+def write_with_stats(write: Callable[[], PptxOutput], output: PptxOutput, stats: RenderStats):
+
+    """
+    Description: Run a function writing a PowerPoint to an output, timing it as the save stage and counting
+    the bytes written
+
+    @input write: Function writing the PowerPoint. It returns the output or the bytes when output is None
+    @input output: File path or file-like object written to, or None
+    @input stats: RenderStats of the render
+    """
+    start_position = output_position(output)
+    with stats.stage(SAVE):
+        result = write()
+    count_bytes_written(stats, output, result, start_position)
+    return result
+
+
+def count_bytes_written(stats: RenderStats, output: PptxOutput, result, start_position: Union[int, None]) -> None:
+
+    """
+    Description: Set the bytes written by a render once its output is complete
+
+    @input result: The output or the bytes of the PowerPoint when output is None
+    @input start_position: The position of a file-like output before the render wrote to it, from output_position
+    """
+    if output is None:
+        stats.bytes_written = len(result)
+    elif is_path(output):
+        stats.bytes_written = os.path.getsize(output)
+    elif start_position is not None:
+        stats.bytes_written = output_position(output) - start_position
+
+
+def output_position(output: PptxOutput) -> Union[int, None]:
+    if output is None or is_path(output):
+        return None
+    try:
+        return output.tell()
+    except (AttributeError, OSError):
+        return None
@@ -0,0 +1,102 @@
+from typing import Callable, Dict, Iterator, NamedTuple, Tuple, Union
+
+from lxml import etree
+from pptx.oxml.ns import qn
+from pptx.shapes.base import BaseShape
+from pptx.shapes.shapetree import GroupShapes, _BaseGroupShapes
+
+# Kinds of work a shape can need. Used by CompiledTemplate to record what to do at a location.
+TEXT = "text"
+TABLE = "table"
+PICTURE = "picture"
+
+_SP = qn("p:sp")
+_PIC = qn("p:pic")
+_GRAPHIC_FRAME = qn("p:graphicFrame")
+_GROUP = qn("p:grpSp")
+_TX_BODY = qn("p:txBody")
+
+
+class ShapeContent(NamedTuple):
+    """A shape of a slide holding content that needs work at render time."""
+    kind: str                       # TEXT, TABLE or PICTURE
+    element: etree._Element         # The p:sp, p:graphicFrame or p:pic element of the shape
+    shapes: _BaseGroupShapes        # The shapes of the slide or group shape holding the shape
+    path: Tuple[int, ...]           # Shape indexes from the slide shape tree down into group shapes
+
+    @property
+    def shape(self) -> BaseShape:
+        '''
+        Description: The python-pptx shape of the element, made each time it is asked for
+        '''
+        return self.shapes._shape_factory(self.element)
+
+
+def _text_kind(element: etree._Element) -> Union[str, None]:
+    return TEXT if element.find(_TX_BODY) is not None else None
+
+
+def _table_kind(element: etree._Element) -> Union[str, None]:
+    return TABLE if element.xpath("./a:graphic/a:graphicData/a:tbl") else None
+
+
+def _picture_kind(element: etree._Element) -> Union[str, None]:
+    # Placeholder pictures and movies have other shape types in python-pptx and are not replaced
+    if element.xpath("./p:nvPicPr/p:nvPr/p:ph | ./p:nvPicPr/p:nvPr/a:videoFile"):
+        return None
+    return PICTURE
+
+
+# The kind of content of a shape by the tag of its element. Connectors, content parts and other shapes have none
+_KINDS: Dict[str, Callable[[etree._Element], Union[str, None]]] = {
+    _SP: _text_kind,
+    _GRAPHIC_FRAME: _table_kind,
+    _PIC: _picture_kind,
+}
+
+
+def content_kind(element: etree._Element) -> Union[str, None]:
+
+    """
+    Description: The kind of content a shape element holds, found from its tag and without making a python-pptx
+    shape. A text shape without a text body, a chart frame or a placeholder picture holds none.
+
+    @input element: A shape element of a shape tree
+
+    @output kind: TEXT, TABLE, PICTURE or None
+    """
+    kind_of = _KINDS.get(element.tag)
+    return kind_of(element) if kind_of is not None else None
+
+
+def iter_shape_contents(shapes: _BaseGroupShapes, path: Tuple[int, ...] = ()) -> Iterator[ShapeContent]:
+
+    """
+    Description: Walk a shape tree once and yield every shape holding text, a table or a picture in document
+    order. Group shapes are walked into at any depth and every element is looked at once.
+
+    @input shapes: The shapes of a slide or of a group shape ex. (slide.shapes)
+    @input path: The path of the group shape holding the shapes. Empty for the shapes of a slide
+
+    @output contents: A ShapeContent for every shape with work to do
+    """
+    for index, element in enumerate(shapes._element.iter_shape_elms()):
+        yield from iter_element_contents(element, shapes, path + (index,))
+
+
+def iter_element_contents(element: etree._Element, shapes: _BaseGroupShapes,
+                          path: Tuple[int, ...]) -> Iterator[ShapeContent]:
+
+    """
+    Description: The ShapeContent of one shape element, or of every shape inside it when it is a group shape
+
+    @input element: A shape element of the shape tree
+    @input shapes: The shapes of the slide or group shape holding the element
+    @input path: The path of the element from the slide shape tree
+    """
+    if element.tag == _GROUP:
+        yield from iter_shape_contents(GroupShapes(element, shapes), path)
+        return
+    kind = content_kind(element)
+    if kind is not None:
+        yield ShapeContent(kind, element, shapes, path)
@@ -0,0 +1,92 @@
+from copy import deepcopy
+
+from pptx.oxml.ns import qn
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.slide import Slide
+
+# Relationships which are not copied to a cloned slide. The layout is related when the slide is added
+# and notes belong to the original slide only.
+_SKIPPED_RELATIONSHIPS = (RT.SLIDE_LAYOUT, RT.NOTES_SLIDE)
+_KEPT_TAGS = (qn("p:cSld"), qn("p:spTree"))
+_RELATIONSHIP_NAMESPACE = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+
+
+def clone_slide(slide: Slide, after: Slide = None) -> Slide:
+
+    """
+    Description: Duplicate a slide of a presentation. The copy uses the same slide layout, holds a copy of every
+    shape and shares the pictures and other parts related to the original slide.
+
+    @input slide: The slide to copy
+    @input after: The slide the copy is placed after. Defaults to the slide being copied
+
+    @output slide: The new slide
+    """
+    presentation_part = slide.part.package.presentation_part
+    slides = presentation_part.presentation.slides
+    new_slide: Slide = slides.add_slide(slide.slide_layout)
+    # python-pptx names a new slide after the number of slides, which is the name of another slide once a slide
+    # was deleted
+    taken = {rel.target_part.partname for rel in presentation_part.rels.values()
+             if rel.reltype == RT.SLIDE and rel.target_part is not new_slide.part}
+    if new_slide.part.partname in taken:
+        new_slide.part.partname = presentation_part.package.next_partname("/ppt/slides/slide%d.xml")
+
+    # Replace the content created from the layout with a copy of the original slide. The elements of the slide,
+    # common slide data and shape tree are kept as the new slide already has proxies pointing at them.
+    new_element = new_slide._element
+    _copy_content(slide._element, new_element)
+    _copy_content(slide._element.cSld, new_element.cSld)
+    _copy_content(slide._element.cSld.spTree, new_element.cSld.spTree)
+
+    # Relate the new slide to the same parts and point the copied xml at the new relationship ids
+    rIds = {}
+    for rId, rel in slide.part.rels.items():
+        if rel.reltype in _SKIPPED_RELATIONSHIPS:
+            continue
+        if rel.is_external:
+            rIds[rId] = new_slide.part.rels.get_or_add_ext_rel(rel.reltype, rel.target_ref)
+        else:
+            rIds[rId] = new_slide.part.rels.get_or_add(rel.reltype, rel.target_part)
+    for element in new_element.iter():
+        for name, value in element.attrib.items():
+            if name.startswith(_RELATIONSHIP_NAMESPACE) and value in rIds:
+                element.set(name, rIds[value])
+
+    _move_slide_after(presentation_part, new_slide, after if after is not None else slide)
+    return new_slide
+
+
+def _copy_content(source, target) -> None:
+    """Replace the attributes and children of target with copies of those of source. The p:cSld and p:spTree
+    children of target are kept in place of their copies."""
+    kept = {child.tag: child for child in target if child.tag in _KEPT_TAGS}
+    for child in list(target):
+        target.remove(child)
+    for name, value in source.attrib.items():
+        target.set(name, value)
+    for child in source:
+        target.append(kept[child.tag] if child.tag in kept else deepcopy(child))
+
+
+def _move_slide_after(presentation_part, slide: Slide, after: Slide) -> None:
+    sldIdLst = presentation_part.presentation._element.sldIdLst
+    sldIds = list(sldIdLst)
+    moving = next(sldId for sldId in sldIds if presentation_part.related_part(sldId.rId) is slide.part)
+    anchor = next(sldId for sldId in sldIds if presentation_part.related_part(sldId.rId) is after.part)
+    anchor.addnext(moving)
+
+
+def delete_slide(slide: Slide) -> None:
+
+    """
+    Description: Remove a slide from its presentation. The parts only the slide related to are left out when the
+    presentation is saved.
+
+    @input slide: The slide to remove
+    """
+    presentation_part = slide.part.package.presentation_part
+    sldIdLst = presentation_part.presentation._element.sldIdLst
+    sldId = next(sldId for sldId in sldIdLst if presentation_part.related_part(sldId.rId) is slide.part)
+    sldIdLst.remove(sldId)
+    presentation_part.drop_rel(sldId.rId)
@@ -0,0 +1,66 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple, Union
+
+from render_stats import RenderStats
+from slide_splicer import SlideParts
+
+# The compiled template of a worker process. It is sent once when the worker starts.
+_worker_template = None
+
+
+def _init_worker(template) -> None:
+    global _worker_template
+    _worker_template = template
+
+
+def _render_chunk(context: dict, slide_indexes: List[int],
+                  collect_stats: bool) -> Tuple[SlideParts, Union[RenderStats, None]]:
+    stats = RenderStats() if collect_stats else None
+    return _worker_template._render_slide_parts(context, slide_indexes, stats), stats
+
+
+def split_slides(slide_indexes: List[int], chunks: int) -> List[List[int]]:
+
+    """
+    Description: Split slide indexes into contiguous chunks of about the same size
+
+    @input slide_indexes: Indexes of the slides, in ascending order
+    @input chunks: Number of chunks wanted. Fewer are returned when there are fewer slides
+
+    @output chunks: The slide indexes of every chunk, in order
+    """
+    chunks = min(chunks, len(slide_indexes))
+    size, extra = divmod(len(slide_indexes), chunks) if chunks else (0, 0)
+    split = []
+    start = 0
+    for chunk in range(chunks):
+        end = start + size + (1 if chunk < extra else 0)
+        split.append(slide_indexes[start:end])
+        start = end
+    return split
+
+
+def render_slide_parts(template, context: dict, slide_indexes: List[int], workers: int,
+                       stats: Union[RenderStats, None]) -> List[SlideParts]:
+
+    """
+    Description: Render the slides of one context of a compiled template over a pool of worker processes. Every
+    worker receives the compiled template once and renders contiguous chunks of slides from a copy of the
+    template trimmed to the chunk, so each slide is loaded, filled in and serialized by one worker only.
+
+    @input template: The CompiledTemplate to render. It and the context must be picklable
+    @input context: A dictionary containing all of the data that is fed into the template
+    @input slide_indexes: Indexes of the slides to render, starting at 0, in ascending order
+    @input workers: Number of worker processes
+    @input stats: RenderStats the stats of every worker are merged into. None collects nothing
+
+    @output slide_parts: The SlideParts of every chunk, in slide order, ready for write_slides
+    """
+    # Twice as many chunks as workers so a slow chunk does not hold up the others for long
+    chunks = split_slides(slide_indexes, workers * 2)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(template,)) as executor:
+        results = list(executor.map(_render_chunk, [context] * len(chunks), chunks, [stats is not None] * len(chunks)))
+    if stats is not None:
+        for _, chunk_stats in results:
+            stats.merge(chunk_stats)
+    return [slide_parts for slide_parts, _ in results]
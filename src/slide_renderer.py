@@ -0,0 +1,147 @@
+from contextlib import contextmanager
+from typing import Iterator, Union
+
+from pptx.shapes.autoshape import Shape
+from pptx.slide import Slide
+
+from text_processor import TextProcessor
+from table_processor import TableProcessor, process_overflow
+from picture_processor import PictureProcessor, PictureIndex
+from template_pptx_options import TemplatePptxOptions
+from placeholder_engine import PlaceholderEngine
+from image_cache import ImagePartRegistry
+from render_stats import RenderStats, time_stage
+from shape_walker import TEXT, TABLE, PICTURE, iter_shape_contents
+
+
+class SlideRenderer:
+
+    """
+    Description: Runs the text, table and picture processors over the shapes of a slide. Shared by the
+    walking parser in TemplatePptx and by the recorded locations of a CompiledTemplate so both produce the
+    same output.
+
+    @input context: A dictionary containing all of the data that is fed into the template
+    @input special_character: Special character which is wrapped around key words
+    @input options: The TemplatePptxOptions of the render
+    @input stats: RenderStats the timings and counters of the render are added to. None collects nothing
+    @input engine: PlaceholderEngine shared with other renderers of the same render. Built from the context
+    when not given
+    """
+
+    def __init__(self, context: dict, special_character: str, options: TemplatePptxOptions,
+                 stats: RenderStats = None, engine: PlaceholderEngine = None):
+        self._context = context
+        self._special_character = special_character
+        self._options = options
+        self._stats = stats
+        # One engine for the whole render so the context is only indexed once
+        self._engine = engine if engine is not None else PlaceholderEngine(context, special_character, stats)
+        # Image parts of the presentation by hash, created with the first picture
+        self._image_parts = None
+        # Pictures of the current slide, replaced together once the rest of the slide is processed
+        self._pictures = PictureIndex()
+        # Tables of the current slide which continue on new slides once the slide is complete
+        self._overflowing_tables = []
+
+    @property
+    def engine(self) -> PlaceholderEngine:
+        return self._engine
+
+    @contextmanager
+    def using_engine(self, engine: Union[PlaceholderEngine, None]) -> Iterator[None]:
+
+        """
+        Description: Fill slides from another engine, like the engine of a record of a repeated slide, while the
+        block runs. Image parts stay shared with the rest of the render. None keeps the current engine.
+
+        @input engine: The PlaceholderEngine to fill slides from or None
+        """
+        if engine is None:
+            yield
+            return
+        saved = self._engine, self._context
+        self._engine, self._context = engine, engine.context
+        try:
+            yield
+        finally:
+            self._engine, self._context = saved
+
+    def process_slide(self, slide: Slide, slide_number: int) -> None:
+
+        """
+        Description: Process every shape of a slide and then complete the slide
+
+        @input slide: The slide to process
+        @input slide_number: The slide number, starting at 1
+        """
+        # Each shape is looked at once by its tag, python-pptx shapes are only made for shapes with work to do
+        for content in iter_shape_contents(slide.shapes):
+            self.process_site(content.kind, content.shape, slide, slide_number)
+        self.finish_slide(slide, slide_number)
+
+    def finish_slide(self, slide: Slide, slide_number: int) -> None:
+
+        """
+        Description: Complete a slide once all of its shapes were processed. The pictures of the slide are
+        replaced using an index of their alt text, then tables with more records than the options allow on
+        one slide continue on copies of the finished slide.
+
+        @input slide: The slide that was processed
+        @input slide_number: The slide number, starting at 1
+        """
+        pictures, self._pictures = self._pictures, PictureIndex()
+        if len(pictures):
+            with time_stage(self._stats, PICTURE):
+                self._replace_pictures(pictures, slide, slide_number)
+
+        overflowing_tables, self._overflowing_tables = self._overflowing_tables, []
+        if overflowing_tables:
+            with time_stage(self._stats, TABLE):
+                process_overflow(overflowing_tables, slide, self._options)
+
+    def _replace_pictures(self, pictures: PictureIndex, slide: Slide, slide_number: int) -> None:
+        if self._image_parts is None:
+            self._image_parts = ImagePartRegistry(slide.part.package)
+        # Pictures whose alt text is in the context are replaced first, the rest only warn or raise
+        for picture in pictures.matching(self._context) + pictures.unmatched(self._context):
+            processor = PictureProcessor(picture, self._context, slide_number, slide, self._special_character,
+                                         image_parts=self._image_parts, engine=self._engine)
+            replaced = processor.replace_picture(self._options)
+            if replaced is not None and self._stats is not None:
+                self._stats.images_embedded += 1
+
+    def process_site(self, kind: str, shape: Shape, slide: Slide, slide_number: int) -> None:
+
+        """
+        Description: Process a single kind of content on a shape. Used when the location was recorded ahead of time
+
+        @input kind: One of TEXT, TABLE or PICTURE
+        @input shape: The shape holding the content
+        @input slide: Slide object containing the shape
+        @input slide_number: The slide number, starting at 1
+        """
+        if kind == TEXT:
+            self.process_text(shape, slide_number)
+        elif kind == TABLE:
+            self.process_table(shape, slide, slide_number)
+        elif kind == PICTURE:
+            self.process_picture(shape, slide, slide_number)
+        else:
+            raise ValueError(f"Unknown kind of shape content: {kind}")
+
+    def process_text(self, shape: Shape, slide_number: int) -> None:
+        with time_stage(self._stats, TEXT):
+            TextProcessor(shape, self._context, slide_number, self._special_character, self._engine).replace_text()
+
+    def process_table(self, shape: Shape, slide: Slide, slide_number: int) -> None:
+        processor = TableProcessor(shape, self._context, slide_number, self._special_character, self._engine)
+        with time_stage(self._stats, TABLE):
+            processor.process_table(self._options)
+        if processor.has_overflow:
+            self._overflowing_tables.append(processor)
+
+    def process_picture(self, shape: Shape, slide: Slide, slide_number: int) -> None:
+        # Pictures are added to the index of the slide and replaced by finish_slide. Replacing them while the
+        # shapes are walked would visit the new pictures added at the end of the shape tree.
+        self._pictures.add(shape)
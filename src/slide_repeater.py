@@ -0,0 +1,121 @@
+import warnings
+from typing import Dict, Iterable, Iterator, List, Mapping, Tuple, Union
+
+from lxml import etree
+from pptx.oxml.ns import qn
+from pptx.slide import Slide
+
+from placeholder_engine import PlaceholderEngine, iter_candidate_keys
+from slide_cloner import clone_slide, delete_slide, _move_slide_after
+from table_processor import iter_relationship_records
+from template_pptx_options import TemplatePptxOptions
+
+# A slide with a magic word like $repeat_customers.name$ is repeated once per record of the context list
+# repeat_customers, the same way a table with $relationship_people.id$ gets a row per record
+REPEAT_PREFIX = "repeat_"
+
+_T = qn("a:t")
+
+
+class SlideFailedToRepeat(Exception):
+    """Raised when a slide fails to be repeated for the records of a list due to a data or logic issue."""
+    def __init__(self, message="The slide could not be repeated.", *, cause=None):
+        super().__init__(message)
+        self.__cause__ = cause
+
+
+def find_repeat_name(keys: Iterable[str]) -> Union[str, None]:
+
+    """
+    Description: The name of the context list a slide is repeated for, from the keys of the magic words on it
+
+    @input keys: The keys of the magic words of a slide ex. (["title", "repeat_customers.name"])
+
+    @output name: The context key of the records ex. ("repeat_customers") or None when the slide is not repeated
+    """
+    for key in keys:
+        if key.startswith(REPEAT_PREFIX) and "." in key:
+            return key.split(".")[0]
+    return None
+
+
+def slide_repeat_name(slide_element: etree._Element, special_character: str) -> Union[str, None]:
+
+    """
+    Description: The name of the context list a slide is repeated for, read from the text of the slide xml
+
+    @input slide_element: The p:sld element of the slide to check
+    @input special_character: Special character which is wrapped around key words
+    """
+    text = "".join(t.text or "" for t in slide_element.iter(_T))
+    if special_character + REPEAT_PREFIX not in text:
+        return None
+    return find_repeat_name(iter_candidate_keys(text, special_character))
+
+
+def record_values(name: str, record: Mapping) -> Dict[str, object]:
+
+    """
+    Description: The values a record adds to the context of its copy of a repeated slide, one per field under
+    the dot notation key of the field ex. ({"repeat_customers.name": "Duncan"})
+    """
+    return {f"{name}.{field}": value for field, value in record.items()}
+
+
+def iter_repeated_slides(slide: Slide, name: str, engine: PlaceholderEngine,
+                         options: TemplatePptxOptions) -> Iterator[Tuple[Slide, Union[PlaceholderEngine, None]]]:
+
+    """
+    Description: Repeat a slide once per record of a context list. The records are read lazily and a copy of the
+    slide is cloned for every record before the slide itself is filled, so each copy starts from the template.
+    The slide itself is used for the last record. A list without records removes the slide.
+
+    @input slide: The template slide to repeat
+    @input name: The context key of the records
+    @input engine: The PlaceholderEngine of the render
+    @input options: The options of the render
+
+    @output slides: Every copy of the slide in order with the engine of its record. Fill each one before the
+    next is taken. When the list is missing, the slide with None as the engine
+    """
+    try:
+        records = engine.get(name)
+        if records is None:
+            raise KeyError(f"Repeat link for {name} does not exist.")
+        records = iter_relationship_records(records)
+        record = next(records, None)
+    except Exception as e:
+        if options.strict_mode:
+            raise SlideFailedToRepeat(f"Failed while reading the records of {name}.", cause=e) from e
+        warnings.warn(f"Slide failed to be repeated due to {e}")
+        yield slide, None
+        return
+
+    if record is None:
+        delete_slide(slide)
+        return
+    presentation_part = slide.part.package.presentation_part
+    for next_record in records:
+        # The slide is kept after its copies so the slides a table continues on stay after their copy
+        copy = clone_slide(slide)
+        _move_slide_after(presentation_part, slide, copy)
+        yield copy, engine.scoped(record_values(name, record))
+        record = next_record
+    yield slide, engine.scoped(record_values(name, record))
+
+
+def iter_slides(slides: List[Slide], engine: PlaceholderEngine, special_character: str,
+                options: TemplatePptxOptions) -> Iterator[Tuple[Slide, Union[PlaceholderEngine, None]]]:
+
+    """
+    Description: Every slide to fill in the order of the deck, with repeated slides expanded to one copy per
+    record. A slide which is not repeated comes with None as the engine so the engine of the render is used.
+
+    @input slides: The template slides, listed before any slide is added
+    """
+    for slide in slides:
+        name = slide_repeat_name(slide._element, special_character)
+        if name is None:
+            yield slide, None
+        else:
+            yield from iter_repeated_slides(slide, name, engine, options)
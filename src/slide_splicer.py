@@ -0,0 +1,368 @@
+import hashlib
+import os
+import posixpath
+import shutil
+import zipfile
+import zlib
+from io import BytesIO
+from typing import Dict, IO, Iterable, List, NamedTuple, Set, Tuple, Union
+
+from lxml import etree
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.package import Part, XmlPart
+from pptx.presentation import Presentation as PowerPoint
+
+from package_merger import (_SourcePackage, _CT_NAMESPACE, _P_NAMESPACE, _R_NAMESPACE, _RELS_NAMESPACE,
+                            _MEDIA_DIRECTORY, _CHUNK_SIZE, _rels_name, _zip_name, _resolve_target, _relative_target)
+from pptx_io import PptxSource, PptxOutput, is_path
+
+
+# The bytes left in place of a binary part, like an image or a video, when a slide is trimmed with stubs
+_STUB = b""
+
+
+class FullRenderRequired(Exception):
+    """Raised when the slides of a render cannot be spliced into the previous render and the whole deck is needed"""
+    pass
+
+
+class SlideRelationship(NamedTuple):
+    """A relationship of a rendered slide."""
+    rId: str
+    reltype: str
+    target: str         # Part name of the target, a key of SlideParts.new_parts or an external address
+    is_external: bool
+
+
+class SlideParts(NamedTuple):
+    """The parts of rendered slides, collected so they can be sent between processes and written by write_slides."""
+    slides: Dict[str, Tuple[bytes, List[SlideRelationship]]]   # Xml and relationships by the part name they replace
+    new_parts: Dict[str, Tuple[bytes, str]]                   # Bytes and content type of parts the package lacks
+
+
+def trim_template(template: PptxSource, slide_indexes: List[int]) -> bytes:
+
+    """
+    Description: Build a copy of a template PowerPoint which only shows some of its slides. The other slides are
+    left out of the presentation part and only the parts the kept slides and the presentation still relate to
+    are copied, so python-pptx loads the shared parts like the slide masters and layouts but not the media of
+    the other slides.
+
+    @input template: File path, bytes or file-like object of the template PowerPoint
+    @input slide_indexes: Indexes of the slides to keep, starting at 0, in ascending order
+
+    @output blob: The bytes of the trimmed PowerPoint
+    """
+    package = _SourcePackage(template)
+    try:
+        return _trim(package, slide_indexes)
+    finally:
+        package.close()
+
+
+def _trim(package: _SourcePackage, slide_indexes: List[int], stub_binary_parts: bool = False) -> bytes:
+
+    """
+    Description: trim_template on an open package
+
+    @input stub_binary_parts: Leave binary parts, like images and videos, empty instead of reading them. Only when
+    the rendered slides are written back into the package itself, which then still holds their bytes
+    """
+    presentation_partname = package.presentation_partname
+    presentation = etree.fromstring(package.read(presentation_partname))
+    sldIds = list(presentation.iter(f"{{{_P_NAMESPACE}}}sldId"))
+    kept_rIds = {sldIds[index].get(f"{{{_R_NAMESPACE}}}id") for index in slide_indexes}
+    for sldId in sldIds:
+        if sldId.get(f"{{{_R_NAMESPACE}}}id") not in kept_rIds:
+            sldId.getparent().remove(sldId)
+
+    relationships = etree.fromstring(package.read(_rels_name(presentation_partname)))
+    for rel in list(relationships):
+        if rel.get("Type") == RT.SLIDE and rel.get("Id") not in kept_rIds:
+            relationships.remove(rel)
+
+    stream = BytesIO()
+    # Stored without compression, the copy is only read back once
+    with zipfile.ZipFile(stream, "w", zipfile.ZIP_STORED) as trimmed:
+        trimmed.writestr("[Content_Types].xml", package.read("[Content_Types].xml"))
+        trimmed.writestr(_zip_name(presentation_partname), etree.tostring(presentation))
+        trimmed.writestr(_zip_name(_rels_name(presentation_partname)), etree.tostring(relationships))
+        for partname in _reachable(package, presentation_partname, list(relationships)):
+            if partname == presentation_partname:
+                continue
+            if partname != "/":
+                stub = stub_binary_parts and not package.content_type(partname).endswith("xml")
+                trimmed.writestr(_zip_name(partname), _STUB if stub else package.read(partname))
+            if package.has_part(_rels_name(partname)):
+                trimmed.writestr(_zip_name(_rels_name(partname)), package.read(_rels_name(partname)))
+    return stream.getvalue()
+
+
+def _reachable(package: _SourcePackage, presentation_partname: str,
+               presentation_rels: List[etree._Element]) -> List[str]:
+
+    """
+    Description: The package root and every part that can be reached from it through relationships. The
+    relationships of the presentation part are given as they were trimmed.
+    """
+    reached = []
+    pending = ["/"]
+    seen = {"/"}
+    while pending:
+        partname = pending.pop()
+        reached.append(partname)
+        rels = presentation_rels if partname == presentation_partname else package.rels(partname)
+        for rel in rels:
+            if rel.get("TargetMode") == "External":
+                continue
+            target = _resolve_target(partname, rel.get("Target"))
+            if target not in seen and package.has_part(target):
+                seen.add(target)
+                pending.append(target)
+    return reached
+
+
+def collect_slides(previous: PptxSource, ppt: Union[PowerPoint, None], slide_indexes: List[int],
+                   slide_count: int) -> SlideParts:
+
+    """
+    Description: Collect the parts of newly rendered slides which replace slides of a previous render. Xml parts
+    the slides relate to, like layouts and notes, are reused when the previous render has a part with the same
+    name. Other parts, like images, are reused when it holds the same bytes under the same name. The others are
+    collected as new parts.
+
+    @input previous: File path, bytes or file-like object of the previous render, or of the template the slides
+    were rendered from
+    @input ppt: A Presentation holding only the newly rendered slides, in the order of slide_indexes. None when
+    no slide is replaced
+    @input slide_indexes: Indexes of the replaced slides in the previous render, starting at 0
+    @input slide_count: The number of slides the previous render should have
+
+    @output slide_parts: The SlideParts of the rendered slides
+    """
+    package = _SourcePackage(previous)
+    try:
+        return _collect(package, ppt, slide_indexes, slide_count)
+    finally:
+        package.close()
+
+
+def _collect(previous: _SourcePackage, ppt: Union[PowerPoint, None], slide_indexes: List[int], slide_count: int,
+             slide_links: bool = False, stubbed: bool = False) -> SlideParts:
+
+    """
+    Description: collect_slides on an open package
+
+    @input slide_links: Whether links to other slides are kept. Only when the slides were rendered from the
+    package itself, as the linked slides then keep their part names
+    @input stubbed: Whether the slides were rendered from a copy of the package trimmed with stub binary parts
+    """
+    previous_slides = previous.slide_partnames()
+    rendered_slides = list(ppt.slides) if ppt is not None else []
+    if len(previous_slides) != slide_count or len(rendered_slides) != len(slide_indexes):
+        raise FullRenderRequired("The previous render does not have the slides of the template.")
+    # Part names of the parts of the new render, slides take the place of the slides they replace
+    partnames: Dict[Part, str] = {slide.part: previous_slides[index]
+                                  for index, slide in zip(slide_indexes, rendered_slides)}
+    slide_parts = SlideParts({}, {})
+    for slide in rendered_slides:
+        relationships = [_collect_relationship(previous, partnames, slide_parts, rId, rel, slide_links, stubbed)
+                         for rId, rel in slide.part.rels.items()]
+        slide_parts.slides[partnames[slide.part]] = (slide.part.blob, relationships)
+    return slide_parts
+
+
+def _collect_relationship(previous: _SourcePackage, partnames: Dict[Part, str], slide_parts: SlideParts,
+                          rId: str, rel, slide_links: bool, stubbed: bool) -> SlideRelationship:
+    if rel.is_external:
+        return SlideRelationship(rId, rel.reltype, rel.target_ref, True)
+    part = rel.target_part
+    if part not in partnames:
+        partname = str(part.partname)
+        if rel.reltype == RT.SLIDE and not slide_links:
+            # A link to a slide which was not rendered again
+            raise FullRenderRequired("A rendered slide links to another slide.")
+        if rel.reltype != RT.SLIDE and not _same_part(previous, part, stubbed):
+            if len(part.rels):
+                raise FullRenderRequired(f"The new part {partname} relates to other parts.")
+            slide_parts.new_parts[partname] = (part.blob, part.content_type)
+        partnames[part] = partname
+    return SlideRelationship(rId, rel.reltype, partnames[part], False)
+
+
+def _same_part(previous: _SourcePackage, part: Part, stubbed: bool = False) -> bool:
+    partname = str(part.partname)
+    if not previous.has_part(partname):
+        return False
+    # Rendering a slide only changes the slide and adds binary parts like images. The xml parts it relates to,
+    # like its layout or notes, are kept by name as python-pptx writes their xml back differently from the file
+    if isinstance(part, XmlPart):
+        return True
+    blob = part.blob
+    if stubbed and blob == _STUB:
+        # A stub of the part, its bytes were never read and are copied from the package at close
+        return True
+    # Compared by the size and CRC of the zip entry so the part of the package is not read
+    info = previous.info(partname)
+    return info.file_size == len(blob) and info.CRC == zlib.crc32(blob)
+
+
+def write_slides(previous: PptxSource, slide_parts: Iterable[SlideParts],
+                 output: PptxOutput) -> Union[str, os.PathLike, IO[bytes], bytes]:
+
+    """
+    Description: Write a PowerPoint which is a previous render with some of its slides replaced by newly rendered
+    ones. Every other part of the previous render is copied as it is. New parts get names the package does not
+    use yet and new parts with the same bytes are stored once. Media only used by the replaced slides is left out.
+
+    @input previous: File path, bytes or file-like object of the previous render, or of the template the slides
+    were rendered from
+    @input slide_parts: The SlideParts of the rendered slides, collected by collect_slides
+    @input output: File path or file-like object to write to. None returns the bytes of the PowerPoint
+
+    @output output: The output that was written to or the bytes of the PowerPoint when output is None
+    """
+    package = _SourcePackage(previous)
+    try:
+        with SpliceWriter(package, output) as writer:
+            for parts in slide_parts:
+                writer.add(parts)
+            return writer.close()
+    finally:
+        package.close()
+
+
+class SpliceWriter:
+
+    """
+    Description: Writes the output of write_slides as the slides arrive. The parts of every SlideParts are written
+    when it is added so only the slides being added are held in memory, and the rest of the previous render is
+    copied entry by entry when the writer is closed.
+
+    @input previous: The open package of the previous render or template
+    @input output: File path or file-like object to write to. None writes to bytes returned by close
+    """
+
+    def __init__(self, previous: _SourcePackage, output: PptxOutput):
+        self._previous = previous
+        self._output = output
+        self._stream = BytesIO() if output is None else None
+        target = self._stream if output is None else (os.fspath(output) if is_path(output) else output)
+        self._zip = zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED)
+        self._names: Set[str] = {"/" + name for name in previous._names}
+        self._written: Set[str] = set()
+        self._content_types: Dict[str, str] = {}
+        # New parts already written by the SHA1 hash of their bytes
+        self._new_parts: Dict[str, str] = {}
+        self._targets: Set[str] = set()
+        self._replaced: Set[str] = set()
+
+    def __enter__(self) -> "SpliceWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        # Releases the output when close was not reached
+        self._zip.close()
+
+    def add(self, slide_parts: SlideParts) -> None:
+        new_partnames = {partname: self._add_part(blob, partname, content_type)
+                         for partname, (blob, content_type) in slide_parts.new_parts.items()}
+        for partname, (blob, relationships) in slide_parts.slides.items():
+            self._replaced.add(partname)
+            self._write(partname, blob)
+            self._write(_rels_name(partname), self._rels_xml(partname, relationships, new_partnames))
+
+    def _write(self, partname: str, blob: bytes) -> None:
+        self._written.add(_zip_name(partname))
+        self._zip.writestr(_zip_name(partname), blob)
+
+    def _add_part(self, blob: bytes, partname: str, content_type: str) -> str:
+        sha1 = hashlib.sha1(blob).hexdigest()
+        if sha1 not in self._new_parts:
+            new_partname = self._unique_partname(partname)
+            self._new_parts[sha1] = new_partname
+            self._write(new_partname, blob)
+            self._content_types[new_partname] = content_type
+        return self._new_parts[sha1]
+
+    def _rels_xml(self, partname: str, relationships: List[SlideRelationship], new_partnames: Dict[str, str]) -> bytes:
+        element = etree.Element(f"{{{_RELS_NAMESPACE}}}Relationships", nsmap={None: _RELS_NAMESPACE})
+        for relationship in relationships:
+            rel = etree.SubElement(element, f"{{{_RELS_NAMESPACE}}}Relationship", Id=relationship.rId,
+                                   Type=relationship.reltype)
+            if relationship.is_external:
+                rel.set("Target", relationship.target)
+                rel.set("TargetMode", "External")
+            else:
+                target = new_partnames.get(relationship.target, relationship.target)
+                self._targets.add(target)
+                rel.set("Target", _relative_target(partname, target))
+        return etree.tostring(element, xml_declaration=True, encoding="UTF-8", standalone=True)
+
+    def _unique_partname(self, partname: str) -> str:
+        directory, name = posixpath.split(partname)
+        stem, extension = posixpath.splitext(name)
+        stem = stem.rstrip("0123456789")
+        number = 1
+        while posixpath.join(directory, f"{stem}{number}{extension}") in self._names:
+            number += 1
+        partname = posixpath.join(directory, f"{stem}{number}{extension}")
+        self._names.add(partname)
+        return partname
+
+    def _orphaned_media(self) -> Set[str]:
+
+        """
+        Description: Media of the previous render which was only used by the replaced slides
+        """
+        def targets(partname: str) -> Set[str]:
+            return {_resolve_target(partname, rel.get("Target")) for rel in self._previous.rels(partname)
+                    if rel.get("TargetMode") != "External"}
+
+        candidates = set()
+        for partname in self._replaced:
+            candidates |= {target for target in targets(partname) if target.startswith(_MEDIA_DIRECTORY)}
+        candidates -= self._targets
+        if not candidates:
+            return candidates
+        for name in self._previous._names:
+            if not name.endswith(".rels") or "/_rels/" not in "/" + name:
+                continue
+            directory, rels_file = posixpath.split("/" + name)
+            source_partname = posixpath.join(posixpath.dirname(directory), rels_file[:-len(".rels")])
+            if source_partname in self._replaced:
+                continue
+            candidates -= targets(source_partname)
+        return candidates
+
+    def close(self) -> Union[str, os.PathLike, IO[bytes], bytes]:
+        dropped = self._orphaned_media()
+        types = etree.fromstring(self._previous.read("[Content_Types].xml"))
+        for override in list(types.iter(f"{{{_CT_NAMESPACE}}}Override")):
+            if override.get("PartName") in dropped:
+                types.remove(override)
+        for partname, content_type in self._content_types.items():
+            extension = posixpath.splitext(partname)[1][1:].lower()
+            if self._previous._defaults.get(extension) != content_type:
+                etree.SubElement(types, f"{{{_CT_NAMESPACE}}}Override", PartName=partname, ContentType=content_type)
+
+        skipped = self._written | {_zip_name(partname) for partname in dropped}
+        for info in self._previous._zip.infolist():
+            if info.filename == "[Content_Types].xml":
+                self._zip.writestr(_copy_info(info),
+                                   etree.tostring(types, xml_declaration=True, encoding="UTF-8", standalone=True))
+            elif info.filename not in skipped:
+                # Copied in chunks so large media is never held in memory whole
+                with self._previous._zip.open(info) as source, \
+                        self._zip.open(_copy_info(info), "w", force_zip64=info.file_size > zipfile.ZIP64_LIMIT) as target:
+                    shutil.copyfileobj(source, target, _CHUNK_SIZE)
+        self._zip.close()
+        return self._stream.getvalue() if self._output is None else self._output
+
+
+def _copy_info(info: zipfile.ZipInfo) -> zipfile.ZipInfo:
+    # A new ZipInfo with the name, date and compression of an entry, the one of the source zip is left untouched
+    copy = zipfile.ZipInfo(info.filename, info.date_time)
+    copy.compress_type = info.compress_type
+    copy.external_attr = info.external_attr
+    return copy
@@ -0,0 +1,125 @@
+import gc
+import os
+import warnings
+from typing import IO, Union
+
+from lxml import etree
+from pptx.presentation import Presentation as PowerPoint
+
+from package_merger import _SourcePackage
+from placeholder_engine import PlaceholderEngine
+from pptx_io import PptxSource, PptxOutput, is_path, open_presentation
+from render_stats import (RenderStats, LOAD, SAVE, time_stage, time_slide, output_position, count_bytes_written,
+                          save_presentation_with_stats)
+from slide_renderer import SlideRenderer
+from slide_repeater import slide_repeat_name, iter_slides
+from slide_splicer import FullRenderRequired, SpliceWriter, _trim, _collect
+from template_pptx_options import TemplatePptxOptions
+from xml_renderer import XmlSlideRenderer
+
+
+def render_streaming(template: PptxSource, context: dict, output: PptxOutput = None, special_character: str = "$",
+                     options: TemplatePptxOptions = None) -> Union[str, os.PathLike, IO[bytes], bytes]:
+
+    """
+    Description: Render a template one slide at a time without loading the whole template. Every slide is
+    loaded from a copy of the template holding only that slide and the parts it relates to, filled in and
+    written to the output before the next slide is read. The parts no slide replaced, like the media of the
+    deck, are then copied from the template zip to the output zip in chunks. Peak memory depends on the
+    largest slide and its media instead of the whole deck.
+
+    @input template: File path, bytes or file-like object of the template PowerPoint. A file path keeps the
+    template on disk
+    @input context: A dictionary containing all of the data that is fed into the template
+    @input output: File path or file-like object the rendered PowerPoint is written to. When None the
+    rendered PowerPoint is returned as bytes
+    @input special_character: Special character which is wrapped around key words
+    @input options: TemplatePptxOptions of the render. When max_table_rows is set or the template repeats slides
+    the whole deck is rendered at once with a warning, as tables continuing on new slides and repeated slides
+    add slides to the deck
+
+    @output output: The output that was written to or the bytes of the rendered PowerPoint
+    """
+    options = options if options is not None else TemplatePptxOptions()
+    start_position = output_position(output)
+    if options.max_table_rows is not None:
+        warnings.warn("Tables continuing on new slides need the whole deck, so max_table_rows renders the whole "
+                      "deck instead of one slide at a time.")
+        return _render_whole(template, context, output, special_character, options, start_position)
+    stats = RenderStats() if options.stats_callback is not None else None
+    # One engine for every slide so lazy values are still resolved once per render
+    engine = PlaceholderEngine(context, special_character, stats)
+
+    package = _SourcePackage(template)
+    try:
+        slide_partnames = package.slide_partnames()
+        # Checked before anything is written as the copies of a repeated slide need the whole deck
+        for partname in slide_partnames:
+            if slide_repeat_name(etree.fromstring(package.read(partname)), special_character) is not None:
+                warnings.warn("Repeated slides need the whole deck, so the whole deck is rendered instead of one "
+                              "slide at a time.")
+                return _render_whole(template, context, output, special_character, options, start_position)
+        slide_count = len(slide_partnames)
+        try:
+            result = _write_slides(package, context, output, special_character, options, stats, engine, slide_count)
+        except FullRenderRequired as e:
+            if start_position is None and not (output is None or is_path(output)):
+                raise
+            warnings.warn(f"The slides cannot be written one at a time, the whole deck is rendered instead. {e}")
+            return _render_whole(template, context, output, special_character, options, start_position)
+    finally:
+        package.close()
+
+    if stats is not None:
+        count_bytes_written(stats, output, result, start_position)
+        options.stats_callback(stats)
+    return result
+
+
+def _write_slides(package: _SourcePackage, context: dict, output: PptxOutput, special_character: str,
+                  options: TemplatePptxOptions, stats: Union[RenderStats, None], engine: PlaceholderEngine,
+                  slide_count: int) -> Union[str, os.PathLike, IO[bytes], bytes]:
+    renderer_class = XmlSlideRenderer if options.xml_engine else SlideRenderer
+    with SpliceWriter(package, output) as writer:
+        for slide_index in range(slide_count):
+            with time_stage(stats, LOAD):
+                # Media is left out of the copy and copied from the template at close
+                ppt: PowerPoint = open_presentation(_trim(package, [slide_index], stub_binary_parts=True))
+            slide = ppt.slides[0]
+            # A renderer per slide as the image parts of a renderer belong to the presentation of its slide
+            renderer = renderer_class(context, special_character, options, stats, engine)
+            with time_slide(stats, slide_index + 1):
+                renderer.process_slide(slide, slide_index + 1)
+            with time_stage(stats, SAVE):
+                writer.add(_collect(package, ppt, [slide_index], slide_count, slide_links=True, stubbed=True))
+            # Released before the next slide is loaded. The parts of a presentation refer to each other so
+            # they are only freed by the cycle collector
+            del ppt, slide, renderer
+            gc.collect()
+        with time_stage(stats, SAVE):
+            return writer.close()
+
+
+def _render_whole(template: PptxSource, context: dict, output: PptxOutput, special_character: str,
+                  options: TemplatePptxOptions, start_position: Union[int, None]) -> Union[str, os.PathLike, IO[bytes], bytes]:
+
+    """
+    Description: Render the whole template at once when the slides cannot be written one at a time. A
+    file-like output is first rewound to where the render started writing.
+    """
+    if start_position is not None:
+        output.seek(start_position)
+        output.truncate()
+    stats = RenderStats() if options.stats_callback is not None else None
+    with time_stage(stats, LOAD):
+        ppt: PowerPoint = open_presentation(template)
+    renderer_class = XmlSlideRenderer if options.xml_engine else SlideRenderer
+    renderer = renderer_class(context, special_character, options, stats)
+    slides = iter_slides(list(ppt.slides), renderer.engine, special_character, options)
+    for slide_number, (slide, engine) in enumerate(slides, start=1):
+        with time_slide(stats, slide_number), renderer.using_engine(engine):
+            renderer.process_slide(slide, slide_number)
+    result = save_presentation_with_stats(ppt, output, stats)
+    if stats is not None:
+        options.stats_callback(stats)
+    return result
@@ -5,8 +5,16 @@ import warnings
 from text_processor import TextProcessor
 from  pptx.shapes.autoshape import Shape
 from typing import Collection
-from typing import Union
+from typing import Iterable, Iterator, List, Mapping, Sequence, Sized, Union
+from itertools import chain, islice
+from pptx.oxml.ns import qn
+from pptx.slide import Slide
+from slide_cloner import clone_slide
+from pptx.oxml.table import CT_TableRow
+from pptx.oxml.text import CT_TextParagraph
 from template_pptx_options import TemplatePptxOptions
+from placeholder_engine import PlaceholderEngine
+from shape_walker import TABLE, iter_shape_contents
 
 class TableFailedToPopulate(Exception):
     """Raised when a table fails to populate due to a data or logic issue."""
@@ -14,11 +22,128 @@ class TableFailedToPopulate(Exception):
         super().__init__(message)
         self.__cause__ = cause 
 
+# Relationship records can be a list of dictionaries, any iterable or generator of mappings, or a
+# columnar mapping of field names to sequences of equal length.
+RelationshipRecords = Union[Iterable[Mapping], Mapping[str, Sequence]]
+
+# Number of rows built before they are appended to the table together
+ROW_BATCH_SIZE = 256
+
+
+def iter_relationship_records(records: RelationshipRecords) -> Iterator[Mapping]:
+
+    """
+    Description: Iterate over the records of a relationship one at a time without materialising them
+
+    @input records: A list of dictionaries, an iterable or generator of mappings, or a columnar mapping of
+    field names to sequences of equal length ex. ({"id": [1, 2], "name": ["Bob", "Alice"]})
+
+    @output records: An iterator of mappings, one per row of the table
+    """
+    if isinstance(records, Mapping):
+        fields = list(records.keys())
+        columns = [records[field] for field in fields]
+        lengths = {len(column) for column in columns if isinstance(column, Sized)}
+        if len(lengths) > 1:
+            raise ValueError(f"The columns of a columnar relationship must all have the same length. Lengths: {sorted(lengths)}")
+        for values in zip(*columns):
+            yield dict(zip(fields, values))
+    else:
+        yield from records
+
+
+class RowBuilder:
+
+    """
+    Description: Builds the table rows of a relationship from the template row. The template row is analysed
+    once: the field shown in every column is found and the first paragraph of every cell is reduced to one run
+    that keeps the formatting of the template text. Each record then only needs a copy of that prebuilt row
+    with the text of its runs set.
+
+    @input template_row: The a:tr element of the template row containing the magic words of the relationship
+    @input special_character: Special character which is wrapped around key words
+    @input engine: Engine used to fill magic words in cells which do not show a field of the relationship
+    """
+
+    _CONTENT_TAGS = (qn("a:r"), qn("a:br"), qn("a:fld"))
+
+    def __init__(self, template_row: CT_TableRow, special_character: str, engine: PlaceholderEngine):
+        self._prototype = deepcopy(template_row)
+        # Field shown by each column or None when the cell is not bound to the relationship
+        self._fields: List[Union[str, None]] = []
+        for tc in self._prototype.tc_lst:
+            cell_text = _Cell(tc, None).text
+            cell_keys = cell_text.replace(special_character, "").split(".")
+            if len(cell_keys) < 2:
+                for t in tc.iter(qn("a:t")):
+                    t.text = engine.substitute(t.text or "")
+                self._fields.append(None)
+                continue
+            self._fields.append(cell_keys[1].strip("\n"))
+            self._reduce_to_single_run(tc.get_or_add_txBody().p_lst[0])
+
+    def _reduce_to_single_run(self, p: CT_TextParagraph) -> None:
+        # Try to preserve formatting if a run exists
+        first_r = p.find(qn("a:r"))
+        rPr = deepcopy(first_r.rPr) if first_r is not None and first_r.rPr is not None else None
+        for child in [child for child in p if child.tag in self._CONTENT_TAGS]:
+            p.remove(child)
+        r = p.add_r()
+        if rPr is not None:
+            r.insert(0, rPr)
+
+    def build(self, record: Mapping) -> CT_TableRow:
+
+        """
+        Description: Build the row of a single record
+
+        @input record: A single record of the relationship. AKA: A single dictionary from the list of dictionaries
+
+        @output row: The a:tr element of the new row
+        """
+        new_row = deepcopy(self._prototype)
+        for tc, field in zip(new_row.tc_lst, self._fields):
+            if field is None:
+                continue
+            value = record[field]
+            tc.txBody.p_lst[0].r_lst[0].text = value if isinstance(value, str) else str(value)
+        return new_row
+
+
+def process_overflow(processors: List["TableProcessor"], slide: Slide, options: TemplatePptxOptions) -> None:
+
+    """
+    Description: Continue the tables of a slide whose relationships have more records than the options allow
+    on one slide. The slide is cloned after every page of rows and every one of the tables gets its next page
+    of records on the copy, so tables overflowing on the same slide share one run of copies. A table whose
+    records all were shown keeps only its header rows on the copies. Call this once every shape of the slide
+    has been processed so the copies are complete.
+
+    @input processors: The TableProcessor of every table of the slide with records left over
+    @input slide: The slide holding the tables
+    @input options: The options of the render
+    """
+    previous = slide
+    try:
+        while any(processor.has_overflow for processor in processors):
+            new_slide = clone_slide(slide, after=previous)
+            for processor in processors:
+                processor._continue_table(new_slide, options)
+            previous = new_slide
+    except Exception as e:
+        if options.strict_mode:
+            raise TableFailedToPopulate("Failed while continuing table on a new slide.", cause=e) from e
+        warnings.warn(f"Table failed to continue on a new slide due to {e}")
+
 
 class TableProcessor(ParentProcessor):
 
-    def __init__(self, shape: Shape, context: dict, slide_number: int, special_character: str):
-        super().__init__(shape, context, slide_number, special_character)
+    def __init__(self, shape: Shape, context: dict, slide_number: int, special_character: str,
+                 engine: PlaceholderEngine = None):
+        super().__init__(shape, context, slide_number, special_character, engine)
+        self._max_rows = None
+        # Builder, next record, remaining records and header row count of a table that continues on new slides
+        self._overflow = None
 
     
     def _remove_row(self, table: Table, row_num: int) -> None:
@@ -32,69 +157,69 @@ class TableProcessor(ParentProcessor):
         """
         table._tbl.remove(table._tbl.tr_lst[row_num])
 
-    def _add_row(self, table: Table, relationship_class: str, record_count: int) -> None:
+    def _add_rows(self, table: Table, records: Iterator[Mapping]) -> None:
 
         """
-        Description: Add a row to a PPTX table using a relationship specified in the contect dictionary through dot notation ex. (relaltionship_name.field_value)
+        Description: Add a row to a PPTX table for every record of a relationship specified in the context dictionary
+        through dot notation ex. (relaltionship_name.field_value). The template row is analysed once and the
+        records are consumed lazily, rows are appended to the table in batches as they arrive. When the options
+        limit the rows of a table, the records that do not fit are kept to continue the table on new slides.
 
         @input table: A table from a PPTX
-        @input context: A dictionary containing all of the data that is fed into the template. It contains the data 
-        and the magic keywords.
-        @input relationship_class: The name of the relationship class
-        @input record_count: An integer specifying which item in the related records context relationship value 
-        should be inserted into the cells. AKA: This selects a single dictionary from the list of dictionaries.
+        @input records: An iterator over the records of the relationship
+        """
+        builder = RowBuilder(table._tbl.tr_lst[1], self._special_character, self.engine)
+        # Rows kept when the table continues on a new slide. The template row is removed once rows are added.
+        static_row_count = len(table._tbl.tr_lst) - 1
+        self._append_rows(table, builder, records, self._max_rows)
+
+        if self._max_rows is not None:
+            next_record = next(records, None)
+            if next_record is not None:
+                self._overflow = (builder, next_record, records, static_row_count)
+
+    def _append_rows(self, table: Table, builder: "RowBuilder", records: Iterator[Mapping], limit: Union[int, None]) -> int:
+        if limit is not None:
+            records = islice(records, limit)
+        added = 0
+        new_rows = []
+        for record in records:
+            new_rows.append(builder.build(record))
+            if len(new_rows) == ROW_BATCH_SIZE:
+                table._tbl.extend(new_rows) #Append to existing table
+                added += len(new_rows)
+                new_rows = []
+        table._tbl.extend(new_rows)
+        added += len(new_rows)
+        if self.engine.stats is not None:
+            self.engine.stats.rows_added += added
+        return added
+
+    @property
+    def has_overflow(self) -> bool:
+        return self._overflow is not None and self._overflow[1] is not None
+
+    def _continue_table(self, slide: Slide, options: TemplatePptxOptions) -> None:
 
         """
-        
-        # duplicating last row of the table as a new row to be added
-        new_row = deepcopy(table._tbl.tr_lst[1])
-        # Loop through cells in new row
-        for tc in new_row.tc_lst:
-            # Get cell
-            cell = _Cell(tc, new_row.tc_lst)
-
-            # Get cell text
-            cell_text = cell.text
-            # Process and get rel name and field in rel
-            cell_value = cell_text.replace(self._special_character, "")
-            cell_keys = cell_value.split(".")
-            
-            cell_field = cell_keys[1] # Get relationship name
-            cell_field = cell_field.strip('\n') # Strip out newlines if needed
-
-            # Replace the placeholder formatting text with text from context
-            cell_text = cell_text.replace(cell_text, self._context[relationship_class][record_count][cell_field])
-
-            # Access the first paragraph
-            p = cell.text_frame.paragraphs[0]
-
-                # Try to preserve formatting if a run exists
-            if p.runs:
-                original_run = p.runs[0]
-                original_font = original_run.font
-            else:
-                original_font = None
-
-            p.clear()
-            # cell.text = cell_text        
-
-            run = p.add_run()
-            run.text = cell_text
-
-            if original_font:
-                run.font.name = original_font.name
-                run.font.size = original_font.size
-                run.font.bold = original_font.bold
-                run.font.italic = original_font.italic
-                if original_font.color and hasattr(original_font.color, 'rgb'):
-                    run.font.color.rgb = original_font.color.rgb
-                elif original_font.color and hasattr(original_font.color, 'theme_color'):
-                    run.font.color.theme_color = original_font.color.theme_color
-
-                    
-
-        table._tbl.append(new_row) #Append to existing table
-        
+        Description: Fill the table on a copy of its slide with the next page of records. The table keeps its
+        header rows and is left without records when every record of the relationship was already shown.
+
+        @input slide: The copy of the slide holding the table
+        @input options: The options of the render
+        """
+        builder, next_record, records, static_row_count = self._overflow
+        # The table may be inside of a group shape
+        table = next(content.shape for content in iter_shape_contents(slide.shapes)
+                     if content.kind == TABLE and content.element.shape_id == self._shape.shape_id).table
+        for tr in table._tbl.tr_lst[static_row_count:]:
+            table._tbl.remove(tr)
+        if next_record is not None:
+            page = chain([next_record], islice(records, options.max_table_rows - 1))
+            self._append_rows(table, builder, page, None)
+            next_record = next(records, None)
+        self._overflow = (builder, next_record, records, static_row_count)
+
     def process_table(self, options: TemplatePptxOptions):
 
         '''
@@ -106,29 +231,34 @@ class TableProcessor(ParentProcessor):
         @input slide_number: The slide number index
         '''
 
+        self._max_rows = options.max_table_rows
         try:
-            table_cells = self._shape.table.iter_cells()
+            table_cells = self._table_cells()
             self._process_table_cells(table_cells)
         except Exception as e:
             if options.strict_mode:
                 raise TableFailedToPopulate("Failed while processing table.", cause=e) from e
             warnings.warn(f"Table failed to be populated due to {e}")
 
-    def _process_relationship(self, relationship_class: str, rel_class_key: str) -> Union[int, None]:
+    def _table_cells(self) -> Iterator[_Cell]:
+        return self._shape.table.iter_cells()
+
+    def _process_relationship(self, relationship_class: str, rel_class_key: RelationshipRecords) -> Union[int, None]:
         """
         Description: Process a relationship in a table and replace text with context values 
         
         @input relationship_class: The name of the relationship class
-        @input rel_class_key: The key for the relationship class in the context dictionary
+        @input rel_class_key: The records of the relationship class in the context dictionary
         """
-        if rel_class_key: 
-            for row in range(len(self._context[relationship_class])):
-                self._add_row(self._shape.table, relationship_class, row)
-            self._remove_row(self._shape.table, 1)
-            return -1
-        else:
+        records = iter_relationship_records(rel_class_key) if rel_class_key is not None else iter(())
+        # The first record is read ahead so a list, a generator and columns without records are all found empty
+        first_record = next(records, None)
+        if first_record is None:
             warnings.warn(f"Relationship link for {relationship_class} does not exist.")
             raise KeyError(relationship_class)
+        self._add_rows(self._shape.table, chain([first_record], records))
+        self._remove_row(self._shape.table, 1)
+        return -1
 
     def _process_cell(self, cell: _Cell) -> Union[int, None]:
         """
@@ -139,11 +269,12 @@ class TableProcessor(ParentProcessor):
         if (cell.text.find("relationship")) != -1:
             cleaned_cell = (cell.text).replace(self._special_character, "")
             relationship_class = (cleaned_cell).split(".")[0]
-            rel_class_key = self._context.get(relationship_class)
+            rel_class_key = self.engine.get(relationship_class)
             if self._process_relationship(relationship_class, rel_class_key) == -1:
                 return -1
+        text_processor = TextProcessor(self._shape, self._context, self._slide_number, self._special_character, self.engine)
         for p in cell.text_frame.paragraphs:
-            TextProcessor(self._shape, self._context, self._slide_number, self._special_character)._replace_runs(p)
+            text_processor._replace_runs(p)
 
     def _process_table_cells(self, table_cells: Collection[_Cell]) -> None:
         '''
@@ -0,0 +1,166 @@
+from collections.abc import Mapping, Sized
+from typing import Dict, Iterable, List, NamedTuple, Set, Tuple, Union
+
+from compiled_template import PlaceholderSite
+from shape_walker import TEXT, TABLE, PICTURE
+from slide_repeater import REPEAT_PREFIX
+
+
+class RelationshipTable(NamedTuple):
+    """A table filled with the records of a relationship."""
+    name: str                       # Context key of the relationship records
+    fields: Tuple[str, ...]         # Fields of the records shown in the table
+    slide_numbers: Tuple[int, ...]  # Slides holding a table of the relationship, starting at 1
+
+
+class RepeatedSlide(NamedTuple):
+    """A slide repeated once per record of a list."""
+    name: str                       # Context key of the records
+    fields: Tuple[str, ...]         # Fields of the records shown on the slide
+    slide_numbers: Tuple[int, ...]  # Template slides repeated for the list, starting at 1
+
+
+class ContextIssue(NamedTuple):
+    """A key the template needs that a context does not provide."""
+    kind: str                       # TEXT, TABLE or PICTURE
+    key: str                        # The missing context key
+    slide_numbers: Tuple[int, ...]  # Slides needing the key, starting at 1
+    message: str
+
+
+class TemplateAnalysis:
+
+    """
+    Description: What a template needs from a context: the keys of its magic words, its relationship tables
+    and repeated slides with their fields and the alt text keys of its pictures, each with the slides they are
+    on. Built from the recorded locations of a template without rendering it.
+
+    @input sites: The PlaceholderSite of every location of the template ex. (CompiledTemplate.sites)
+    """
+
+    def __init__(self, sites: Iterable[PlaceholderSite]):
+        placeholders: Dict[str, List[int]] = {}
+        relationship_fields: Dict[str, List[str]] = {}
+        relationship_slides: Dict[str, List[int]] = {}
+        repeat_fields: Dict[str, List[str]] = {}
+        repeat_slides: Dict[str, List[int]] = {}
+        pictures: Dict[str, List[int]] = {}
+        for site in sites:
+            slide_number = site.slide_index + 1
+            for key in site.keys:
+                if site.kind == PICTURE:
+                    _add(pictures, key, slide_number)
+                elif key.startswith(REPEAT_PREFIX) and "." in key:
+                    name, field = key.split(".")[:2]
+                    _add(repeat_fields, name, field)
+                    _add(repeat_slides, name, slide_number)
+                elif site.kind == TABLE and "relationship" in key and "." in key:
+                    name, field = key.split(".")[:2]
+                    fields = relationship_fields.setdefault(name, [])
+                    if field not in fields:
+                        fields.append(field)
+                    _add(relationship_slides, name, slide_number)
+                else:
+                    _add(placeholders, key, slide_number)
+
+        self._placeholders = {key: tuple(slides) for key, slides in placeholders.items()}
+        self._relationships = {name: RelationshipTable(name, tuple(fields), tuple(relationship_slides[name]))
+                               for name, fields in relationship_fields.items()}
+        self._repeats = {name: RepeatedSlide(name, tuple(fields), tuple(repeat_slides[name]))
+                         for name, fields in repeat_fields.items()}
+        self._pictures = {key: tuple(slides) for key, slides in pictures.items()}
+
+    @property
+    def placeholders(self) -> Dict[str, Tuple[int, ...]]:
+        '''
+        Description: The key of every magic word of the template with the slide numbers it is on
+        '''
+        return dict(self._placeholders)
+
+    @property
+    def relationships(self) -> Dict[str, RelationshipTable]:
+        '''
+        Description: Every relationship table of the template by the name of its relationship
+        '''
+        return dict(self._relationships)
+
+    @property
+    def repeats(self) -> Dict[str, RepeatedSlide]:
+        '''
+        Description: Every repeated slide of the template by the name of the list it is repeated for
+        '''
+        return dict(self._repeats)
+
+    @property
+    def pictures(self) -> Dict[str, Tuple[int, ...]]:
+        '''
+        Description: The alt text key of every picture of the template with the slide numbers it is on
+        '''
+        return dict(self._pictures)
+
+    @property
+    def required_keys(self) -> Set[str]:
+        '''
+        Description: Every context key the template references
+        '''
+        return set(self._placeholders) | set(self._relationships) | set(self._repeats) | set(self._pictures)
+
+    def validate(self, context: dict) -> List[ContextIssue]:
+
+        """
+        Description: Check that a context has every key the template needs without rendering. Only the keys of
+        the context are looked at, plus the fields of the first record of a relationship list or the columns of
+        a columnar relationship or repeated list. Lazy values are not resolved and generators are not consumed.
+
+        @input context: A dictionary containing all of the data that is fed into the template
+
+        @output issues: A ContextIssue for every missing key, relationship field or repeated list field. Empty when
+        the context is valid
+        """
+        keys = {str(key): key for key in context}
+        issues = []
+        for key, slide_numbers in self._placeholders.items():
+            if key not in keys:
+                issues.append(ContextIssue(TEXT, key, slide_numbers, f"Magic word {key} is not in the context."))
+        for name, table in self._relationships.items():
+            records = context[keys[name]] if name in keys else None
+            if records is None or (isinstance(records, Sized) and len(records) == 0):
+                issues.append(ContextIssue(TABLE, name, table.slide_numbers,
+                                           f"Relationship link for {name} does not exist."))
+                continue
+            fields = _record_fields(records)
+            for field in table.fields:
+                if fields is not None and field not in fields:
+                    issues.append(ContextIssue(TABLE, f"{name}.{field}", table.slide_numbers,
+                                               f"Relationship {name} has no field {field}."))
+        for name, repeat in self._repeats.items():
+            records = context[keys[name]] if name in keys else None
+            # An empty list is valid and removes the slide
+            if records is None:
+                issues.append(ContextIssue(TEXT, name, repeat.slide_numbers, f"Repeat link for {name} does not exist."))
+                continue
+            fields = _record_fields(records)
+            for field in repeat.fields:
+                if fields is not None and field not in fields:
+                    issues.append(ContextIssue(TEXT, f"{name}.{field}", repeat.slide_numbers,
+                                               f"Repeated list {name} has no field {field}."))
+        for key, slide_numbers in self._pictures.items():
+            if key not in keys:
+                issues.append(ContextIssue(PICTURE, key, slide_numbers,
+                                           f"No image is associated with the alt text {key}."))
+        return issues
+
+
+def _add(keys: Dict[str, List[int]], key: str, slide_number: int) -> None:
+    slides = keys.setdefault(key, [])
+    if slide_number not in slides:
+        slides.append(slide_number)
+
+
+def _record_fields(records) -> Union[Set[str], None]:
+    """The fields of a relationship, or None when they cannot be known without resolving or consuming it"""
+    if isinstance(records, Mapping):
+        return set(records)
+    if isinstance(records, (list, tuple)) and records and isinstance(records[0], Mapping):
+        return set(records[0])
+    return None
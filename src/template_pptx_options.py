@@ -1,3 +1,5 @@
+from typing import Callable, Union
+
 
 class TemplatePptxOptions:
     '''
@@ -6,6 +8,13 @@ class TemplatePptxOptions:
 
     def __init__(self):
         self._strict = False
+        self._max_table_rows = None
+        self._image_dpi = None
+        self._image_quality = 85
+        self._stats_callback = None
+        self._slide_workers = 1
+        self._xml_engine = False
+        self._low_memory = False
 
     @property
     def strict_mode(self) -> bool:
@@ -25,4 +34,149 @@ class TemplatePptxOptions:
 
         @input strict_enable: A boolean indicating if strict mode is enabled or not
         '''
-        self._strict = strict_enabled
\ No newline at end of file
+        self._strict = strict_enabled
+
+    @property
+    def max_table_rows(self) -> Union[int, None]:
+        '''
+        Description: Return the maximum number of relationship rows a table holds on one slide. When a
+        relationship has more records, the slide is cloned and the table continues on the new slides with
+        its header rows repeated. None means a table is never split.
+        '''
+        return self._max_table_rows
+
+    @max_table_rows.setter
+    def max_table_rows(self, max_rows: Union[int, None]) -> None:
+        '''
+        Description: Set the maximum number of relationship rows a table holds on one slide.
+
+        @input max_rows: A positive integer or None to never split a table
+        '''
+        if max_rows is not None and (not isinstance(max_rows, int) or max_rows < 1):
+            raise ValueError(f"max_table_rows must be a positive integer or None. Value: {max_rows}")
+        self._max_table_rows = max_rows
+
+    @property
+    def image_dpi(self) -> Union[int, None]:
+        '''
+        Description: Return the resolution pictures are downscaled to, in dots per inch of the template picture
+        they replace. Larger images are resized with Pillow to the size of the template picture at this
+        resolution before they are added. None keeps images at their full resolution.
+        '''
+        return self._image_dpi
+
+    @image_dpi.setter
+    def image_dpi(self, dpi: Union[int, None]) -> None:
+        '''
+        Description: Set the resolution pictures are downscaled to.
+
+        @input dpi: A positive number of dots per inch or None to keep images at their full resolution
+        '''
+        if dpi is not None and (not isinstance(dpi, (int, float)) or dpi <= 0):
+            raise ValueError(f"image_dpi must be a positive number or None. Value: {dpi}")
+        self._image_dpi = dpi
+
+    @property
+    def image_quality(self) -> int:
+        '''
+        Description: Return the JPEG quality, from 1 to 95, used when a downscaled JPEG image is encoded again.
+        '''
+        return self._image_quality
+
+    @image_quality.setter
+    def image_quality(self, quality: int) -> None:
+        '''
+        Description: Set the JPEG quality used when a downscaled JPEG image is encoded again.
+
+        @input quality: An integer from 1 to 95
+        '''
+        if not isinstance(quality, int) or not 1 <= quality <= 95:
+            raise ValueError(f"image_quality must be an integer from 1 to 95. Value: {quality}")
+        self._image_quality = quality
+
+    @property
+    def stats_callback(self) -> Union[Callable, None]:
+        '''
+        Description: Return the function called with the RenderStats of every render once the PowerPoint is saved.
+        The stats hold the wall time of every stage and slide and counters of the work done. None collects no
+        stats and adds no work to a render.
+        '''
+        return self._stats_callback
+
+    @stats_callback.setter
+    def stats_callback(self, callback: Union[Callable, None]) -> None:
+        '''
+        Description: Set the function called with the RenderStats of every render. With render_many the function
+        runs in the calling process as each render completes, so it can be a lambda or update local state.
+
+        @input callback: A function taking a RenderStats or None to collect no stats
+        '''
+        if callback is not None and not callable(callback):
+            raise ValueError(f"stats_callback must be callable or None. Value: {callback}")
+        self._stats_callback = callback
+
+    @property
+    def slide_workers(self) -> int:
+        '''
+        Description: Return the number of worker processes the slides of a single render are spread over. Each
+        worker renders a share of the slides and the rendered slides are put back together into one PowerPoint.
+        1 renders every slide in the current process.
+        '''
+        return self._slide_workers
+
+    @slide_workers.setter
+    def slide_workers(self, workers: int) -> None:
+        '''
+        Description: Set the number of worker processes the slides of a single render are spread over. With more
+        than 1 worker the values of the context must be picklable, lambdas are not. Tables that continue on new
+        slides (max_table_rows) always render in the current process.
+
+        @input workers: A positive integer
+        '''
+        if not isinstance(workers, int) or workers < 1:
+            raise ValueError(f"slide_workers must be a positive integer. Value: {workers}")
+        self._slide_workers = workers
+
+    @property
+    def xml_engine(self) -> bool:
+        '''
+        Description: Return whether TemplatePptx renders with the xml engine. The xml engine walks the xml of
+        every slide and replaces text straight in its runs instead of going through the python-pptx shape,
+        paragraph, run and font objects. The output is the same as the default engine.
+        '''
+        return self._xml_engine
+
+    @xml_engine.setter
+    def xml_engine(self, enabled: bool) -> None:
+        '''
+        Description: Set whether TemplatePptx renders with the xml engine. A CompiledTemplate visits the
+        recorded locations only and does not use it.
+
+        @input enabled: A boolean indicating if the xml engine is used
+        '''
+        if not isinstance(enabled, bool):
+            raise ValueError(f"xml_engine must be a boolean. Value: {enabled}")
+        self._xml_engine = enabled
+
+    @property
+    def low_memory(self) -> bool:
+        '''
+        Description: Return whether TemplatePptx renders one slide at a time. The template is never loaded whole:
+        each slide is loaded with only the parts it relates to, rendered and written to the output before the
+        next one, and the parts no slide replaced, like the media of the deck, are copied to the output in
+        chunks. Peak memory then depends on the largest slide instead of the whole deck.
+        '''
+        return self._low_memory
+
+    @low_memory.setter
+    def low_memory(self, enabled: bool) -> None:
+        '''
+        Description: Set whether TemplatePptx renders one slide at a time. Tables continuing on new slides and
+        repeated slides need the whole deck, so with max_table_rows set or a template repeating slides the whole
+        deck is rendered instead with a warning.
+
+        @input enabled: A boolean indicating if slides are rendered one at a time
+        '''
+        if not isinstance(enabled, bool):
+            raise ValueError(f"low_memory must be a boolean. Value: {enabled}")
+        self._low_memory = enabled
@@ -1,27 +1,46 @@
+import asyncio
 import warnings
 from pptx import Presentation
 from pptx.presentation import Presentation as PowerPoint
 from  pptx.shapes.autoshape import Shape
 from pptx.slide import Slide
 from pptx.util import Inches
+from pptx.oxml import parse_xml
+from pptx.parts.image import Image
 import os
 import glob
-import copy
-import tempfile
+from concurrent.futures import Executor
+from time import perf_counter
+from typing import List, Union
 
 from text_processor import TextProcessor
 from table_processor import TableProcessor
 from picture_processor import PictureProcessor
 from template_pptx_options import TemplatePptxOptions
-
-class SlideMasterIndexError(Exception):
-    """A valid slide master does not seem to exist"""
-    pass
+from slide_renderer import SlideRenderer
+from xml_renderer import XmlSlideRenderer
+from pptx_io import PptxSource, PptxOutput, is_path, check_output_path, open_presentation
+from compiled_template import CompiledTemplate, find_sites
+from template_analysis import TemplateAnalysis, RelationshipTable, RepeatedSlide, ContextIssue
+from image_cache import ImageCache, ImagePartRegistry, default_image_cache
+from batch_renderer import render_many, iter_render_many, RenderResult
+from package_merger import PackageMerger, SlideMasterIndexError
+from deck_reader import PictureRecord, iter_read_decks, read_bytes, read_deck, read_deck_elements
+from async_render import render_async, render_many_async, iter_render_many_async, compile_async
+from render_stats import RenderStats, LOAD, time_slide, save_presentation_with_stats
+from streaming_render import render_streaming
+from slide_repeater import iter_slides, SlideFailedToRepeat
 
 class TemplatePptx:
  
-    def __init__(self, ppt: str, context: dict, output_path: str, special_character: str="$"):
-        self._ppt: PowerPoint = Presentation(ppt)
+    def __init__(self, ppt: PptxSource, context: dict, output_path: PptxOutput = None, special_character: str="$"):
+        if isinstance(ppt, (bytes, bytearray)):
+            ppt = bytes(ppt)
+        self._template = ppt
+        # Loaded the first time it is needed, a low memory render never loads the whole template
+        self._presentation: Union[PowerPoint, None] = None
+        # Kept for the load stage of RenderStats
+        self._load_seconds = 0.0
         self._context = context
         self._output_path = output_path
         self._validation()
@@ -32,6 +51,23 @@ class TemplatePptx:
     def options(self) -> TemplatePptxOptions:
         return self._options
 
+    @property
+    def _ppt(self) -> PowerPoint:
+        return self._load()
+
+    def _load(self) -> PowerPoint:
+        if self._presentation is None:
+            start = perf_counter()
+            self._presentation = open_presentation(self._template)
+            self._load_seconds = perf_counter() - start
+        return self._presentation
+
+    def _template_source(self) -> PptxSource:
+        # A file-like template is read again from its start
+        if not is_path(self._template) and not isinstance(self._template, bytes):
+            self._template.seek(0)
+        return self._template
+
     def _validation(self) -> None:
         
         # Warn user if context obj is empty
@@ -42,15 +78,46 @@ class TemplatePptx:
         if not isinstance(self._context, dict):
             raise ValueError(f"Your context is not a valid dictionary. Please check the context.")
 
-        # Check if the output is valid
-        try:
-            with open(self._output_path, 'w') as out_pptx:
-                pass
-        except Exception as e:
-            raise IOError(f"Cannot open a PPTX file at the desired output dir: {e}")
+        # Check if the output is valid. Only a file path needs checking and the file is left untouched.
+        if is_path(self._output_path):
+            check_output_path(self._output_path)
+
+    def _parse(self, stats: RenderStats = None) -> None:
+
+        """
+        Description: Replace the magic words, tables and pictures of every slide of the PowerPoint with values
+        from the context
+
+        @input stats: RenderStats the timings and counters are added to. None collects nothing
+        """
+        renderer_class = XmlSlideRenderer if self._options.xml_engine else SlideRenderer
+        renderer = renderer_class(self._context, self._special_character, self._options, stats)
+        # The slides are listed first as tables that continue on new slides and repeated slides add slides
+        # while parsing
+        slides = iter_slides(list(self._ppt.slides), renderer.engine, self._special_character, self._options)
+        for slide_number, (slide, engine) in enumerate(slides, start=1):
+            slide: Slide
+            # A copy of a repeated slide is filled from the engine of its record
+            with time_slide(stats, slide_number), renderer.using_engine(engine):
+                # Replace template words in every shape of the slide with values from context
+                renderer.process_slide(slide, slide_number)
+
+    def _new_stats(self) -> Union[RenderStats, None]:
+        if self._options.stats_callback is None:
+            return None
+        # The template is loaded first when it was not loaded yet so its load is timed
+        self._load()
+        stats = RenderStats()
+        stats.stage_seconds[LOAD] = self._load_seconds
+        return stats
 
+    def _save(self, output: PptxOutput, stats: Union[RenderStats, None]):
+        result = save_presentation_with_stats(self._ppt, output, stats)
+        if stats is not None:
+            self._options.stats_callback(stats)
+        return result
 
-    def parse_template_pptx(self) -> PowerPoint:
+    def parse_template_pptx(self) -> PptxOutput:
         
         """
         Description: The parent method that parses the powerpoint into a PPTX Presentation and replaces magic words
@@ -59,35 +126,78 @@ class TemplatePptx:
         @input context: A dictionary containing all of the data that is fed into the template. It contains the data 
         and the magic keywords.
 
-        @output ppt: A Python pptx Presentation object which contains all of the new changes
+        @output output_path: The file path or file-like object the new PowerPoint was written to
         """
+        if self._output_path is None:
+            raise ValueError("An output_path is required to parse the template to a file. Use render() to get the bytes.")
+        if self._options.low_memory:
+            return render_streaming(self._template_source(), self._context, self._output_path,
+                                    self._special_character, self._options)
+        if self._options.slide_workers > 1:
+            return self.compile().render(self._context, self._output_path)
+        stats = self._new_stats()
+        self._parse(stats)
+        return self._save(self._output_path, stats)
 
-        # Loop through every shape element in each slide and replace template words with values from context
-        for slide in self._ppt.slides:
-            slide: Slide
-            slide_number: int = (self._ppt.slides.index(slide)) + 1
-            shapes_on_slide: list[Shape]= slide.shapes
-            for shape in shapes_on_slide:
-                shape: Shape
-                # Process all text on the shape
-                TextProcessor(shape, self._context, slide_number, self._special_character).replace_text()               
-                # If shape object has a table associated, process table
-                # NOTE: relationship is a key word and is used to specify table relates                      
-                if shape.has_table:
-                    TableProcessor(shape, self._context, slide_number,
-                                    self._special_character).process_table(self._options)
-                # 13 is the shapetype for an image
-                if shape.shape_type == 13:
-                    PictureProcessor(shape, self._context, slide_number, slide).replace_picture(self._options)
-                # 6 is a group shape
-                if shape.shape_type == 6:
-                    for sub_shape in shape.shapes:
-                        sub_shape: Shape
-                        TextProcessor(sub_shape, self._context, slide_number, self._special_character).replace_text()
-                        if sub_shape.shape_type == 13:
-                            PictureProcessor(shape, self._context, slide_number, slide).replace_picture(self._options)
-        self._ppt.save(self._output_path)
-        return self._output_path
+    def render(self) -> bytes:
+
+        """
+        Description: Parse the template and return the new PowerPoint as bytes without writing to the output path
+
+        @output pptx_bytes: The bytes of the new PowerPoint file
+        """
+        if self._options.low_memory:
+            return render_streaming(self._template_source(), self._context, None, self._special_character,
+                                    self._options)
+        if self._options.slide_workers > 1:
+            return self.compile().render(self._context)
+        stats = self._new_stats()
+        self._parse(stats)
+        return self._save(None, stats)
+
+    async def render_async(self, executor: Executor = None) -> bytes:
+
+        """
+        Description: Same as render but runs in an executor so the event loop is not blocked while the template
+        is parsed, the images are read and the PowerPoint is saved
+
+        @input executor: Executor the work runs in. Defaults to the default executor of the event loop
+
+        @output pptx_bytes: The bytes of the new PowerPoint file
+        """
+        return await asyncio.get_running_loop().run_in_executor(executor, self.render)
+
+    async def parse_template_pptx_async(self, executor: Executor = None) -> PptxOutput:
+
+        """
+        Description: Same as parse_template_pptx but runs in an executor so the event loop is not blocked
+
+        @input executor: Executor the work runs in. Defaults to the default executor of the event loop
+
+        @output output_path: The file path or file-like object the new PowerPoint was written to
+        """
+        return await asyncio.get_running_loop().run_in_executor(executor, self.parse_template_pptx)
+
+    def analyze(self) -> TemplateAnalysis:
+
+        """
+        Description: List what the template needs from a context without rendering or saving it: the keys of its
+        magic words, its relationship tables with their fields and the alt text keys of its pictures, with the
+        slides they are on. Use validate on the result to check a context before rendering it.
+
+        @output analysis: A TemplateAnalysis of the template PowerPoint
+        """
+        return TemplateAnalysis(find_sites(self._ppt, self._special_character))
+
+    def compile(self) -> CompiledTemplate:
+
+        """
+        Description: Parse the template once into a CompiledTemplate which can render many contexts without
+        rediscovering the placeholders. The options and special character of this TemplatePptx are shared with it.
+
+        @output compiled_template: A CompiledTemplate of the template PowerPoint
+        """
+        return CompiledTemplate(self._template_source(), self._special_character, self._options)
 
 
 class BatchTool():
@@ -123,13 +233,35 @@ class BatchTool():
         else:
             return in_string
 
-    def combine_slides(self, sort_numeric: bool = True, specify_master: str = None, master_slide_index: int = -1):
-        """Combine slides, combine slides based on numeric numbering. """
+    def combine_slides(self, sort_numeric: bool = True, specify_master: str = None, master_slide_index: int = -1,
+                       streaming: bool = False, workers: int = 1, pptx_files: List[str] = None):
+        """
+        Description: Combine slides, combine slides based on numeric numbering.
 
-        # Find all slides in the temp output dir
-        pres = glob.glob(os.path.join(self._pptx_dir,"*.pptx"))
-        if sort_numeric is not False:
-            pres.sort(key=self._sort_by_number_file_names)
+        @input sort_numeric: Sort the PowerPoints by their numeric file names
+        @input specify_master: File path to a PowerPoint holding the slide master to use
+        @input master_slide_index: Index of the slide layout used for the combined slides. -1 uses layout 6 or 0
+        @input streaming: Copy the slides part by part from each PowerPoint file straight into the output file
+        instead of building the combined PowerPoint in memory. Memory stays about the same however many
+        PowerPoints are combined and every shape type is kept.
+        @input workers: Number of workers reading the PowerPoints ahead of the one being combined. The slides are
+        still combined in sorted order. Processes read and parse the decks, threads read the files when streaming
+        @input pptx_files: Paths of the PowerPoints to combine, in the order they are combined. Defaults to every
+        PowerPoint of the folder
+        """
+
+        if pptx_files is not None:
+            pres = list(pptx_files)
+        else:
+            # Find all slides in the temp output dir
+            pres = glob.glob(os.path.join(self._pptx_dir,"*.pptx"))
+            if sort_numeric is not False:
+                pres.sort(key=self._sort_by_number_file_names)
+        if streaming:
+            with PackageMerger(self._output_pptx, specify_master, master_slide_index) as merger:
+                for presentation in iter_read_decks(pres, read_bytes, workers, use_threads=True):
+                    merger.add_deck(presentation)
+            return
         if specify_master is not None:
             combined_presentation: PowerPoint = Presentation(specify_master)
         else:
@@ -137,27 +269,20 @@ class BatchTool():
             combined_presentation.slide_width = Inches(13.333)
             combined_presentation.slide_height = Inches(7.5)
         
-        for presentation in pres:
-            pres = Presentation(presentation)
-            for slide in pres.slides:
-                slide: Slide
+        # Image parts of the combined PowerPoint by content, so an image used in many decks is stored once
+        image_parts = ImagePartRegistry(combined_presentation.part.package)
+        # Shapes only go through xml when they are read in worker processes
+        read = read_deck if workers > 1 else read_deck_elements
+        for slides in iter_read_decks(pres, read, workers):
+            for shapes in slides:
                 combined_slide = self._get_slide_from_slide_master(
                     combined_presentation=combined_presentation, chosen_slide_index=master_slide_index)
 
-                for shape in slide.shapes:
-                    if shape.shape_type == 17: # Text
-                        element = copy.deepcopy(shape.element)
-                        combined_slide.shapes._spTree.insert_element_before(element, 'p:extLst')
-                    elif shape.shape_type == 19: # Table
-                        element = copy.deepcopy(shape.element)
-                        combined_slide.shapes._spTree.insert_element_before(element, 'p:extLst')
-                    elif shape.shape_type == 13: # Image
-                        self._replace_picture_pptx(shape, combined_slide)
-                    elif shape.shape_type == 1: #  Autoshape
-                        element = copy.deepcopy(shape.element)
-                        combined_slide.shapes._spTree.insert_element_before(element, 'p:extLst')
+                for shape in shapes:
+                    if isinstance(shape, PictureRecord): # Image
+                        self._replace_picture_pptx(shape, combined_slide, image_parts)
                     else:
-                        element = copy.deepcopy(shape.element)
+                        element = parse_xml(shape) if isinstance(shape, bytes) else shape
                         combined_slide.shapes._spTree.insert_element_before(element, 'p:extLst')
 
         combined_presentation.save(self._output_pptx)
@@ -181,12 +306,13 @@ class BatchTool():
         return combined_slide
 
 
-    def _replace_picture_pptx(self, shape: Shape, slide: Slide):
+    def _replace_picture_pptx(self, shape: PictureRecord, slide: Slide, image_parts: ImagePartRegistry):
 
         """
         Description: The function to replace an image in the PowerPoint Template that does not use context
-        @input shape: A container which has a image attribute associated
+        @input shape: The image bytes, position and size of a picture read from a source PowerPoint
         @input slide: Slide object which will have the picture added to it
+        @input image_parts: Image parts of the combined PowerPoint, an image already stored in it is reused
         """
         # Get info about template picture in order to mimic it
         img_width: float = shape.width
@@ -194,8 +320,5 @@ class BatchTool():
         img_left: float = shape.left
         img_top: float = shape.top
 
-        blob = shape.image._blob
-        with tempfile.TemporaryFile() as image:
-            image.write(blob)
-            slide.shapes.add_picture(image_file=image, left=img_left, top=img_top, width=img_width, height=img_height)
+        image_parts.add_picture(slide.shapes, Image.from_blob(shape.blob), img_left, img_top, img_width, img_height)
         
\ No newline at end of file
@@ -0,0 +1,160 @@
+import argparse
+import csv
+import json
+import os
+import sys
+from time import perf_counter
+from typing import IO, Iterator, List, Union
+
+from batch_renderer import iter_render_many
+from templatepptx import BatchTool
+from template_pptx_options import TemplatePptxOptions
+
+CONTEXT_FORMATS = ("jsonl", "csv")
+
+
+def iter_jsonl_contexts(lines: IO[str]) -> Iterator[Union[dict, ValueError]]:
+
+    """
+    Description: Read contexts from JSON Lines, one JSON object per line. Lines are read one at a time so the
+    file is never loaded whole. Blank lines are skipped. A line which is not a JSON object is yielded as a
+    ValueError naming the line, so render_many reports it as a failed record and the batch keeps going.
+
+    @input lines: A text file or any iterable of lines
+
+    @output contexts: A context dictionary or a ValueError per line
+    """
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            context = json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"Line {line_number} of the contexts is not valid JSON: {e}")
+            continue
+        if not isinstance(context, dict):
+            yield ValueError(f"Line {line_number} of the contexts is not a JSON object.")
+            continue
+        yield context
+
+
+def iter_csv_contexts(lines: IO[str]) -> Iterator[dict]:
+
+    """
+    Description: Read contexts from CSV with a header row, one context per row keyed by the column names.
+    Rows are read one at a time so the file is never loaded whole. Every value is a string.
+
+    @input lines: A text file opened with newline="" or any iterable of lines
+    """
+    yield from csv.DictReader(lines)
+
+
+def iter_contexts(path: str, context_format: str = None) -> Iterator[dict]:
+
+    """
+    Description: Read the contexts of a JSONL or CSV file one at a time. The file stays open until every
+    context is read.
+
+    @input path: Path of the file or "-" for standard input
+    @input context_format: "jsonl" or "csv". Defaults to the extension of the file, and to jsonl for standard input
+    """
+    if context_format is None:
+        context_format = "csv" if os.path.splitext(path)[1].lower() == ".csv" else "jsonl"
+    if context_format not in CONTEXT_FORMATS:
+        raise ValueError(f"The format of the contexts must be one of {CONTEXT_FORMATS}. Value: {context_format}")
+    read = iter_csv_contexts if context_format == "csv" else iter_jsonl_contexts
+    if path == "-":
+        yield from read(sys.stdin)
+        return
+    with open(path, newline="", encoding="utf-8") as lines:
+        yield from read(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="templatepptx",
+        description="Render a template PowerPoint once for every context of a JSONL or CSV file.")
+    parser.add_argument("template", help="Path of the template PowerPoint")
+    parser.add_argument("contexts", help="Path of a JSONL or CSV file with one context per line or row, - for standard input")
+    parser.add_argument("output_pattern",
+                        help="Output path of every PowerPoint, formatted with {index} and the keys of the context ex. (output/{index}.pptx)")
+    parser.add_argument("--format", choices=CONTEXT_FORMATS, dest="context_format",
+                        help="Format of the contexts. Defaults to the extension of the file")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes. Defaults to 1")
+    parser.add_argument("--special-character", default="$", help="Special character wrapped around key words")
+    parser.add_argument("--strict", action="store_true", help="Fail a render on the first warning")
+    parser.add_argument("--max-table-rows", type=int, help="Maximum number of relationship rows of a table on one slide")
+    parser.add_argument("--combine", metavar="PATH",
+                        help="Combine the PowerPoints rendered by this run into one PowerPoint at PATH, in the order of the contexts")
+    parser.add_argument("--progress", type=int, default=100, metavar="N",
+                        help="Print the throughput every N records. 0 prints only the summary")
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+
+    """
+    Description: Entry point of the templatepptx command. Renders every context, prints the throughput while
+    the batch runs and a summary of the failures and timings once it is done.
+
+    @input argv: The command line arguments. Defaults to sys.argv
+
+    @output exit_code: 0 when every render succeeded, 1 when some failed and 2 when the batch could not run
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be a positive integer")
+    output_dir = os.path.dirname(args.output_pattern)
+
+    options = TemplatePptxOptions()
+    try:
+        options.strict_mode = args.strict
+        options.max_table_rows = args.max_table_rows
+    except ValueError as e:
+        parser.error(str(e))
+    if output_dir and "{" not in output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    start = perf_counter()
+    rendered = 0
+    failures = []
+    # The PowerPoints written by this run by record index, so --combine leaves out other files of the folder
+    written = {}
+    try:
+        results = iter_render_many(args.template, iter_contexts(args.contexts, args.context_format),
+                                   args.output_pattern, args.workers, args.special_character, options)
+        for result in results:
+            rendered += 1
+            if not result.ok:
+                failures.append(result)
+                print(f"Record {result.index} failed: {result.error!r}", file=sys.stderr)
+            elif args.combine is not None:
+                written[result.index] = result.output_path
+            if args.progress and rendered % args.progress == 0:
+                print(f"{rendered} records, {len(failures)} failed, {rendered / (perf_counter() - start):.1f} records/sec")
+    except Exception as e:
+        print(f"The batch stopped after {rendered} records: {e}", file=sys.stderr)
+        return 2
+    render_seconds = perf_counter() - start
+
+    combine_seconds = None
+    if args.combine is not None:
+        combine_start = perf_counter()
+        pptx_files = [written[index] for index in sorted(written)]
+        BatchTool(output_dir or ".", args.combine).combine_slides(streaming=True, pptx_files=pptx_files)
+        combine_seconds = perf_counter() - combine_start
+
+    records_per_second = rendered / render_seconds if render_seconds > 0 else 0.0
+    print(f"Rendered {rendered - len(failures)} of {rendered} records in {render_seconds:.2f}s "
+          f"({records_per_second:.1f} records/sec), {len(failures)} failed")
+    if failures:
+        print(f"Failed records: {', '.join(str(index) for index in sorted(result.index for result in failures))}")
+    if combine_seconds is not None:
+        print(f"Combined into {args.combine} in {combine_seconds:.2f}s")
+    print(f"Total {perf_counter() - start:.2f}s")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
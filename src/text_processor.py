@@ -1,11 +1,13 @@
 from parent_processor import ParentProcessor
 from pptx.presentation import Presentation as PowerPoint
 from  pptx.shapes.autoshape import Shape
+from placeholder_engine import PlaceholderEngine
 
 class TextProcessor(ParentProcessor):
 
-    def __init__(self, shape: Shape, context: dict, slide_number: int, special_character: str):
-        super().__init__(shape, context, slide_number, special_character)
+    def __init__(self, shape: Shape, context: dict, slide_number: int, special_character: str,
+                 engine: PlaceholderEngine = None):
+        super().__init__(shape, context, slide_number, special_character, engine)
 
     def replace_text(self):
 
@@ -18,12 +20,9 @@ class TextProcessor(ParentProcessor):
         @input slide_number: The slide number index
         '''
     
-        if self._shape.has_text_frame:
-            for key in self._context:
-                if(self._shape.text.find(str(key)))!=-1:
-                    text_frame = self._shape.text_frame
-                    for p in text_frame.paragraphs:
-                        self._replace_runs(p)
+        if self._shape.has_text_frame and self.engine.has_placeholder(self._shape.text):
+            for p in self._shape.text_frame.paragraphs:
+                self._replace_runs(p)
 
     def _formatting_check(self, run, last_run) -> bool:
 
@@ -65,16 +64,14 @@ class TextProcessor(ParentProcessor):
         and the magic keywords.
         """
 
+        engine = self.engine
         last_run = None
         # Loop through every run in a paragraph obj
         for run in p.runs:
             # Check if the current run and last have the same formatting. If they do, combine the runs
             if self._formatting_check(run, last_run):
                 combined_text = last_run.text + run.text
-                for key in self._context:
-                    to_find = self._add_special(key)
-                    combined_text = combined_text.replace(str(to_find), str(self._context[key]))
-                run.text = combined_text
+                run.text = engine.substitute(combined_text)
                 # Remove the current run after it has been combined with the last run
                 run_to_remove = last_run._r
                 run_to_remove.getparent().remove(run_to_remove)
@@ -82,18 +79,7 @@ class TextProcessor(ParentProcessor):
             else:
                 # Replace values in the run
                 text = run.text
-                for key in self._context:
-                    to_find = self._add_special(str(key))
-                    text = text.replace(str(to_find), str(self._context[key]))
-                run.text = text
+                replaced_text = engine.substitute(text)
+                if replaced_text is not text:
+                    run.text = replaced_text
             last_run = run
-
-    def _add_special(self, key) -> str:
-        
-        """
-        Description: Adds a 'magic' character to either side of the dictionary key being handed to the function
-
-        @input key: A key from the context dictionary that acts as a magic word in the PPTX template
-        @input SPECIAL_CHARACTER: A character that is added to the front and the end of the key
-        """
-        return f"{self._special_character}{key}{self._special_character}"
\ No newline at end of file
@@ -0,0 +1,130 @@
+from typing import Iterator, Tuple, Union
+
+from lxml import etree
+from pptx.oxml.ns import qn
+from pptx.oxml.table import CT_TableCell
+from pptx.oxml.text import CT_TextBody, CT_TextParagraph
+from pptx.slide import Slide
+
+from slide_renderer import SlideRenderer
+from text_processor import TextProcessor
+from table_processor import TableProcessor
+from render_stats import time_stage
+from shape_walker import TEXT, TABLE, PICTURE, ShapeContent, iter_shape_contents
+
+_TX_BODY = qn("p:txBody")
+_R = qn("a:r")
+_RPR = qn("a:rPr")
+_LATIN = qn("a:latin")
+
+# xsd:boolean values of the b and i attributes of a run, python-pptx reads them the same way
+_BOOLEANS = {"1": True, "true": True, "0": False, "false": False}
+_NO_FORMAT = (None, None, None, None, None)
+
+
+def text_of(txBody: Union[CT_TextBody, None]) -> str:
+
+    """
+    Description: The text of a text body the way python-pptx returns it: paragraphs are joined by a line feed
+    and line breaks are a vertical tab
+    """
+    if txBody is None:
+        return ""
+    return "\n".join("".join(child.text for child in p.content_children) for p in txBody.p_lst)
+
+
+def _run_format(r: etree._Element) -> Tuple:
+    rPr = r.find(_RPR)
+    if rPr is None:
+        return _NO_FORMAT
+    latin = rPr.find(_LATIN)
+    return (rPr.get("sz"), _BOOLEANS.get(rPr.get("b")), rPr.get("u"), _BOOLEANS.get(rPr.get("i")),
+            latin.get("typeface") if latin is not None else None)
+
+
+class XmlTextProcessor(TextProcessor):
+
+    """
+    Description: A TextProcessor working on the a:txBody element of a shape instead of the python-pptx
+    shape, paragraph, run and font objects. Runs are merged and replaced exactly like TextProcessor does.
+
+    @input shape: The a:txBody or p:txBody element holding the text
+    """
+
+    def replace_text(self):
+        if self._shape is not None and self.engine.has_placeholder(text_of(self._shape)):
+            for p in self._shape.p_lst:
+                self._replace_runs(p)
+
+    def _replace_runs(self, p: CT_TextParagraph):
+        engine = self.engine
+        last_r = None
+        last_format = None
+        for r in p.findall(_R):
+            run_format = _run_format(r)
+            # Runs with the same size, bold, underline, italic and font are combined like in TextProcessor
+            if last_r is not None and run_format == last_format:
+                r.text = engine.substitute(last_r.text + r.text)
+                p.remove(last_r)
+            else:
+                text = r.text
+                replaced_text = engine.substitute(text)
+                if replaced_text is not text:
+                    r.text = replaced_text
+            last_r = r
+            last_format = run_format
+
+
+class XmlTableProcessor(TableProcessor):
+
+    """
+    Description: A TableProcessor reading the cells of a table from its a:tc elements instead of python-pptx
+    cell objects. Rows of relationships are built by the same RowBuilder.
+    """
+
+    def _table_cells(self) -> Iterator[CT_TableCell]:
+        for tr in self._shape.table._tbl.tr_lst:
+            yield from tr.tc_lst
+
+    def _process_cell(self, cell: CT_TableCell) -> Union[int, None]:
+        cell_text = text_of(cell.txBody)
+        if cell_text.find("relationship") != -1:
+            relationship_class = cell_text.replace(self._special_character, "").split(".")[0]
+            rel_class_key = self.engine.get(relationship_class)
+            if self._process_relationship(relationship_class, rel_class_key) == -1:
+                return -1
+        if cell.txBody is None:
+            return None
+        text_processor = XmlTextProcessor(cell.txBody, self._context, self._slide_number, self._special_character,
+                                          self.engine)
+        for p in cell.txBody.p_lst:
+            text_processor._replace_runs(p)
+
+
+class XmlSlideRenderer(SlideRenderer):
+
+    """
+    Description: A SlideRenderer walking the shape tree of a slide as lxml elements. Text is replaced straight
+    in the a:r elements and python-pptx shape objects are only made for the tables and pictures which need
+    them, so shapes without work cost no more than a look at their tag.
+    """
+
+    def process_slide(self, slide: Slide, slide_number: int) -> None:
+        for content in iter_shape_contents(slide.shapes):
+            self._process_content(content, slide, slide_number)
+        self.finish_slide(slide, slide_number)
+
+    def _process_content(self, content: ShapeContent, slide: Slide, slide_number: int) -> None:
+        if content.kind == TEXT:
+            with time_stage(self._stats, TEXT):
+                XmlTextProcessor(content.element.find(_TX_BODY), self._context, slide_number,
+                                 self._special_character, self._engine).replace_text()
+        elif content.kind == TABLE:
+            processor = XmlTableProcessor(content.shape, self._context, slide_number, self._special_character,
+                                          self._engine)
+            with time_stage(self._stats, TABLE):
+                processor.process_table(self._options)
+            if processor.has_overflow:
+                self._overflowing_tables.append(processor)
+        elif content.kind == PICTURE:
+            self.process_picture(content.shape, slide, slide_number)
@@ -3,6 +3,7 @@ from pptx.util import Inches, Pt
 from pptx.dml.color import RGBColor
 from pptx.enum.text import PP_ALIGN
 from pathlib import Path
+import zipfile
 from PIL import Image, ImageDraw
 
 def _generate_image(path: str, text: str, size=(300, 200), color=(100, 100, 200)):
@@ -99,4 +100,15 @@ def create_table_presentation(output_path="tests/templates/table_test.pptx"):
 
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
     prs.save(output_path)
-    
\ No newline at end of file
+    
+
+def save_with_powerpoint_xml(source_pptx: str, output_pptx: str):
+    # PowerPoint writes the xml declaration with double quotes and a CRLF, python-pptx with single quotes and a LF.
+    # The parts then have other bytes than python-pptx writes when it saves them again
+    with zipfile.ZipFile(source_pptx) as source, zipfile.ZipFile(output_pptx, "w", zipfile.ZIP_DEFLATED) as output:
+        for info in source.infolist():
+            data = source.read(info)
+            if info.filename.endswith((".xml", ".rels")):
+                data = data.replace(b"<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n",
+                                    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\r\n')
+            output.writestr(info.filename, data)
@@ -1,13 +1,27 @@
+import asyncio
+import contextlib
+import io
+import shutil
+import tempfile
 import unittest
+from unittest import mock
+import warnings
+import zipfile
 from pathlib import Path
 from pptx import Presentation
 from pathlib import Path
-from pptx_test_helper import create_text_presentation, create_table_presentation, create_photo_presentation
+from pptx_test_helper import create_text_presentation, create_table_presentation, create_photo_presentation, save_with_powerpoint_xml
 
 import sys
 sys.path.append("src")
-from templatepptx import TemplatePptx
+from templatepptx import TemplatePptx, CompiledTemplate, TemplateAnalysis, BatchTool, render_many, render_async, render_many_async, ImageCache, default_image_cache
+from pptx.util import Inches
 from picture_processor import PictureFailedToBeReplaced, AltTextForImageNotFound
+from placeholder_engine import PlaceholderEngine
+from table_processor import TableFailedToPopulate
+from template_pptx_options import TemplatePptxOptions
+import templatepptx_cli
+import package_merger
 
 # Define template and output folders
 TEMPLATE_DIR = Path("tests/templates")
@@ -142,6 +156,244 @@ class TestTemplatePptx(unittest.TestCase):
         assert "$relationship_people.first_name$" not in text
         assert "$relationship_people.last_name$" not in text
 
+    def test_table_rows_keep_template_formatting(self):
+        template = Presentation(str(TEMPLATE_DIR / "table_test.pptx"))
+        table = [shape for shape in template.slides[0].shapes if shape.has_table][0].table
+        table.cell(1, 1).text_frame.paragraphs[0].runs[0].font.bold = True
+        template.save(str(TEMPLATE_DIR / "table_bold_test.pptx"))
+
+        context = {
+            "relationship_people": [{"id": index, "first_name": f"Name{index}", "last_name": "Last"}
+                                    for index in range(50)]
+        }
+        helper = TemplateTestHelper(
+            template_file="table_bold_test.pptx",
+            output_file="table_bold_output.pptx",
+            context=context
+        )
+        helper.run_template_engine()
+
+        table = [shape for shape in Presentation(str(helper.output_path)).slides[0].shapes if shape.has_table][0].table
+        self.assertEqual(len(table.rows), 51)
+        self.assertEqual(table.cell(50, 0).text, "49")
+        self.assertEqual(table.cell(50, 1).text, "Name49")
+        self.assertTrue(table.cell(50, 1).text_frame.paragraphs[0].runs[0].font.bold)
+
+    def test_table_replacement_from_generator_and_columns(self):
+        def people():
+            for index in range(5):
+                yield {"id": str(index), "first_name": f"First{index}", "last_name": f"Last{index}"}
+
+        columns = {
+            "id": ["0", "1", "2", "3", "4"],
+            "first_name": [f"First{index}" for index in range(5)],
+            "last_name": tuple(f"Last{index}" for index in range(5)),
+        }
+        for name, records in [("generator", people()), ("columns", columns)]:
+            helper = TemplateTestHelper(
+                template_file="table_test.pptx",
+                output_file=f"table_{name}_output.pptx",
+                context={"relationship_people": records}
+            )
+            helper.run_template_engine()
+
+            text = helper.extract_text()
+            for index in range(5):
+                self.assertIn(f"First{index}", text)
+                self.assertIn(f"Last{index}", text)
+            self.assertNotIn("$relationship_people.id$", text)
+
+    def test_table_columns_of_different_lengths(self):
+        helper = TemplateTestHelper(
+            template_file="table_test.pptx",
+            output_file="table_bad_columns_output.pptx",
+            context={"relationship_people": {"id": ["1", "2"], "first_name": ["Bob"], "last_name": ["B", "C"]}}
+        )
+        with self.assertRaises(TableFailedToPopulate):
+            helper.run_template_engine()
+
+    def test_table_without_records_warns_for_every_form(self):
+        empty_forms = {"list": lambda: [], "generator": lambda: (record for record in []),
+                       "columns": lambda: {"id": [], "first_name": [], "last_name": []}}
+        for name, records in empty_forms.items():
+            ppt = TemplatePptx(str(TEMPLATE_DIR / "table_test.pptx"), {"relationship_people": records()})
+            with self.assertWarnsRegex(UserWarning, "Relationship link for relationship_people does not exist"):
+                ppt.render()
+
+            ppt = TemplatePptx(str(TEMPLATE_DIR / "table_test.pptx"), {"relationship_people": records()})
+            ppt.options.strict_mode = True
+            with self.assertRaises(TableFailedToPopulate, msg=name), warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                ppt.render()
+
+    def test_table_overflow_continues_on_new_slides(self):
+        context = {
+            "relationship_people": [{"id": str(index), "first_name": f"First{index}", "last_name": "Last"}
+                                    for index in range(25)]
+        }
+        ppt = TemplatePptx(str(TEMPLATE_DIR / "table_test.pptx"), context, str(OUTPUT_DIR / "table_overflow_output.pptx"))
+        ppt.options.strict_mode = True
+        ppt.options.max_table_rows = 10
+        ppt.parse_template_pptx()
+
+        slides = Presentation(str(OUTPUT_DIR / "table_overflow_output.pptx")).slides
+        self.assertEqual(len(slides), 3)
+        tables = [[shape for shape in slide.shapes if shape.has_table][0].table for slide in slides]
+        self.assertEqual([len(table.rows) for table in tables], [11, 11, 6])
+        for table in tables:
+            self.assertEqual(table.cell(0, 1).text, "First Name")
+        self.assertEqual(tables[1].cell(1, 1).text, "First10")
+        self.assertEqual(tables[2].cell(5, 1).text, "First24")
+
+    def test_two_tables_overflow_on_the_same_slides(self):
+        template = Presentation()
+        slide = template.slides.add_slide(template.slide_layouts[6])
+        for index, name in enumerate(["a", "b"]):
+            table = slide.shapes.add_table(2, 1, Inches(1 + index * 4), Inches(1), Inches(3), Inches(1)).table
+            table.cell(0, 0).text = name.upper()
+            table.cell(1, 0).text = f"$relationship_{name}.name$"
+        template.save(str(TEMPLATE_DIR / "two_tables_overflow_test.pptx"))
+        context = {"relationship_a": [{"name": f"a{index}"} for index in range(5)],
+                   "relationship_b": [{"name": f"b{index}"} for index in range(3)]}
+
+        rendered = []
+        for xml_engine in [False, True]:
+            ppt = TemplatePptx(str(TEMPLATE_DIR / "two_tables_overflow_test.pptx"), context)
+            ppt.options.max_table_rows = 2
+            ppt.options.xml_engine = xml_engine
+            rendered.append(ppt.render())
+        compiled = CompiledTemplate(str(TEMPLATE_DIR / "two_tables_overflow_test.pptx"), options=ppt.options)
+        rendered.append(compiled.render(context))
+
+        for pptx_bytes in rendered:
+            pages = [[[cell.text for cell in shape.table.iter_cells()] for shape in slide.shapes if shape.has_table]
+                     for slide in Presentation(io.BytesIO(pptx_bytes)).slides]
+            self.assertEqual(pages, [[["A", "a0", "a1"], ["B", "b0", "b1"]],
+                                     [["A", "a2", "a3"], ["B", "b2"]],
+                                     [["A", "a4"], ["B"]]])
+
+    def test_table_overflow_after_a_removed_slide(self):
+        template = Presentation(str(TEMPLATE_DIR / "table_test.pptx"))
+        for text in ["S $repeat_s.name$", "End"]:
+            slide = template.slides.add_slide(template.slide_layouts[5])
+            slide.shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(1)).text_frame.text = text
+        # The removed slide comes before the table
+        template.slides._sldIdLst.insert(0, template.slides._sldIdLst[1])
+        template.save(str(TEMPLATE_DIR / "table_overflow_removed_test.pptx"))
+        context = {
+            "repeat_s": [],
+            "relationship_people": [{"id": str(index), "first_name": f"First{index}", "last_name": "Last"}
+                                    for index in range(25)]
+        }
+        ppt = TemplatePptx(str(TEMPLATE_DIR / "table_overflow_removed_test.pptx"), context)
+        ppt.options.max_table_rows = 10
+        pptx_bytes = ppt.render()
+
+        with zipfile.ZipFile(io.BytesIO(pptx_bytes)) as rendered:
+            names = rendered.namelist()
+        self.assertEqual(len(names), len(set(names)))
+        slides = Presentation(io.BytesIO(pptx_bytes)).slides
+        tables = [[shape for shape in slide.shapes if shape.has_table][0].table for slide in list(slides)[:3]]
+        self.assertEqual([table.cell(1, 1).text for table in tables], ["First0", "First10", "First20"])
+        self.assertEqual([shape.text_frame.text for shape in slides[3].shapes
+                          if shape.has_text_frame and shape.text_frame.text], ["End"])
+
+    def test_render_stats_reported_to_callback(self):
+        collected = []
+        context = {"exampleone": "Stats", "relationship_people": [
+            {"id": str(index), "first_name": "Alice", "last_name": "Anderson"} for index in range(4)]}
+
+        ppt = TemplatePptx(str(TEMPLATE_DIR / "textbox_test.pptx"), context)
+        ppt.options.stats_callback = collected.append
+        rendered = ppt.render()
+        compiled = CompiledTemplate(str(TEMPLATE_DIR / "table_test.pptx"), options=ppt.options)
+        compiled.render(context, str(OUTPUT_DIR / "stats_table_output.pptx"))
+        compiled.options.stats_callback = None
+        compiled.render(context)
+
+        self.assertEqual(len(collected), 2)
+        text_stats, table_stats = collected
+        self.assertEqual(text_stats.placeholders_replaced, 1)
+        self.assertGreaterEqual(text_stats.runs_scanned, 1)
+        self.assertEqual(text_stats.bytes_written, len(rendered))
+        self.assertEqual(list(text_stats.slide_seconds), [1])
+        self.assertEqual(table_stats.rows_added, 4)
+        self.assertGreater(table_stats.stage_seconds["table"], 0)
+        self.assertEqual(table_stats.bytes_written, (OUTPUT_DIR / "stats_table_output.pptx").stat().st_size)
+        self.assertEqual(table_stats.as_dict()["rows_added"], 4)
+
+    def test_lazy_context_values_resolved_once_when_used(self):
+        calls = []
+
+        def lazy(name, value):
+            def resolve():
+                calls.append(name)
+                return value
+            return resolve
+
+        def unused():
+            raise AssertionError("A value the template does not use was resolved")
+
+        context = {"exampleone": lazy("text", "Lazy"), "unused": unused,
+                   "relationship_people": lazy("table", [{"id": "7", "first_name": "Lazy", "last_name": "Row"}]),
+                   "placeholder.png": lazy("picture", "tests/assets/photo1.png")}
+        for template in ["textbox_test.pptx", "table_test.pptx", "photo_test.pptx"]:
+            rendered = CompiledTemplate(str(TEMPLATE_DIR / template)).render(context)
+            slide = Presentation(io.BytesIO(rendered)).slides[0]
+            text = " ".join(shape.text_frame.text for shape in slide.shapes if shape.has_text_frame)
+            if template == "textbox_test.pptx":
+                self.assertIn("Lazy", text)
+            if template == "table_test.pptx":
+                table = next(shape.table for shape in slide.shapes if shape.has_table)
+                self.assertEqual(table.cell(1, 2).text, "Row")
+            if template == "photo_test.pptx":
+                picture = next(shape for shape in slide.shapes if shape.shape_type == 13)
+                self.assertEqual(picture.image.blob, Path("tests/assets/photo1.png").read_bytes())
+
+        self.assertEqual(calls, ["text", "table", "picture"])
+
+    def test_analyze_and_validate_without_rendering(self):
+        table_analysis = TemplatePptx(str(TEMPLATE_DIR / "table_test.pptx"), {"unused": 1}).analyze()
+        photo_analysis = TemplatePptx(str(TEMPLATE_DIR / "photo_test.pptx"), {"unused": 1}).analyze()
+        text_analysis = TemplateAnalysis(CompiledTemplate(str(TEMPLATE_DIR / "textbox_test.pptx")).sites)
+
+        self.assertEqual(list(text_analysis.placeholders), ["exampleone", "exampletwo", "examplethree",
+                                                             "examplefour", "examplefive", "examplesix"])
+        self.assertEqual([issue.key for issue in text_analysis.validate({"exampleone": 1, "exampletwo": 2,
+                                                                         "examplethree": 3, "examplefour": 4,
+                                                                         "examplefive": 5})], ["examplesix"])
+
+        relationship = table_analysis.relationships["relationship_people"]
+        self.assertEqual(relationship.fields, ("id", "first_name", "last_name"))
+        self.assertEqual(relationship.slide_numbers, (1,))
+        self.assertEqual(photo_analysis.pictures, {"placeholder.png": (1,)})
+        self.assertEqual(photo_analysis.required_keys, {"placeholder.png"})
+
+        valid = {"relationship_people": [{"id": "1", "first_name": "Alice", "last_name": "Anderson"}]}
+        self.assertEqual(table_analysis.validate(valid), [])
+        self.assertEqual(table_analysis.validate({"relationship_people": {"id": [1], "first_name": ["A"],
+                                                                          "last_name": ["B"]}}), [])
+        issues = table_analysis.validate({"relationship_people": [{"id": "1", "first_name": "Alice"}]})
+        self.assertEqual([(issue.kind, issue.key) for issue in issues], [("table", "relationship_people.last_name")])
+        issues = table_analysis.validate({"relationship_people": []})
+        self.assertEqual([issue.key for issue in issues], ["relationship_people"])
+        issues = photo_analysis.validate({})
+        self.assertEqual([(issue.kind, issue.key, issue.slide_numbers) for issue in issues],
+                         [("picture", "placeholder.png", (1,))])
+
+    def test_analyze_with_a_literal_special_character(self):
+        template = Presentation()
+        for text in ["Costs US$ 5 for $name$", "$day$/$month$ and $year$"]:
+            slide = template.slides.add_slide(template.slide_layouts[5])
+            slide.shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(1)).text_frame.text = text
+        template.save(str(TEMPLATE_DIR / "analysis_currency_test.pptx"))
+
+        analysis = TemplatePptx(str(TEMPLATE_DIR / "analysis_currency_test.pptx"), {"unused": 1}).analyze()
+
+        self.assertEqual(analysis.placeholders, {"name": (1,), "day": (2,), "month": (2,), "year": (2,)})
+        issues = analysis.validate({"day": 1, "month": 2, "year": 3})
+        self.assertEqual([(issue.key, issue.slide_numbers) for issue in issues], [("name", (1,))])
+
     def test_photo_replacement(self):
         context = {
             "placeholder.png": "tests/assets/photo1.png"
@@ -159,6 +411,61 @@ class TestTemplatePptx(unittest.TestCase):
             self.assertNotIn("placeholder.png", alt, "Placeholder alt text was not replaced in image")
         
 
+    def test_repeated_photo_is_stored_once(self):
+        template = Presentation(str(TEMPLATE_DIR / "photo_test.pptx"))
+        slide = template.slides[0]
+        for index in range(3):
+            picture = slide.shapes.add_picture("tests/assets/placeholder.png", Inches(index), Inches(5), height=Inches(1))
+            picture._element.nvPicPr.cNvPr.set("descr", "placeholder.png")
+        template.save(str(TEMPLATE_DIR / "photo_many_test.pptx"))
+        image_cache = ImageCache()
+        default_image_cache.clear()
+
+        output_path = OUTPUT_DIR / "photo_many_output.pptx"
+        CompiledTemplate(str(TEMPLATE_DIR / "photo_many_test.pptx")).render(
+            {"placeholder.png": "tests/assets/photo1.png"}, str(output_path))
+
+        self.assertEqual(len(default_image_cache), 1)
+        with zipfile.ZipFile(output_path) as output:
+            media = [name for name in output.namelist() if name.startswith("ppt/media/")]
+        self.assertEqual(len(media), 1)
+        self.assertIs(image_cache.get("tests/assets/photo1.png"), image_cache.get("tests/assets/photo1.png"))
+        image_cache.max_bytes = 0
+        self.assertEqual(len(image_cache), 0)
+
+    def test_each_photo_uses_its_own_alt_text(self):
+        template = Presentation()
+        slide = template.slides.add_slide(template.slide_layouts[6])
+        for index, alt_text in enumerate(["first.png", "second.png"]):
+            picture = slide.shapes.add_picture("tests/assets/placeholder.png", Inches(index * 4), Inches(1), height=Inches(2))
+            picture._element.nvPicPr.cNvPr.set("descr", alt_text)
+        template.save(str(TEMPLATE_DIR / "photo_two_test.pptx"))
+
+        helper = TemplateTestHelper(
+            template_file="photo_two_test.pptx",
+            output_file="photo_two_output.pptx",
+            context={"first.png": "tests/assets/photo1.png", "second.png": "tests/assets/placeholder.png"}
+        )
+        helper.run_template_engine()
+
+        pictures = sorted(Presentation(str(helper.output_path)).slides[0].shapes, key=lambda shape: shape.left)
+        self.assertEqual(len(pictures), 2)
+        self.assertEqual(pictures[0].image.blob, Path("tests/assets/photo1.png").read_bytes())
+        self.assertEqual(pictures[1].image.blob, Path("tests/assets/placeholder.png").read_bytes())
+
+    def test_photo_downscaled_to_picture_size(self):
+        output_path = OUTPUT_DIR / "photo_downscaled_output.pptx"
+        ppt = TemplatePptx(str(TEMPLATE_DIR / "photo_test.pptx"), {"placeholder.png": "tests/assets/photo1.png"},
+                           str(output_path))
+        ppt.options.strict_mode = True
+        ppt.options.image_dpi = 20
+        ppt.parse_template_pptx()
+
+        picture = Presentation(str(output_path)).slides[0].shapes[-1]
+        # The template picture is 3 inches high, 60 pixels at 20 dpi
+        self.assertEqual(picture.image.size[1], 60)
+        self.assertEqual(picture.height, Inches(3))
+
     def test_photo_failure_replacement(self):
         """Should fail because the photo does not exist"""
         context = {
@@ -188,5 +495,555 @@ class TestTemplatePptx(unittest.TestCase):
         with self.assertRaises(AltTextForImageNotFound):
             helper.run_template_engine()
 
+    def test_compiled_template_renders_many_contexts(self):
+        compiled = CompiledTemplate(str(TEMPLATE_DIR / "textbox_test.pptx"))
+
+        for index in range(3):
+            context = {f"example{word}": f"compiled_{word}_{index}"
+                       for word in ["one", "two", "three", "four", "five", "six"]}
+            helper = TemplateTestHelper(
+                template_file="textbox_test.pptx",
+                output_file=f"compiled_output_{index}.pptx",
+                context=context
+            )
+            compiled.render(context, str(helper.output_path))
+            helper.assert_replacements(self)
+
+    def test_compiled_template_renders_without_parsing_the_template_again(self):
+        context = {"placeholder.png": str(ASSETS_DIR / "photo1.png")}
+        template_path = str(TEMPLATE_DIR / "photo_test.pptx")
+        compiled = CompiledTemplate(template_path)
+        expected = TemplatePptx(template_path, context).render()
+
+        with mock.patch("compiled_template.open_presentation") as open_presentation:
+            first = compiled.render(context)
+            second = compiled.render(context)
+
+        open_presentation.assert_not_called()
+        self.assertEqual(first, second)
+        with zipfile.ZipFile(io.BytesIO(expected)) as before, zipfile.ZipFile(io.BytesIO(first)) as after:
+            self.assertEqual(before.namelist(), after.namelist())
+            for name in before.namelist():
+                self.assertEqual(before.read(name), after.read(name), name)
+
+    def test_incremental_render_only_changes_affected_slides(self):
+        template = Presentation()
+        for key in ["exampleone", "exampletwo", "examplethree"]:
+            slide = template.slides.add_slide(template.slide_layouts[5])
+            slide.shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(1)).text_frame.text = f"Value ${key}$"
+        template.save(str(TEMPLATE_DIR / "incremental_test.pptx"))
+        compiled = CompiledTemplate(str(TEMPLATE_DIR / "incremental_test.pptx"))
+        context = {"exampleone": "One", "exampletwo": "Two", "examplethree": "Three"}
+        previous = compiled.render(context)
+
+        changed = dict(context, exampletwo="Changed")
+        output_path = OUTPUT_DIR / "incremental_output.pptx"
+        compiled.render_incremental(previous, changed, ["exampletwo"], str(output_path))
+
+        self.assertEqual(compiled.dependencies["exampletwo"], (2,))
+        texts = [slide.shapes[-1].text_frame.text for slide in Presentation(str(output_path)).slides]
+        self.assertEqual(texts, ["Value One", "Value Changed", "Value Three"])
+        with zipfile.ZipFile(io.BytesIO(previous)) as before, zipfile.ZipFile(output_path) as after:
+            changed_entries = [name for name in after.namelist() if after.read(name) != before.read(name)]
+        self.assertEqual(changed_entries, ["ppt/slides/slide2.xml"])
+        self.assertEqual(compiled.render_incremental(previous, changed, ["unused"]), previous)
+
+    def test_incremental_render_after_a_literal_special_character(self):
+        template = Presentation()
+        for text in ["Costs US$ 5 for $name$", "Title $title$\nsecond $ $"]:
+            slide = template.slides.add_slide(template.slide_layouts[5])
+            slide.shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(1)).text_frame.text = text
+        template.save(str(TEMPLATE_DIR / "incremental_currency_test.pptx"))
+        compiled = CompiledTemplate(str(TEMPLATE_DIR / "incremental_currency_test.pptx"))
+        context = {"name": "Ada", "title": "Prices"}
+        previous = compiled.render(context)
+
+        changed = dict(context, name="Bob")
+        rendered = compiled.render_incremental(previous, changed, ["name"])
+
+        self.assertEqual(compiled.dependencies, {"name": (1,), "title": (2,)})
+        texts = [slide.shapes[-1].text_frame.text for slide in Presentation(io.BytesIO(rendered)).slides]
+        self.assertEqual(texts, ["Costs US$ 5 for Bob", "Title Prices\nsecond $ $"])
+
+    def test_slide_workers_render_same_deck(self):
+        template = Presentation()
+        for index in range(4):
+            slide = template.slides.add_slide(template.slide_layouts[5])
+            slide.shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(1)).text_frame.text = f"Slide $value{index}$"
+        picture = template.slides.add_slide(template.slide_layouts[5]).shapes.add_picture(
+            str(ASSETS_DIR / "placeholder.png"), Inches(1), Inches(1))
+        picture._element._nvXxPr.cNvPr.set("descr", "photo")
+        template.save(str(TEMPLATE_DIR / "slide_workers_test.pptx"))
+        context = {f"value{index}": f"Rendered {index}" for index in range(4)}
+        context["photo"] = str(ASSETS_DIR / "photo1.png")
+
+        serial = TemplatePptx(str(TEMPLATE_DIR / "slide_workers_test.pptx"), context).render()
+        ppt = TemplatePptx(str(TEMPLATE_DIR / "slide_workers_test.pptx"), context)
+        ppt.options.slide_workers = 2
+        parallel = ppt.render()
+
+        decks = [Presentation(io.BytesIO(pptx_bytes)) for pptx_bytes in [serial, parallel]]
+        texts = [[shape.text_frame.text for slide in deck.slides for shape in slide.shapes if shape.has_text_frame]
+                 for deck in decks]
+        self.assertEqual(texts[1], texts[0])
+        self.assertIn("Slide Rendered 3", texts[1])
+        blobs = [[shape.image.blob for slide in deck.slides for shape in slide.shapes if shape.shape_type == 13]
+                 for deck in decks]
+        self.assertEqual(blobs[1], [(ASSETS_DIR / "photo1.png").read_bytes()])
+        self.assertEqual(blobs[1], blobs[0])
+        with self.assertRaises(ValueError):
+            ppt.options.slide_workers = 0
+
+        # The slides of a PowerPoint-saved template are put back together without rendering the deck again
+        save_with_powerpoint_xml(str(TEMPLATE_DIR / "slide_workers_test.pptx"),
+                                 str(TEMPLATE_DIR / "slide_workers_powerpoint_test.pptx"))
+        ppt = TemplatePptx(str(TEMPLATE_DIR / "slide_workers_powerpoint_test.pptx"), context)
+        ppt.options.slide_workers = 2
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            parallel = ppt.render()
+        deck = Presentation(io.BytesIO(parallel))
+        self.assertEqual([shape.text_frame.text for slide in deck.slides for shape in slide.shapes
+                          if shape.has_text_frame], texts[0])
+
+    def test_xml_engine_matches_default_engine(self):
+        context = {f"example{word}": f"xml_{word}" for word in ["one", "two", "three", "four", "five", "six"]}
+        context["relationship_people"] = [{"id": "1", "first_name": "Alice", "last_name": "Anderson"},
+                                          {"id": "2", "first_name": "Bob", "last_name": "Brown"}]
+        context["placeholder.png"] = str(ASSETS_DIR / "photo1.png")
+
+        def describe(shape):
+            return (shape.shape_type, shape.text_frame.text if shape.has_text_frame else None,
+                    [cell.text for cell in shape.table.iter_cells()] if shape.has_table else None,
+                    shape.image.blob if shape.shape_type == 13 else None)
+
+        rendered = []
+        for template in ["textbox_test.pptx", "table_test.pptx", "photo_test.pptx"]:
+            decks = []
+            for xml_engine in [False, True]:
+                ppt = TemplatePptx(str(TEMPLATE_DIR / template), context)
+                ppt.options.xml_engine = xml_engine
+                deck = Presentation(io.BytesIO(ppt.render()))
+                decks.append([describe(shape) for slide in deck.slides for shape in slide.shapes])
+            self.assertEqual(decks[1], decks[0])
+            rendered.append(decks[1])
+        self.assertIn("xml_six", rendered[0][-1][1])
+        self.assertIn("Brown", next(shape[2] for shape in rendered[1] if shape[2]))
+        self.assertEqual(rendered[2][-1][3], (ASSETS_DIR / "photo1.png").read_bytes())
+
+    def test_low_memory_renders_one_slide_at_a_time(self):
+        template = Presentation()
+        for index in range(3):
+            slide = template.slides.add_slide(template.slide_layouts[5])
+            slide.shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(1)).text_frame.text = f"Slide $value{index}$"
+            picture = slide.shapes.add_picture(str(ASSETS_DIR / "placeholder.png"), Inches(1), Inches(2))
+            picture._element._nvXxPr.cNvPr.set("descr", "photo" if index == 1 else "unused")
+        template.save(str(TEMPLATE_DIR / "low_memory_test.pptx"))
+        context = {"value0": "Zero", "value1": "One", "value2": "Two", "photo": str(ASSETS_DIR / "photo1.png")}
+
+        output_path = OUTPUT_DIR / "low_memory_output.pptx"
+        ppt = TemplatePptx(str(TEMPLATE_DIR / "low_memory_test.pptx"), context, str(output_path))
+        ppt.options.low_memory = True
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            ppt.parse_template_pptx()
+        self.assertIsNone(ppt._presentation)
+
+        slides = Presentation(str(output_path)).slides
+        texts = [shape.text_frame.text for slide in slides for shape in slide.shapes if shape.has_text_frame]
+        self.assertEqual(texts[1::2], ["Slide Zero", "Slide One", "Slide Two"])
+        blobs = [shape.image.blob for slide in slides for shape in slide.shapes if shape.shape_type == 13]
+        self.assertEqual(blobs[1], (ASSETS_DIR / "photo1.png").read_bytes())
+        self.assertEqual(blobs[0], (ASSETS_DIR / "placeholder.png").read_bytes())
+        self.assertEqual(blobs[2], blobs[0])
+        with zipfile.ZipFile(output_path) as rendered:
+            media = [name for name in rendered.namelist() if name.startswith("ppt/media/")]
+        self.assertEqual(len(media), 2)
+
+    def test_low_memory_warns_when_the_whole_deck_is_needed(self):
+        records = [{"id": str(index), "first_name": f"First{index}", "last_name": "Last"} for index in range(5)]
+        ppt = TemplatePptx(str(TEMPLATE_DIR / "table_test.pptx"), {"relationship_people": records})
+        ppt.options.low_memory = True
+        ppt.options.max_table_rows = 2
+        with self.assertWarnsRegex(UserWarning, "max_table_rows renders the whole deck"):
+            pptx_bytes = ppt.render()
+        tables = [shape.table for slide in Presentation(io.BytesIO(pptx_bytes)).slides
+                  for shape in slide.shapes if shape.has_table]
+        self.assertEqual(len(tables), 3)
+
+        template = Presentation()
+        slide = template.slides.add_slide(template.slide_layouts[5])
+        slide.shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(1)).text_frame.text = "$repeat_r.name$"
+        template.save(str(TEMPLATE_DIR / "low_memory_repeat_test.pptx"))
+        ppt = TemplatePptx(str(TEMPLATE_DIR / "low_memory_repeat_test.pptx"),
+                           {"repeat_r": [{"name": "x"}, {"name": "y"}]})
+        ppt.options.low_memory = True
+        with self.assertWarnsRegex(UserWarning, "Repeated slides need the whole deck"):
+            pptx_bytes = ppt.render()
+        texts = [shape.text_frame.text for slide in Presentation(io.BytesIO(pptx_bytes)).slides
+                 for shape in slide.shapes if shape.has_text_frame and shape.text_frame.text]
+        self.assertEqual(texts, ["x", "y"])
+
+    def test_low_memory_does_not_read_the_media_of_the_template(self):
+        template = Presentation()
+        for index in range(2):
+            slide = template.slides.add_slide(template.slide_layouts[5])
+            slide.shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(1)).text_frame.text = f"Slide $value{index}$"
+        with tempfile.TemporaryDirectory() as temp_dir:
+            movie_path = Path(temp_dir) / "movie.mp4"
+            movie_path.write_bytes(bytes(range(256)) * 64)
+            template.slides[1].shapes.add_movie(str(movie_path), Inches(1), Inches(2), Inches(4), Inches(3),
+                                                poster_frame_image=str(ASSETS_DIR / "placeholder.png"),
+                                                mime_type="video/mp4")
+        template.save(str(TEMPLATE_DIR / "low_memory_movie_test.pptx"))
+
+        read_partnames = []
+        original_read = package_merger._SourcePackage.read
+
+        def read(package, partname):
+            read_partnames.append(partname)
+            return original_read(package, partname)
+
+        ppt = TemplatePptx(str(TEMPLATE_DIR / "low_memory_movie_test.pptx"), {"value0": "Zero", "value1": "One"})
+        ppt.options.low_memory = True
+        with mock.patch.object(package_merger._SourcePackage, "read", read):
+            pptx_bytes = ppt.render()
+
+        self.assertFalse([partname for partname in read_partnames if partname.startswith("/ppt/media/")])
+        with zipfile.ZipFile(str(TEMPLATE_DIR / "low_memory_movie_test.pptx")) as before, \
+                zipfile.ZipFile(io.BytesIO(pptx_bytes)) as after:
+            self.assertEqual({name: after.read(name) for name in after.namelist() if name.startswith("ppt/media/")},
+                             {name: before.read(name) for name in before.namelist() if name.startswith("ppt/media/")})
+        texts = [shape.text_frame.text for slide in Presentation(io.BytesIO(pptx_bytes)).slides
+                 for shape in slide.shapes if shape.has_text_frame and shape.text_frame.text]
+        self.assertEqual(texts, ["Slide Zero", "Slide One"])
+
+    def test_low_memory_with_powerpoint_saved_template(self):
+        template = Presentation()
+        for index in range(3):
+            slide = template.slides.add_slide(template.slide_layouts[5])
+            slide.shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(1)).text_frame.text = f"Slide $value{index}$"
+            picture = slide.shapes.add_picture(str(ASSETS_DIR / "placeholder.png"), Inches(1), Inches(2))
+            picture._element._nvXxPr.cNvPr.set("descr", "photo" if index == 1 else "unused")
+        template.save(str(TEMPLATE_DIR / "python_pptx_saved_test.pptx"))
+        save_with_powerpoint_xml(str(TEMPLATE_DIR / "python_pptx_saved_test.pptx"),
+                                 str(TEMPLATE_DIR / "powerpoint_saved_test.pptx"))
+        context = {"value0": "Zero", "value1": "One", "value2": "Two", "photo": str(ASSETS_DIR / "photo1.png")}
+
+        ppt = TemplatePptx(str(TEMPLATE_DIR / "powerpoint_saved_test.pptx"), context)
+        ppt.options.low_memory = True
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            pptx_bytes = ppt.render()
+        # Every slide was written one at a time, the whole deck was not rendered instead
+        self.assertFalse([warning for warning in caught if "whole deck" in str(warning.message)])
+        self.assertIsNone(ppt._presentation)
+
+        slides = Presentation(io.BytesIO(pptx_bytes)).slides
+        texts = [shape.text_frame.text for slide in slides for shape in slide.shapes
+                 if shape.has_text_frame and shape.text_frame.text]
+        self.assertEqual(texts, ["Slide Zero", "Slide One", "Slide Two"])
+        blobs = [shape.image.blob for slide in slides for shape in slide.shapes if shape.shape_type == 13]
+        self.assertEqual(blobs[1], (ASSETS_DIR / "photo1.png").read_bytes())
+
+    def test_repeated_slide_cloned_per_record(self):
+        template = Presentation()
+        for text in ["Customers of $region$", "$repeat_customers.name$ from $region$", "The end"]:
+            slide = template.slides.add_slide(template.slide_layouts[5])
+            slide.shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(1)).text_frame.text = text
+        template.save(str(TEMPLATE_DIR / "repeat_test.pptx"))
+        customers = [{"name": "Ada"}, {"name": "Bob"}, {"name": "Cy"}]
+
+        def slide_texts(pptx_bytes):
+            return [shape.text_frame.text for slide in Presentation(io.BytesIO(pptx_bytes)).slides
+                    for shape in slide.shapes if shape.has_text_frame and shape.text_frame.text]
+
+        expected = ["Customers of West", "Ada from West", "Bob from West", "Cy from West", "The end"]
+        rendered = TemplatePptx(str(TEMPLATE_DIR / "repeat_test.pptx"),
+                                {"region": "West", "repeat_customers": iter(customers)}).render()
+        self.assertEqual(slide_texts(rendered), expected)
+        compiled = CompiledTemplate(str(TEMPLATE_DIR / "repeat_test.pptx"))
+        self.assertEqual(slide_texts(compiled.render({"region": "West", "repeat_customers": customers})), expected)
+        self.assertEqual(compiled.dependencies["repeat_customers"], (2,))
+
+        rendered = TemplatePptx(str(TEMPLATE_DIR / "repeat_test.pptx"), {"region": "West", "repeat_customers": []}).render()
+        self.assertEqual(slide_texts(rendered), ["Customers of West", "The end"])
+        issues = TemplateAnalysis(compiled.sites).validate({"region": "West", "repeat_customers": [{"id": 1}]})
+        self.assertEqual([issue.key for issue in issues], ["repeat_customers.name"])
+
+    def test_repeated_slides_after_a_removed_slide_keep_unique_names(self):
+        template = Presentation()
+        for text in ["A $a$", "S $repeat_s.name$", "B $b$", "R $repeat_r.name$", "C $c$"]:
+            slide = template.slides.add_slide(template.slide_layouts[5])
+            slide.shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(1)).text_frame.text = text
+        template.save(str(TEMPLATE_DIR / "repeat_removed_test.pptx"))
+        context = {"a": 1, "b": 2, "c": 3, "repeat_s": [], "repeat_r": [{"name": "x"}, {"name": "y"}]}
+
+        rendered = [TemplatePptx(str(TEMPLATE_DIR / "repeat_removed_test.pptx"), context).render(),
+                    CompiledTemplate(str(TEMPLATE_DIR / "repeat_removed_test.pptx")).render(context)]
+        for pptx_bytes in rendered:
+            with zipfile.ZipFile(io.BytesIO(pptx_bytes)) as rendered_zip:
+                names = rendered_zip.namelist()
+            self.assertEqual(len(names), len(set(names)))
+            texts = [shape.text_frame.text for slide in Presentation(io.BytesIO(pptx_bytes)).slides
+                     for shape in slide.shapes if shape.has_text_frame and shape.text_frame.text]
+            self.assertEqual(texts, ["A 1", "B 2", "R x", "R y", "C 3"])
+
+    def test_incremental_render_with_repeated_slides(self):
+        template = Presentation()
+        for text in ["A $a$", "S $repeat_s.name$", "B $b$", "R $repeat_r.name$", "C $c$"]:
+            slide = template.slides.add_slide(template.slide_layouts[5])
+            slide.shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(1)).text_frame.text = text
+        template.save(str(TEMPLATE_DIR / "repeat_incremental_test.pptx"))
+        compiled = CompiledTemplate(str(TEMPLATE_DIR / "repeat_incremental_test.pptx"))
+        context = {"a": 1, "b": 2, "c": 3, "repeat_s": [], "repeat_r": [{"name": "x"}, {"name": "y"}]}
+        previous = compiled.render(context)
+
+        changed = dict(context, b="CHANGED")
+        rendered = compiled.render_incremental(previous, changed, ["b"])
+
+        texts = [shape.text_frame.text for slide in Presentation(io.BytesIO(rendered)).slides
+                 for shape in slide.shapes if shape.has_text_frame and shape.text_frame.text]
+        self.assertEqual(texts, ["A 1", "B CHANGED", "R x", "R y", "C 3"])
+
+    def test_nested_group_shapes_at_any_depth(self):
+        template = Presentation()
+        slide = template.slides.add_slide(template.slide_layouts[6])
+        inner = slide.shapes.add_group_shape().shapes.add_group_shape()
+        inner.shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(1)).text_frame.text = "Hello $name$"
+        picture = inner.shapes.add_picture(str(ASSETS_DIR / "placeholder.png"), Inches(1), Inches(2))
+        picture._element._nvXxPr.cNvPr.set("descr", "photo")
+        table = slide.shapes.add_table(2, 1, Inches(5), Inches(1), Inches(2), Inches(1))
+        table.table.cell(0, 0).text = "Names"
+        table.table.cell(1, 0).text = "$relationship_people.name$"
+        inner._element.append(table._element)
+        template.save(str(TEMPLATE_DIR / "nested_group_test.pptx"))
+        context = {"name": "World", "photo": str(ASSETS_DIR / "photo1.png"),
+                   "relationship_people": [{"name": "Ada"}, {"name": "Bob"}]}
+
+        rendered = []
+        for xml_engine in [False, True]:
+            ppt = TemplatePptx(str(TEMPLATE_DIR / "nested_group_test.pptx"), context)
+            ppt.options.xml_engine = xml_engine
+            rendered.append(ppt.render())
+        rendered.append(CompiledTemplate(str(TEMPLATE_DIR / "nested_group_test.pptx")).render(context))
+
+        for pptx_bytes in rendered:
+            outer = Presentation(io.BytesIO(pptx_bytes)).slides[0].shapes[0]
+            self.assertEqual(len(outer.shapes), 1)
+            shapes = list(outer.shapes[0].shapes)
+            self.assertEqual(shapes[0].text_frame.text, "Hello World")
+            self.assertEqual([cell.text for cell in shapes[1].table.iter_cells()], ["Names", "Ada", "Bob"])
+            # The new picture takes the place of the template picture inside of the group
+            self.assertEqual(shapes[2].image.blob, (ASSETS_DIR / "photo1.png").read_bytes())
+            self.assertEqual(shapes[2].top, Inches(2))
+
+    def test_render_to_bytes_from_bytes(self):
+        context = {"exampleone": "in_memory"}
+        template_bytes = (TEMPLATE_DIR / "textbox_test.pptx").read_bytes()
+        unused_output = OUTPUT_DIR / "never_written.pptx"
+
+        ppt = TemplatePptx(template_bytes, context, str(unused_output))
+        rendered = ppt.render()
+        compiled_rendered = CompiledTemplate(io.BytesIO(template_bytes)).render(context)
+
+        self.assertFalse(unused_output.exists())
+        for pptx_bytes in [rendered, compiled_rendered]:
+            slide = Presentation(io.BytesIO(pptx_bytes)).slides[0]
+            text = " ".join(shape.text_frame.text for shape in slide.shapes if shape.has_text_frame)
+            self.assertIn("in_memory", text)
+            self.assertNotIn("$exampleone$", text)
+
+    def test_parse_to_file_like_output(self):
+        output = io.BytesIO()
+        with open(TEMPLATE_DIR / "textbox_test.pptx", "rb") as template:
+            returned = TemplatePptx(template, {"exampletwo": "streamed"}, output).parse_template_pptx()
+        self.assertIs(returned, output)
+        output.seek(0)
+        self.assertEqual(len(Presentation(output).slides), 1)
+
+    def test_compiled_template_records_sites(self):
+        compiled = TemplatePptx(str(TEMPLATE_DIR / "table_test.pptx"), {"a": "b"},
+                                str(OUTPUT_DIR / "unused.pptx")).compile()
+
+        self.assertEqual([site.kind for site in compiled.sites], ["table"])
+        self.assertIn("relationship_people.first_name", compiled.sites[0].keys)
+
+        context = {
+            "relationship_people": [
+                {"id": "1", "first_name": "Alice", "last_name": "Anderson"},
+                {"id": "2", "first_name": "Bob", "last_name": "Brown"}
+            ]
+        }
+        output_path = str(OUTPUT_DIR / "compiled_table_output.pptx")
+        compiled.render(context, output_path)
+        text = TemplateTestHelper("table_test.pptx", "compiled_table_output.pptx", context).extract_text()
+        self.assertIn("Alice", text)
+        self.assertIn("Brown", text)
+        self.assertNotIn("$relationship_people.id$", text)
+
+    def test_render_many_reports_each_result(self):
+        contexts = [{"exampleone": f"batch_{index}"} for index in range(4)]
+        output_pattern = str(OUTPUT_DIR / "batch_{index}.pptx")
+
+        for workers in [1, 2]:
+            collected = []
+            options = TemplatePptxOptions()
+            # A lambda cannot be sent to the worker processes, the callback runs in this process
+            options.stats_callback = lambda stats: collected.append(stats)
+            results = render_many(str(TEMPLATE_DIR / "textbox_test.pptx"), iter(contexts),
+                                  output_pattern, workers=workers, options=options)
+
+            self.assertEqual([result.index for result in results], [0, 1, 2, 3])
+            self.assertTrue(all(result.ok for result in results))
+            self.assertEqual([stats.placeholders_replaced for stats in collected], [1, 1, 1, 1])
+            self.assertIsNotNone(options.stats_callback)
+            text = TemplateTestHelper("textbox_test.pptx", "batch_3.pptx", contexts[3]).extract_text()
+            self.assertIn("batch_3", text)
+
+    def test_render_many_continues_after_a_failure(self):
+        contexts = [{"placeholder.png": "tests/assets/photo1.png"},
+                    {"placeholder.png": "Idontexist"},
+                    {"placeholder.png": "tests/assets/photo1.png"}]
+        options = TemplatePptxOptions()
+        options.strict_mode = True
+
+        results = render_many(str(TEMPLATE_DIR / "photo_test.pptx"), contexts,
+                              str(OUTPUT_DIR / "batch_photo_{index}.pptx"), workers=2, options=options)
+
+        self.assertEqual([result.ok for result in results], [True, False, True])
+        self.assertIsInstance(results[1].error, PictureFailedToBeReplaced)
+        self.assertIsNone(results[1].output_path)
+
+    def test_command_line_renders_jsonl_and_csv(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            jsonl_path = Path(temp_dir) / "contexts.jsonl"
+            jsonl_path.write_text('{"exampleone": "json_0"}\n\n{"exampleone": "json_1"}\n')
+            csv_path = Path(temp_dir) / "contexts.csv"
+            csv_path.write_text("exampleone\ncsv_0\ncsv_1\ncsv_2\n")
+            template = str(TEMPLATE_DIR / "textbox_test.pptx")
+            # A PowerPoint that was in the output folder before the run is not combined
+            (Path(temp_dir) / "jsonl").mkdir()
+            shutil.copy(template, str(Path(temp_dir) / "jsonl" / "old.pptx"))
+
+            with contextlib.redirect_stdout(io.StringIO()) as stdout:
+                exit_code = templatepptx_cli.main([template, str(jsonl_path), str(Path(temp_dir) / "jsonl" / "{index}.pptx"),
+                                                   "--combine", str(Path(temp_dir) / "combined.pptx")])
+                csv_exit_code = templatepptx_cli.main([template, str(csv_path), str(Path(temp_dir) / "csv" / "{exampleone}.pptx"),
+                                                       "--workers", "2", "--combine", str(Path(temp_dir) / "csv_combined.pptx")])
+
+            self.assertEqual((exit_code, csv_exit_code), (0, 0))
+            self.assertIn("Rendered 2 of 2 records", stdout.getvalue())
+            self.assertIn("records/sec", stdout.getvalue())
+            combined = Presentation(str(Path(temp_dir) / "combined.pptx"))
+            texts = [" ".join(shape.text_frame.text for shape in slide.shapes if shape.has_text_frame)
+                     for slide in combined.slides]
+            self.assertEqual(len(texts), 2)
+            self.assertIn("json_0", texts[0])
+            self.assertIn("json_1", texts[1])
+            self.assertEqual(len(Presentation(str(Path(temp_dir) / "csv_combined.pptx")).slides), 3)
+            self.assertEqual(sorted(path.name for path in (Path(temp_dir) / "csv").iterdir()),
+                             ["csv_0.pptx", "csv_1.pptx", "csv_2.pptx"])
+
+            # A bad line fails its record and the rest of the batch is still rendered and combined
+            bad_path = Path(temp_dir) / "bad.jsonl"
+            bad_path.write_text('{"exampleone": "good_0"}\n{"exampleone": \n{"exampleone": "good_2"}\n')
+            with contextlib.redirect_stdout(io.StringIO()) as stdout, \
+                    contextlib.redirect_stderr(io.StringIO()) as stderr:
+                bad_exit_code = templatepptx_cli.main([template, str(bad_path), str(Path(temp_dir) / "bad" / "{index}.pptx"),
+                                                       "--combine", str(Path(temp_dir) / "bad_combined.pptx")])
+            self.assertEqual(bad_exit_code, 1)
+            self.assertIn("Record 1 failed", stderr.getvalue())
+            self.assertIn("Line 2 of the contexts is not valid JSON", stderr.getvalue())
+            self.assertIn("Failed records: 1", stdout.getvalue())
+            self.assertEqual(len(Presentation(str(Path(temp_dir) / "bad_combined.pptx")).slides), 2)
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                missing_exit_code = templatepptx_cli.main([template, str(Path(temp_dir) / "missing.jsonl"),
+                                                           str(Path(temp_dir) / "missing" / "{index}.pptx")])
+            self.assertEqual(missing_exit_code, 2)
+
+    def test_combine_slides_in_sorted_order(self):
+        with tempfile.TemporaryDirectory() as pptx_dir:
+            for index in range(3):
+                CompiledTemplate(str(TEMPLATE_DIR / "textbox_test.pptx")).render(
+                    {"exampleone": f"combined_{index}"}, str(Path(pptx_dir) / f"{index * 2}.pptx"))
+                CompiledTemplate(str(TEMPLATE_DIR / "photo_test.pptx")).render(
+                    {"placeholder.png": "tests/assets/photo1.png"}, str(Path(pptx_dir) / f"{index * 2 + 1}.pptx"))
+            output_path = OUTPUT_DIR / "combined_streaming.pptx"
+            BatchTool(pptx_dir, str(output_path)).combine_slides(streaming=True)
+
+            combined = Presentation(str(output_path))
+            self.assertEqual(len(combined.slides), 6)
+            layout = combined.slide_layouts[6]
+            self.assertTrue(all(slide.slide_layout == layout for slide in combined.slides))
+
+            for streaming, workers in [(True, 2), (False, 2), (False, 1)]:
+                output_path = OUTPUT_DIR / "combined_workers.pptx"
+                BatchTool(pptx_dir, str(output_path)).combine_slides(streaming=streaming, workers=workers)
+
+                combined = Presentation(str(output_path))
+                self.assertEqual(len(combined.slides), 6)
+                texts = [shape.text_frame.text for shape in combined.slides[4].shapes if shape.has_text_frame]
+                self.assertIn("combined_2", " ".join(texts))
+                pictures = [shape for shape in combined.slides[5].shapes if shape.shape_type == 13]
+                self.assertEqual(pictures[0].image.blob, Path("tests/assets/photo1.png").read_bytes())
+                with zipfile.ZipFile(output_path) as output:
+                    media = [name for name in output.namelist() if name.startswith("ppt/media/")]
+                self.assertEqual(len(media), 1)
+
+    def test_async_render_and_batch(self):
+        async def contexts():
+            for index in range(5):
+                yield {"exampleone": f"async_{index}"}
+
+        async def render():
+            ppt = TemplatePptx(str(TEMPLATE_DIR / "textbox_test.pptx"), {"exampleone": "Async"})
+            rendered = await asyncio.gather(ppt.render_async(),
+                                            render_async(str(TEMPLATE_DIR / "textbox_test.pptx"), {"exampleone": "Async"}))
+            results = await render_many_async(str(TEMPLATE_DIR / "textbox_test.pptx"), contexts(),
+                                              str(OUTPUT_DIR / "async_{index}.pptx"), max_concurrency=2)
+            return rendered, results
+
+        rendered, results = asyncio.run(render())
+
+        for pptx_bytes in rendered:
+            text = " ".join(shape.text_frame.text for shape in Presentation(io.BytesIO(pptx_bytes)).slides[0].shapes
+                            if shape.has_text_frame)
+            self.assertIn("Async", text)
+        self.assertEqual([result.index for result in results], [0, 1, 2, 3, 4])
+        self.assertTrue(all(result.ok for result in results))
+        text = TemplateTestHelper("textbox_test.pptx", "async_4.pptx", {}).extract_text()
+        self.assertIn("async_4", text)
+
+
+class TestPlaceholderEngine(unittest.TestCase):
+
+    def _sequential_replace(self, text, context, special_character):
+        for key in context:
+            text = text.replace(f"{special_character}{key}{special_character}", str(context[key]))
+        return text
+
+    def test_matches_sequential_replace(self):
+        context = {"name": "John", "a": "A", "b": 2, 3: "three"}
+        texts = [
+            "Hello $name$!",
+            "cost $5 and $name$",
+            "$a$b$ $x$a$ $$ $3$",
+            "no magic words here",
+            "$name",
+            "$name$$name$$unknown$$a$",
+        ]
+        for special_character in ["$", "##"]:
+            engine = PlaceholderEngine(context, special_character)
+            for text in texts:
+                text = text.replace("$", special_character)
+                self.assertEqual(engine.substitute(text), self._sequential_replace(text, context, special_character))
+
+    def test_find_keys(self):
+        engine = PlaceholderEngine({"first": 1, "last": 2}, "$")
+        self.assertEqual(engine.find_keys("$first$ $middle$ $last$"), ["first", "last"])
+        self.assertFalse(engine.has_placeholder("$middle$"))
+
+
 if __name__ == "__main__":
     unittest.main()